@@ -0,0 +1,585 @@
+"""
+Benchmark harness for CLI commands and storage.
+
+Будує синтетичні AddressBook та NoteBook заданого розміру, вимірює час
+кожної команди з cli.COMMANDS, функцій збереження/завантаження (також з
+кожним кодеком стиснення) та масової перевірки контактів (в одному процесі
+й у пулі), а також пікову пам'ять. Команди вимірюються без кешу запитів;
+влучання в кеш вимірюються окремо (група query_cache), а агрегати
+contact-stats порівнюються з перебором Record (група analytics; вимір
+залежить від того, чи встановлено NumPy). Результати зберігаються у JSON; з
+--compare поточний запуск порівнюється з попереднім, і регресії повертають
+код 1.
+
+Приклади:
+    python -m personal_assistant.bench --sizes 10000 100000 -o bench.json
+    python -m personal_assistant.bench --compare bench.json
+    python -m personal_assistant.bench --codecs gzip xz
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, datetime
+
+from .cli import COMMANDS, output_lines
+from .compression import NO_COMPRESSION, available_codecs
+from .contacts.address_book import AddressBook
+from .contacts.contact import Record
+from .contacts.input_error import ErrorMessage
+from .contacts.validation import BulkValidator, validate_contact_rows
+from .notes.note import Note, NoteBook
+from .query_cache import QUERY_CACHE
+from .storage import (
+    BinaryStorage,
+    PickleStorage,
+    load_binary_data,
+    load_binary_notes,
+    load_data,
+    load_notes,
+    save_binary,
+    save_data,
+    save_notes,
+)
+from .transfer import (
+    CONTACT_FIELDS,
+    NOTE_FIELDS,
+    contact_rows,
+    export_file,
+    note_rows,
+)
+
+DEFAULT_SIZES = (10_000,)
+# Поріг, після якого сповільнення вважається регресією (1.25 = на 25% повільніше)
+DEFAULT_THRESHOLD = 1.25
+
+WORDS = (
+    "meeting", "project", "deadline", "milk", "bread", "call", "report",
+    "budget", "travel", "doctor", "gift", "review", "invoice", "plan",
+)
+TAGS = ("work", "home", "urgent", "shopping", "done", "ideas", "family")
+# Скільки контактів і нотаток містять файли для import-contacts / import-notes
+IMPORT_ROWS = 1000
+# Розмір сторінки для all-contacts / show-notes
+PAGE_SIZE = 50
+
+
+# -------------------------
+# SYNTHETIC DATA
+# -------------------------
+
+def contact_name(i):
+    return f"Contact{i}"
+
+
+def contact_phone(i):
+    return f"05{i % 10 ** 8:08d}"
+
+
+def build_book(size, seed=0):
+    """Створює AddressBook з size контактами."""
+    rng = random.Random(seed)
+    first_day = date(1950, 1, 1).toordinal()
+    last_day = date(2005, 12, 31).toordinal()
+    book = AddressBook()
+    for i in range(size):
+        record = Record(contact_name(i))
+        record.add_phone(contact_phone(i))
+        if i % 2:
+            record.add_phone(f"06{rng.randrange(10 ** 8):08d}")
+        birthday = date.fromordinal(rng.randint(first_day, last_day))
+        record.add_birthday(birthday.strftime("%d.%m.%Y"))
+        if i % 3:
+            record.add_email(f"contact{i}@example.com")
+        if i % 4 == 0:
+            record.add_address(f"Street_{rng.randrange(1000)}")
+        book.add_record(record)
+    return book
+
+
+def build_notebook(size, seed=0):
+    """Створює NoteBook з size нотатками."""
+    rng = random.Random(seed)
+    notebook = NoteBook()
+    for i in range(size):
+        content = " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+        tags = rng.sample(TAGS, rng.randint(0, 3))
+        notebook.add_note(Note(f"{content} #{i}", tags))
+    return notebook
+
+
+# -------------------------
+# COMMAND ARGUMENTS
+# -------------------------
+
+# Аргументи команди для i-го виклику. Команди, що змінюють дані, щоразу
+# працюють з іншим контактом чи нотаткою, тож виклики не заважають один одному.
+# Без аргументів викликаються лише команди, що їх не приймають (needs=());
+# для решти команди без запису тут бенчмарк завершується помилкою.
+COMMAND_ARGS = {
+    "add": lambda i, size: [f"Bench{i}", contact_phone(i)],
+    "search-contact": lambda i, size: [contact_name(i % size)[:-1] + "x"],
+    "find-by-phone": lambda i, size: [contact_phone(i % size)],
+    "find-by-email": lambda i, size: [f"contact{i % size}@example.com"],
+    "delete-contact": lambda i, size: [contact_name(size - 1 - i)],
+    "change": lambda i, size: [contact_name(i), contact_phone(i), "0991234567"],
+    "phone": lambda i, size: [contact_name(i % size)],
+    "all-contacts": lambda i, size: [
+        "--limit", str(PAGE_SIZE), "--after", contact_name(i * PAGE_SIZE % size)
+    ],
+    "add-birthday": lambda i, size: [contact_name(i), "01.01.2000"],
+    "show-birthday": lambda i, size: [contact_name(i % size)],
+    "birthdays": lambda i, size: [],
+    "find-birthday": lambda i, size: [f"{i % 28 + 1:02d}.05"],
+    "add-email": lambda i, size: [contact_name(i), f"bench{i}@example.com"],
+    "add-address": lambda i, size: [contact_name(i), "Kyiv"],
+    # Усі розділи статистики
+    "contact-stats": lambda i, size: [],
+    "add-note": lambda i, size: ["benchmark", "note", str(i)],
+    "find-note": lambda i, size: [WORDS[i % len(WORDS)]],
+    "show-notes": lambda i, size: [
+        "--limit", str(PAGE_SIZE), "--after", str(i * PAGE_SIZE % size)
+    ],
+    "edit-note": lambda i, size: [str(i + 1), "edited", "benchmark", "note"],
+    "delete-note": lambda i, size: [str(size - i)],
+    "add-tag": lambda i, size: [str(i + 1), "bench"],
+    "find-by-tag": lambda i, size: [TAGS[i % len(TAGS)]],
+    "sort-notes-by-tag": lambda i, size: [],
+}
+
+
+def transfer_args(directory, seed=0):
+    """
+    Готує у directory файли для імпорту (IMPORT_ROWS контактів і нотаток)
+    і повертає аргументи команд імпорту й експорту у форматі COMMAND_ARGS.
+
+    Імпортовані контакти мають власні імена, тож перший виклик додає їх,
+    а наступні доповнюють уже наявні; нотатки щоразу додаються заново.
+    """
+    contacts_file = os.path.join(directory, "import-contacts.csv")
+    notes_file = os.path.join(directory, "import-notes.jsonl")
+    export_file(contacts_file, CONTACT_FIELDS, (
+        {**row, "name": f"Imported{row['name']}"}
+        for row in contact_rows(build_book(IMPORT_ROWS, seed + 1))
+    ))
+    export_file(notes_file, NOTE_FIELDS, note_rows(build_notebook(IMPORT_ROWS, seed + 1)))
+    return {
+        "import-contacts": lambda i, size: [contacts_file],
+        "export-contacts": lambda i, size: [os.path.join(directory, f"export-{i % 2}.csv")],
+        "import-notes": lambda i, size: [notes_file],
+        "export-notes": lambda i, size: [os.path.join(directory, f"export-{i % 2}.jsonl")],
+    }
+
+
+# -------------------------
+# MEASUREMENT
+# -------------------------
+
+def measure(func, repeat):
+    """
+    Викликає func(i) для i у range(repeat) і повертає статистику.
+
+    Час вимірюється без tracemalloc; пікова пам'ять — окремим викликом
+    під tracemalloc (він суттєво сповільнює виконання). Виклики, що
+    завершились винятком або повернули ErrorMessage, рахуються в "errors".
+    """
+    timings = []
+    errors = 0
+    for i in range(repeat):
+        start = time.perf_counter()
+        try:
+            if isinstance(func(i), ErrorMessage):
+                errors += 1
+        except (KeyError, ValueError, IndexError):
+            errors += 1
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func(repeat)
+    except (KeyError, ValueError, IndexError):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "calls": repeat,
+        "errors": errors,
+        "mean_ms": sum(timings) / repeat * 1000,
+        "median_ms": timings[repeat // 2] * 1000,
+        "min_ms": timings[0] * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def _command_args(command, handler, args):
+    """Функція аргументів команди з args; без аргументів — лише для команд з needs=()."""
+    if command in args:
+        return args[command]
+    if handler.needs:
+        raise KeyError(f"No benchmark arguments for '{command}'. Add it to COMMAND_ARGS.")
+    return lambda i, size: []
+
+
+def bench_commands(book, notebook, size, repeat, seed=0):
+    """
+    Вимірює всі команди з cli.COMMANDS на тих самих book і notebook (без кешу).
+
+    Команди імпорту й експорту працюють з файлами в тимчасовому каталозі
+    (див. transfer_args).
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, QUERY_CACHE.disabled():
+        args = {**COMMAND_ARGS, **transfer_args(tmp, seed)}
+        for command, handler in COMMANDS.items():
+            make_args = _command_args(command, handler, args)
+
+            def run(i, handler=handler, make_args=make_args):
+                result = handler(make_args(i, size), book, notebook)
+                if not isinstance(result, ErrorMessage):
+                    # Лінивий вивід вичитується повністю, щоб вимірювати всю роботу команди
+                    list(output_lines(result))
+                return result
+
+            results[command] = measure(run, repeat)
+    return results
+
+
+def bench_query_cache(book, notebook, size, repeat):
+    """Вимірює повторні виклики команд з кешем запитів (влучання після першого виклику)."""
+    results = {}
+    QUERY_CACHE.clear()
+    for command, handler in COMMANDS.items():
+        if handler.cache_key is None:
+            continue
+        args = _command_args(command, handler, COMMAND_ARGS)(0, size)
+        handler(args, book, notebook)
+        results[f"{command} cached"] = measure(lambda i: handler(args, book, notebook), repeat)
+    QUERY_CACHE.clear()
+    return results
+
+
+def bench_analytics(book, repeat):
+    """
+    Вимірює агрегати contact-stats (домени, місяці, кількість телефонів):
+    перебором Record, зі стовпцями, побудованими з нуля, і зі стовпцями,
+    оновленими після зміни одного контакту.
+    """
+    records = book.data.values()
+    names = list(book.data)
+
+    def scan_records(i):
+        return (
+            Counter(r.email.value.rpartition("@")[2] for r in records if r.email),
+            Counter(r.birthday.date.month for r in records if r.birthday),
+            Counter(len(r.phones) for r in records),
+        )
+
+    def aggregate(columns):
+        return columns.count_by_domain(), columns.count_by_month(), columns.count_by_phone_count()
+
+    def update_one(i):
+        book.data[names[i % len(names)]].add_email(f"analytics{i}@example.org")
+        return aggregate(book.columns())
+
+    book.columns()
+    return {
+        "scan records": measure(scan_records, repeat),
+        "build columns": measure(lambda i: aggregate(book._build_columns()), repeat),
+        "update columns": measure(update_one, repeat),
+    }
+
+
+def bench_storage(book, notebook, repeat):
+    """
+    Вимірює збереження й завантаження обох книг у тимчасовому каталозі у
+    форматах pickle (save_data/load_data/...) і codec (save_binary/...), а
+    також автозбереження однієї зміни в кожній книзі (сегментами змін).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        book_file = os.path.join(tmp, "addressbook.pkl")
+        notes_file = os.path.join(tmp, "notes.pkl")
+        binary_book_file = os.path.join(tmp, "addressbook.bin")
+        binary_notes_file = os.path.join(tmp, "notes.bin")
+        name, note_id = next(iter(book.data)), next(iter(notebook.data))
+
+        def save_one_change(storage):
+            def save(i):
+                # Усе інше вже збережено повністю
+                book._changed.clear()
+                notebook._changed.clear()
+                book._changed.add(name)
+                notebook._changed.add(note_id)
+                storage.snapshot(book, notebook)()
+            return save
+
+        results = {
+            "save_data": measure(lambda i: save_data(book, book_file), repeat),
+            "load_data": measure(lambda i: load_data(book_file), repeat),
+            "save_notes": measure(lambda i: save_notes(notebook, notes_file), repeat),
+            "load_notes": measure(lambda i: load_notes(notes_file), repeat),
+            "autosave_one_change": measure(
+                save_one_change(PickleStorage(book_file, notes_file)), repeat
+            ),
+            "save_binary_data": measure(lambda i: save_binary(book, binary_book_file), repeat),
+            "load_binary_data": measure(lambda i: load_binary_data(binary_book_file), repeat),
+            "save_binary_notes": measure(
+                lambda i: save_binary(notebook, binary_notes_file), repeat
+            ),
+            "load_binary_notes": measure(lambda i: load_binary_notes(binary_notes_file), repeat),
+            "autosave_binary": measure(
+                save_one_change(BinaryStorage(binary_book_file, binary_notes_file)), repeat
+            ),
+        }
+        for operation, filename in (
+            ("save_data", book_file),
+            ("save_notes", notes_file),
+            ("save_binary_data", binary_book_file),
+            ("save_binary_notes", binary_notes_file),
+        ):
+            results[operation]["file_kb"] = os.path.getsize(filename) / 1024
+    return results
+
+
+def bench_compression(book, notebook, repeat, codecs=None):
+    """
+    Вимірює збереження й завантаження обох книг (save_binary /
+    load_binary_*) з кожним кодеком стиснення.
+
+    До статистики додаються розмір файлів, ступінь стиснення відносно
+    файлів без стиснення і пропускна здатність у МБ нестиснених даних за
+    секунду (за медіанним часом).
+    """
+    codecs = codecs or available_codecs()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_size = None
+        for name in [NO_COMPRESSION] + [name for name in codecs if name != NO_COMPRESSION]:
+            book_file = os.path.join(tmp, f"addressbook.{name}.bin")
+            notes_file = os.path.join(tmp, f"notes.{name}.bin")
+
+            def save(i):
+                save_binary(book, book_file, name)
+                save_binary(notebook, notes_file, name)
+
+            def load(i):
+                load_binary_data(book_file)
+                load_binary_notes(notes_file)
+
+            save_stats = measure(save, repeat)
+            load_stats = measure(load, repeat)
+            size = os.path.getsize(book_file) + os.path.getsize(notes_file)
+            if raw_size is None:
+                raw_size = size
+            for stats in (save_stats, load_stats):
+                stats["file_kb"] = size / 1024
+                stats["ratio"] = raw_size / size
+                stats["mb_s"] = raw_size / 2**20 / max(stats["median_ms"] / 1000, 1e-9)
+            if name in codecs:
+                results[f"save_{name}"] = save_stats
+                results[f"load_{name}"] = load_stats
+    return results
+
+
+def bench_validation(book, repeat, workers=None):
+    """Порівнює перевірку рядків контактів в одному процесі та в пулі процесів."""
+    rows = list(enumerate(contact_rows(book), 1))
+    with BulkValidator(workers, min_parallel_rows=0) as validate:
+        # Перший виклик запускає процеси пулу; його не враховуємо
+        validate(rows)
+        return {
+            "validate_serial": measure(lambda i: validate_contact_rows(rows), repeat),
+            f"validate_pool_{validate.workers}": measure(lambda i: validate(rows), repeat),
+        }
+
+
+def run_benchmarks(sizes, repeat=20, storage_repeat=3, seed=0, log=print, workers=None,
+                   codecs=None):
+    """
+    Запускає всі вимірювання для кожного розміру.
+
+    Args:
+        codecs: Кодеки стиснення для bench_compression (за замовчуванням усі доступні)
+
+    Returns:
+        dict: {"meta": {...}, "results": {розмір: {"build_s", "storage", "compression",
+            "validation", "commands", "query_cache", "analytics"}}}
+    """
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "storage_repeat": storage_repeat,
+            "seed": seed,
+            "numpy": importlib.util.find_spec("numpy") is not None,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        log(f"Building {size} contacts and notes...")
+        start = time.perf_counter()
+        book = build_book(size, seed)
+        notebook = build_notebook(size, seed)
+        build_s = time.perf_counter() - start
+
+        log(f"Measuring storage ({size})...")
+        storage = bench_storage(book, notebook, storage_repeat)
+        log(f"Measuring compression ({size})...")
+        compression = bench_compression(book, notebook, storage_repeat, codecs)
+        log(f"Measuring validation ({size})...")
+        validation = bench_validation(book, storage_repeat, workers)
+        log(f"Measuring commands ({size})...")
+        commands = bench_commands(book, notebook, size, min(repeat, size), seed)
+        log(f"Measuring query cache ({size})...")
+        query_cache = bench_query_cache(book, notebook, size, repeat)
+        log(f"Measuring analytics ({size})...")
+        analytics = bench_analytics(book, repeat)
+
+        report["results"][str(size)] = {
+            "build_s": build_s,
+            "storage": storage,
+            "compression": compression,
+            "validation": validation,
+            "commands": commands,
+            "query_cache": query_cache,
+            "analytics": analytics,
+        }
+    return report
+
+
+# -------------------------
+# REPORTING
+# -------------------------
+
+def _rows(report):
+    for size, result in report["results"].items():
+        for group in ("storage", "compression", "validation", "commands", "query_cache",
+                      "analytics"):
+            for name, stats in result.get(group, {}).items():
+                yield (size, group, name), stats
+
+
+def failed_operations(report):
+    """Операції, виклики яких завершувались помилкою: [(розмір, операція, помилок), ...]."""
+    return [
+        (size, name, stats["errors"])
+        for (size, _, name), stats in _rows(report)
+        if stats.get("errors")
+    ]
+
+
+def format_report(report):
+    lines = [
+        f"{'size':>8}  {'operation':<20} {'mean ms':>10} {'median ms':>10} {'peak KB':>10}"
+        f" {'file KB':>10} {'ratio':>6} {'MB/s':>8}"
+    ]
+    for (size, _, name), stats in _rows(report):
+        extra = "".join(
+            f" {stats[key]:>{width}.{digits}f}" if key in stats else f" {'':>{width}}"
+            for key, width, digits in (("file_kb", 10, 1), ("ratio", 6, 2), ("mb_s", 8, 1))
+        )
+        if stats.get("errors"):
+            extra += f"  ERRORS: {stats['errors']}/{stats['calls']}"
+        lines.append(
+            f"{size:>8}  {name:<20} {stats['mean_ms']:>10.3f} "
+            f"{stats['median_ms']:>10.3f} {stats['peak_kb']:>10.1f}{extra}".rstrip()
+        )
+    return "\n".join(lines)
+
+
+def compare_reports(previous, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Порівнює медіанний час операцій двох запусків.
+
+    Returns:
+        tuple: (рядки звіту, список регресій (розмір, операція, відношення))
+    """
+    old_rows = dict(_rows(previous))
+    lines = [f"{'size':>8}  {'operation':<20} {'before ms':>10} {'after ms':>10} {'ratio':>7}"]
+    regressions = []
+    for key, stats in _rows(current):
+        old = old_rows.get(key)
+        if old is None:
+            continue
+        size, _, name = key
+        # Захист від ділення на нуль для дуже швидких операцій
+        ratio = stats["median_ms"] / max(old["median_ms"], 1e-6)
+        mark = ""
+        if ratio > threshold:
+            mark = "  REGRESSION"
+            regressions.append((size, name, ratio))
+        lines.append(
+            f"{size:>8}  {name:<20} {old['median_ms']:>10.3f} "
+            f"{stats['median_ms']:>10.3f} {ratio:>6.2f}x{mark}"
+        )
+    return lines, regressions
+
+
+# -------------------------
+# ENTRY POINT
+# -------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m personal_assistant.bench",
+        description="Benchmark every CLI command and the storage functions.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="number of contacts and notes (e.g. 10000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="calls per command (default: 20)")
+    parser.add_argument("--storage-repeat", type=int, default=3,
+                        help="calls per save/load function (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int,
+                        help="processes for the parallel validation benchmark (default: CPU count)")
+    parser.add_argument("--codecs", nargs="+", choices=available_codecs(),
+                        help="compression codecs to measure (default: all available)")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare with a previous JSON report; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio treated as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    report = run_benchmarks(
+        args.sizes, args.repeat, args.storage_repeat, args.seed, log, args.workers, args.codecs
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        lines, regressions = compare_reports(previous, report, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.2f}x")
+    else:
+        print(format_report(report))
+
+    # Час операції, що завершилась помилкою, не описує її справжньої роботи
+    failed = failed_operations(report)
+    for size, name, errors in failed:
+        print(f"{name} ({size}): {errors} call(s) failed", file=sys.stderr)
+    return 1 if regressions or failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
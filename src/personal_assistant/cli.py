@@ -1,52 +1,21 @@
 """
 CLI interface for command parsing and handling.
 """
-
-from prompt_toolkit import PromptSession
-from prompt_toolkit.completion import Completer, Completion
-from prompt_toolkit.document import Document
-from prompt_toolkit.completion.base import CompleteEvent
-
+import importlib
+import importlib.util
+import sys
+from datetime import date
+from time import perf_counter
+
+from .instrumentation import INSTRUMENTATION
+from .query_cache import QUERY_CACHE
+from .startup import PROFILE
 from .storage import (
-    save_data,
-    load_data,
-    save_notes,
-    load_notes
+    Journal,
+    get_storage
 )
 
-from .contacts.contact import (
-    # CONTACTS
-    add_contact,
-    search_contact,
-    delete_contact,
-    change_phone,
-    show_phones,
-    show_all,
-
-    # BIRTHDAYS
-    add_birthday,
-    show_birthday,
-    birthdays,
-    find_by_birthday,
-
-    # OTHER INFO
-    add_email,
-    add_address,
-)
-
-from .notes.handlers import (
-    # NOTES AND TAGS
-    add_note_handler,
-    find_notes_handler,
-    show_all_notes_handler,
-    edit_note_handler,
-    delete_note_handler,
-    add_tag_handler,
-    find_by_tag_handler,
-    sort_notes_by_tag_handler,
-)
-
-
+from .contacts.input_error import ErrorMessage
 # -------------------------
 # PARSER
 # -------------------------
@@ -62,57 +31,363 @@ def parse_input(user_input: str):
 # COMMAND REGISTRY
 # -------------------------
 
-COMMANDS = {
-    # CONTACTS
-    "add": add_contact,
-    "search-contact": search_contact,
-    "delete-contact": delete_contact,
-    "change": change_phone,
-    "phone": show_phones,
-    "all-contacts": show_all,
-
-    # BIRTHDAYS
-    "add-birthday": add_birthday,
-    "show-birthday": show_birthday,
-    "birthdays": birthdays,
-    "find-birthday": find_by_birthday,
-
-    # OTHER INFO
-    "add-email": add_email,
-    "add-address": add_address,
-
-    # NOTES AND TAGS
-    "add-note": add_note_handler,
-    "find-note": find_notes_handler,
-    "show-notes": show_all_notes_handler,
-    "edit-note": edit_note_handler,
-    "delete-note": delete_note_handler,
-    "add-tag": add_tag_handler,
-    "find-by-tag": find_by_tag_handler,
-    "sort-notes-by-tag": sort_notes_by_tag_handler,
+# Способи виклику обробника залежно від того, які об'єкти він приймає.
+# Обираються один раз під час реєстрації команди.
+_CALLERS = {
+    (): lambda handler: lambda args, book, notebook: handler(),
+    ("args",): lambda handler: lambda args, book, notebook: handler(args),
+    ("args", "book"): lambda handler: lambda args, book, notebook: handler(args, book),
+    ("args", "notebook"): lambda handler: lambda args, book, notebook: handler(args, notebook),
+    ("args", "book", "notebook"): lambda handler: handler,
 }
 
 
-# -------------------------
-# AUTOCOMPLETER
-# -------------------------
+def _import_handler(path):
+    """Імпортує обробник за шляхом "модуль:функція" (модуль — відносно пакета)."""
+    module_name, _, name = path.partition(":")
+    full_name = importlib.util.resolve_name(module_name, __package__)
+    if full_name in sys.modules:
+        return getattr(sys.modules[full_name], name)
+    with PROFILE.measure(f"import {module_name.lstrip('.')}"):
+        module = importlib.import_module(full_name)
+    return getattr(module, name)
+
+
+class Command:
+    """
+    Зареєстрована команда CLI.
+
+    Обробник оголошує свої залежності (needs) один раз при реєстрації,
+    тож під час виконання він викликається напряму, без підбору аргументів;
+    за needs сесія також вирішує, яку з книг треба завантажити.
+    Обробник можна вказати рядком "модуль:функція" — тоді модуль
+    імпортується під час першого виклику команди, а не під час запуску.
+    Кожен виклик враховується у лічильнику часу (див. dispatch-stats), а
+    з --instrument — ще й у детальних метриках (див. instrumentation).
+    Результати команд з cache_key зберігаються у QUERY_CACHE.
+    """
+
+    __slots__ = (
+        "name", "_handler", "needs", "target", "cache_key", "checkpoint", "file_arg", "note_arg",
+        "calls", "total_time", "_call",
+    )
 
+    def __init__(self, name, handler, needs=("args", "book"), target=None, cache_key=None,
+                 checkpoint=False, file_arg=None, note_arg=None):
+        """
+        Args:
+            name: Назва команди
+            handler: Функція-обробник або рядок "модуль:функція"
+            needs: Аргументи, які приймає обробник, у порядку їх передачі
+            target: "book" або "notebook", якщо команда змінює дані (для журналу)
+            cache_key: Для команд читання — функція args -> ключ кешу
+                (нормалізовані аргументи); None — результат не кешується
+            checkpoint: Команда змінює дані, але не записується в журнал:
+                її результат залежить від зовнішніх даних (напр. файлу
+                імпорту), яких при відтворенні журналу вже може не бути,
+                тож сесія зберігає знімок одразу після неї
+            file_arg: Для команд, що читають або пишуть файл, — функція
+                args -> ім'я файлу (сервер дозволяє лише файли зі свого
+                каталогу даних)
+            note_arg: Для команд, що змінюють нотатку за ID, — позиція ID
+                в args (при відтворенні журналу ID перекладається, див.
+                Journal.replay)
+
+        Raises:
+            ValueError: якщо такий набір залежностей не підтримується
+        """
+        if needs not in _CALLERS:
+            raise ValueError(f"Unsupported dependencies for '{name}': {needs}")
+        self.name = name
+        self._handler = handler
+        self.needs = needs
+        self.target = target
+        self.cache_key = cache_key
+        self.checkpoint = checkpoint
+        self.file_arg = file_arg
+        self.note_arg = note_arg
+        self.calls = 0
+        self.total_time = 0.0
+        self._call = None
+
+    @property
+    def handler(self):
+        if isinstance(self._handler, str):
+            self._handler = _import_handler(self._handler)
+        return self._handler
+
+    def _caller(self):
+        call = _CALLERS[self.needs](self.handler)
+        if self.cache_key is not None:
+            call = QUERY_CACHE.wrap(self.name, self.cache_key, self.needs, call)
+        return call
+
+    def __call__(self, args, book, notebook):
+        if self._call is None:
+            self._call = self._caller()
+        start = perf_counter()
+        try:
+            if INSTRUMENTATION.enabled:
+                return INSTRUMENTATION.call("command", self.name, self._call, args, book, notebook)
+            return self._call(args, book, notebook)
+        finally:
+            self.calls += 1
+            self.total_time += perf_counter() - start
 
-class CommandCompleter(Completer):
-    def __init__(self, commands: dict):
-        self.commands = list(commands.keys())
 
-    def get_completions(self, document: Document, complete_event: CompleteEvent):
-        text = document.text_before_cursor
+COMMANDS = {}
 
-        if " " in text:
-            return
 
-        word = document.get_word_before_cursor()
+def register(name, handler, needs=("args", "book"), target=None, cache_key=None,
+             checkpoint=False, file_arg=None, note_arg=None):
+    """Додає команду до реєстру COMMANDS."""
+    COMMANDS[name] = Command(
+        name, handler, needs, target, cache_key, checkpoint, file_arg, note_arg
+    )
+    return COMMANDS[name]
+
+
+def dispatch_stats():
+    """Показує кількість викликів і середній час кожної команди за сесію."""
+    used = [command for command in COMMANDS.values() if command.calls]
+    if not used:
+        return "No commands executed yet."
+    used.sort(key=lambda command: command.total_time, reverse=True)
+    lines = [f"{'command':<20} {'calls':>7} {'total ms':>10} {'avg us':>10}"]
+    for command in used:
+        lines.append(
+            f"{command.name:<20} {command.calls:>7} {command.total_time * 1000:>10.3f} "
+            f"{command.total_time / command.calls * 1_000_000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def cache_stats():
+    """Показує влучання і промахи кешу результатів запитів."""
+    return QUERY_CACHE.report()
+
+
+def show_stats():
+    """Показує метрики команд і сховища, зібрані з --instrument."""
+    if not INSTRUMENTATION.enabled:
+        return "Instrumentation is off. Start with --instrument to collect metrics."
+    return "\n".join(INSTRUMENTATION.report())
+
+
+NOTEBOOK_NEEDS = ("args", "notebook")
+
+
+# Ключі кешу запитів: аргументи в тому вигляді, в якому їх розуміє обробник
+def _find_note_key(args):
+    ranked = "--ranked" in args
+    words = [arg for arg in args if arg != "--ranked"]
+    return ranked, " ".join(words) if ranked else tuple(words[:1])
+
+
+def _birthdays_key(args):
+    # Результат залежить і від сьогоднішньої дати
+    # Лише цифри ASCII: int() не приймає "²", хоча "²".isdigit() — True
+    days = str(int(args[0])) if args and args[0].isascii() and args[0].isdigit() else tuple(args)
+    return days, date.today()
+
+
+def _dated_key(args):
+    # Вік (find-birthday --age, contact-stats) залежить від сьогоднішньої дати.
+    # Аргументи беруться як є: опції розбираються з урахуванням регістру
+    return tuple(args), date.today()
+
+def _file_arg(args):
+    # Ім'я файлу імпорту чи експорту — усі аргументи, крім "--workers N"
+    if "--workers" in args:
+        i = args.index("--workers")
+        args = args[:i] + args[i + 2:]
+    return " ".join(args)
+
+# Модулі обробників імпортуються під час першого виклику їх команди
+CONTACTS = ".contacts.contact"
+NOTES = ".notes.handlers"
+TRANSFER = ".transfer"
+
+# CONTACTS
+register("add", f"{CONTACTS}:add_contact", target="book")
+register("search-contact", f"{CONTACTS}:search_contact")
+register("find-by-phone", f"{CONTACTS}:find_by_phone")
+register("find-by-email", f"{CONTACTS}:find_by_email")
+register("delete-contact", f"{CONTACTS}:delete_contact", target="book")
+register("change", f"{CONTACTS}:change_phone", target="book")
+register("phone", f"{CONTACTS}:show_phones")
+register("all-contacts", f"{CONTACTS}:show_all")
+
+# BIRTHDAYS
+register("add-birthday", f"{CONTACTS}:add_birthday", target="book")
+register("show-birthday", f"{CONTACTS}:show_birthday")
+register("birthdays", f"{CONTACTS}:birthdays", cache_key=_birthdays_key)
+register("find-birthday", f"{CONTACTS}:find_by_birthday", cache_key=_dated_key)
+
+# OTHER INFO
+register("add-email", f"{CONTACTS}:add_email", target="book")
+register("add-address", f"{CONTACTS}:add_address", target="book")
+
+# ANALYTICS
+register("contact-stats", f"{CONTACTS}:contact_stats", cache_key=_dated_key)
+
+# NOTES AND TAGS
+register("add-note", f"{NOTES}:add_note_handler", NOTEBOOK_NEEDS, target="notebook")
+register("find-note", f"{NOTES}:find_notes_handler", NOTEBOOK_NEEDS, cache_key=_find_note_key)
+register("show-notes", f"{NOTES}:show_all_notes_handler", NOTEBOOK_NEEDS)
+register("edit-note", f"{NOTES}:edit_note_handler", NOTEBOOK_NEEDS, target="notebook",
+         note_arg=0)
+register("delete-note", f"{NOTES}:delete_note_handler", NOTEBOOK_NEEDS, target="notebook",
+         note_arg=0)
+register("add-tag", f"{NOTES}:add_tag_handler", NOTEBOOK_NEEDS, target="notebook", note_arg=0)
+register("find-by-tag", f"{NOTES}:find_by_tag_handler", NOTEBOOK_NEEDS, cache_key=" ".join)
+register("sort-notes-by-tag", f"{NOTES}:sort_notes_by_tag_handler", NOTEBOOK_NEEDS)
+
+# IMPORT / EXPORT
+register(
+    "import-contacts", f"{TRANSFER}:import_contacts_handler", target="book", checkpoint=True,
+    file_arg=_file_arg,
+)
+register("export-contacts", f"{TRANSFER}:export_contacts_handler", file_arg=_file_arg)
+register(
+    "import-notes", f"{TRANSFER}:import_notes_handler", NOTEBOOK_NEEDS, target="notebook",
+    checkpoint=True, file_arg=_file_arg,
+)
+register("export-notes", f"{TRANSFER}:export_notes_handler", NOTEBOOK_NEEDS, file_arg=_file_arg)
 
-        for cmd in self.commands:
-            if cmd.startswith(word):
-                yield Completion(cmd, start_position=-len(word))
+# SERVICE
+register("dispatch-stats", dispatch_stats, needs=())
+register("stats", show_stats, needs=())
+register("cache-stats", cache_stats, needs=())
+
+# Команди, першим аргументом яких є ім'я контакту (для автодоповнення)
+NAME_COMMANDS = {
+    "add", "search-contact", "delete-contact", "change", "phone",
+    "add-birthday", "show-birthday", "add-email", "add-address",
+}
+
+
+def execute(handler, args, book, notebook):
+    """
+    Виконує команду.
+
+    Обробники нотаток повідомляють про помилки винятками, тож тут вони
+    перетворюються на ErrorMessage — так само, як це робить input_error.
+    """
+    try:
+        return handler(args, book, notebook)
+    except (ValueError, KeyError, IndexError) as e:
+        return ErrorMessage(e.args[0] if e.args else "Enter correct arguments.")
+
+
+def output_lines(result):
+    """
+    Рядки результату команди.
+
+    Команди зі списками (all-contacts, show-notes) повертають лінивий
+    ітератор рядків замість одного великого рядка.
+    """
+    if isinstance(result, str):
+        yield result
+    elif result is not None:
+        yield from result
+
+
+def print_paged(lines, page_size=None):
+    """
+    Виводить рядки посторінково, як пейджер: Enter — наступна сторінка, q — вихід.
+
+    Розмір сторінки за замовчуванням — висота термінала.
+    """
+    import shutil
+
+    page_size = page_size or max(shutil.get_terminal_size().lines - 1, 1)
+    lines = iter(lines)
+    shown = 0
+    for line in lines:
+        if shown == page_size:
+            answer = input("-- More -- (Enter: next page, q: quit) ")
+            if answer.strip().lower() == "q":
+                return
+            shown = 0
+        print(line)
+        shown += 1
+
+
+def replay_journal(journal, book, notebook):
+    """Відтворює записи журналу, яких ще немає у знімках."""
+    note_args = {
+        name: command.note_arg for name, command in COMMANDS.items() if command.note_arg is not None
+    }
+    for command, args in journal.replay(book, notebook, note_args):
+        try:
+            COMMANDS[command](args, book, notebook)
+        except (KeyError, ValueError, IndexError):
+            # Команда завершилась помилкою і під час першого виконання
+            continue
+
+
+# -------------------------
+# SESSION DATA
+# -------------------------
+
+class SessionData:
+    """
+    Книги сесії, які завантажуються під час першої команди, що їх потребує.
+
+    Яка книга потрібна команді, видно з її needs, тож сесія, що працює
+    лише з нотатками, не читає файл контактів, і навпаки. Книги, для яких
+    лишились записи в журналах аварійно завершених сесій, завантажуються
+    одразу, щоб відтворити ці записи (див. Journal.recover).
+    """
+
+    def __init__(self, storage, journal):
+        self.storage = storage
+        self.journal = journal
+        self._book = None
+        self._notebook = None
+        with PROFILE.measure("recover journals"):
+            pending = journal.recover()
+        if pending:
+            replay_journal(
+                journal,
+                self.book if "book" in pending else None,
+                self.notebook if "notebook" in pending else None,
+            )
+
+    @property
+    def book(self):
+        if self._book is None:
+            with PROFILE.measure("load contacts"):
+                self._book = self.storage.load_book()
+        return self._book
+
+    @property
+    def notebook(self):
+        if self._notebook is None:
+            with PROFILE.measure("load notes"):
+                self._notebook = self.storage.load_notebook()
+        return self._notebook
+
+    def for_command(self, command):
+        """Книги для виклику command: потрібні їй завантажуються, решта — None, якщо не завантажені."""
+        return (
+            self.book if "book" in command.needs else self._book,
+            self.notebook if "notebook" in command.needs else self._notebook,
+        )
+
+    def compact(self, background=True):
+        """Згортає журнал у знімок лише завантажених книг (див. Journal.compact)."""
+        return self.journal.compact(self._book, self._notebook, background)
+
+
+def open_session():
+    """Відкриває бекенд зберігання і журнал сесії; дані завантажуються ліниво."""
+    with PROFILE.measure("open storage"):
+        storage = get_storage()
+    with PROFILE.measure("open journal"):
+        journal = Journal(storage)
+    return SessionData(storage, journal)
 
 
 # -------------------------
@@ -120,14 +395,21 @@ class CommandCompleter(Completer):
 # -------------------------
 
 def run_cli():
-    session = PromptSession(
-        completer=CommandCompleter(COMMANDS),
-        complete_while_typing=True
-    )
-
-    book = load_data()
-    notebook = load_notes()
+    data = open_session()
+    journal = data.journal
+
+    with PROFILE.measure("import prompt_toolkit"):
+        from prompt_toolkit import PromptSession
+
+        from .completion import CommandCompleter
+    with PROFILE.measure("create prompt"):
+        session = PromptSession(
+            # Книга контактів завантажиться під час першого доповнення імені
+            completer=CommandCompleter(COMMANDS, lambda: data.book),
+            complete_while_typing=True
+        )
     print("Welcome to the assistant bot!\n")
+    PROFILE.first_prompt()
 
     while True:
         try:
@@ -135,8 +417,9 @@ def run_cli():
             command, args = parse_input(user_input)
 
             if command in ("exit", "close"):
-                save_data(book)
-                save_notes(notebook)
+                for message in data.compact(background=False):
+                    print(message)
+                journal.close()
                 print("Goodbye!")
                 break
 
@@ -146,20 +429,31 @@ def run_cli():
 
             if command in COMMANDS:
                 handler = COMMANDS[command]
+                book, notebook = data.for_command(handler)
+                if handler.target is not None and not handler.checkpoint:
+                    journal.append(handler.target, command, args, notebook)
 
-                try:
-                    result = handler(args, book, notebook)
-                except TypeError:
-                    try:
-                        result = handler(args, book)
-                    except TypeError:
-                        try:
-                            result = handler(args)
-                        except TypeError:
-                            result = handler(book)
-
-                if result is not None:
+                result = execute(handler, args, book, notebook)
+
+                # Повідомлення про конфлікти зі змінами інших сесій
+                conflicts = []
+                if handler.checkpoint:
+                    # Зміни команди є лише в пам'яті: зберігаємо їх одразу
+                    conflicts = data.compact(background=False)
+                elif journal.should_compact():
+                    conflicts = data.compact()
+
+                if isinstance(result, str):
                     print(result)
+                elif result is not None:
+                    # Лінивий вивід: у терміналі посторінково, інакше весь одразу
+                    if sys.stdin.isatty() and sys.stdout.isatty():
+                        print_paged(result)
+                    else:
+                        for line in result:
+                            print(line)
+                for message in conflicts:
+                    print(message)
                 continue
 
             print("Invalid command.")
@@ -167,3 +461,57 @@ def run_cli():
         except (KeyboardInterrupt):
             print("Type 'exit' or 'close' to quit.")
             continue
+
+
+# -------------------------
+# BATCH MODE
+# -------------------------
+
+def run_batch(lines, output=sys.stdout, report=sys.stderr):
+    """
+    Виконує команди з рядків (файлу або stdin) без інтерактивної сесії.
+
+    Порожні рядки та рядки, що починаються з "#", пропускаються; "exit"
+    або "close" завершують пакет. Дані зберігаються один раз наприкінці.
+    Пакет виконується як транзакція: при першій помилці виконання
+    зупиняється і жодна зміна з пакета не зберігається.
+
+    Returns:
+        int: 0 у разі успіху, 1 якщо пакет відкочено
+    """
+    data = open_session()
+    journal = data.journal
+
+    executed = 0
+    start = perf_counter()
+    for line_number, line in enumerate(lines, 1):
+        command, args = parse_input(line)
+        if not command or command.startswith("#") or command == "hello":
+            continue
+        if command in ("exit", "close"):
+            break
+
+        PROFILE.first_prompt("first command")
+        handler = COMMANDS.get(command)
+        if handler:
+            result = execute(handler, args, *data.for_command(handler))
+        else:
+            result = ErrorMessage("Invalid command.")
+        if isinstance(result, ErrorMessage):
+            journal.close()
+            print(f"Line {line_number}: {line.strip()}\n{result}", file=report)
+            print(f"Batch rolled back: {executed} command(s) discarded.", file=report)
+            return 1
+
+        executed += 1
+        for output_line in output_lines(result):
+            print(output_line, file=output)
+
+    # Журнал не потрібен: весь пакет зберігається одним знімком
+    for message in data.compact(background=False):
+        print(message, file=report)
+    journal.close()
+    elapsed = perf_counter() - start
+    rate = executed / elapsed if elapsed else 0.0
+    print(f"Executed {executed} command(s) in {elapsed:.3f} s ({rate:.0f} commands/s).", file=report)
+    return 0
@@ -0,0 +1,107 @@
+"""
+Thin client for the assistant server (see server.py).
+"""
+
+import json
+import socket
+
+from prompt_toolkit import PromptSession
+
+from .cli import COMMANDS, parse_input
+from .completion import CommandCompleter
+from .protocol import DEFAULT_ADDRESS, encode, parse_address
+
+
+class AssistantClient:
+    """Синхронне з'єднання з сервером: надсилає команди і читає відповіді."""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        kind, target = parse_address(address)
+        if kind == "unix":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(target)
+        else:
+            self.sock = socket.create_connection(target)
+        self.stream = self.sock.makefile("rwb")
+        self._next_id = 1
+
+    def request(self, command, args):
+        """
+        Виконує команду на сервері.
+
+        Відповіді зіставляються з запитом за id: якщо вивід попередньої
+        команди перервали (Ctrl+C), його решта ще надходить і пропускається.
+
+        Yields:
+            str: рядки виводу у міру надходження
+
+        Raises:
+            ValueError: якщо сервер повернув помилку команди
+            ConnectionError: якщо з'єднання обірвалось
+        """
+        request_id = self._next_id
+        self._next_id += 1
+        self.stream.write(encode({"id": request_id, "command": command, "args": args}))
+        self.stream.flush()
+        while True:
+            raw = self.stream.readline()
+            if not raw:
+                raise ConnectionError("Server closed the connection.")
+            response = json.loads(raw)
+            if response.get("id") != request_id:
+                continue
+            if not response["ok"]:
+                raise ValueError(response["error"])
+            yield from response["lines"]
+            if response["done"]:
+                return
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+def run_client(address=DEFAULT_ADDRESS):
+    """Інтерактивний режим, як run_cli, але дані зберігаються на сервері."""
+    try:
+        client = AssistantClient(address)
+    except OSError as e:
+        print(f"Cannot connect to {address}: {e.strerror or e}")
+        return 1
+
+    session = PromptSession(
+        completer=CommandCompleter({**COMMANDS, "server-stats": None}),
+        complete_while_typing=True
+    )
+    print(f"Connected to {address}.\n")
+
+    try:
+        while True:
+            try:
+                command, args = parse_input(session.prompt("Enter a command: "))
+            except KeyboardInterrupt:
+                print("Type 'exit' or 'close' to quit.")
+                continue
+
+            if command in ("exit", "close"):
+                print("Goodbye!")
+                return 0
+            if command == "hello":
+                print("How can I help you?")
+                continue
+            if not command:
+                continue
+
+            try:
+                for line in client.request(command, args):
+                    print(line)
+            except ValueError as e:
+                print(e)
+            except KeyboardInterrupt:
+                # Решту виводу client.request пропустить при наступній команді
+                print("\nOutput interrupted.")
+    except (ConnectionError, EOFError) as e:
+        print(str(e) or "Connection closed.")
+        return 1
+    finally:
+        client.close()
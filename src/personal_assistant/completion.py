@@ -0,0 +1,46 @@
+"""
+Autocompletion of commands and contact names for the interactive prompt.
+
+Окремий модуль, бо prompt_toolkit імпортується довго; cli і client
+завантажують його лише перед показом запрошення.
+"""
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.completion.base import CompleteEvent
+from prompt_toolkit.document import Document
+
+from .cli import NAME_COMMANDS
+
+
+class CommandCompleter(Completer):
+    def __init__(self, commands: dict, get_book=None):
+        """
+        Args:
+            commands: Команди для доповнення (ключі словника)
+            get_book: Функція, що повертає AddressBook для доповнення імен;
+                викликається лише тоді, коли ім'я справді треба доповнити,
+                тож книга може завантажуватись ліниво
+        """
+        self.commands = list(commands.keys())
+        self.get_book = get_book
+
+    def get_completions(self, document: Document, complete_event: CompleteEvent):
+        text = document.text_before_cursor
+
+        if " " in text:
+            yield from self._complete_name(text)
+            return
+
+        word = document.get_word_before_cursor()
+
+        for cmd in self.commands:
+            if cmd.startswith(word):
+                yield Completion(cmd, start_position=-len(word))
+
+    def _complete_name(self, text):
+        """Доповнює ім'я контакту — перший аргумент команд з NAME_COMMANDS."""
+        parts = text.split(" ")
+        if self.get_book is None or len(parts) != 2 or parts[0].lower() not in NAME_COMMANDS:
+            return
+        prefix = parts[1]
+        for name in self.get_book().complete_names(prefix):
+            yield Completion(name, start_position=-len(prefix))
@@ -0,0 +1,163 @@
+"""
+Optional compression of data files.
+
+Стиснення обирається змінною оточення PERSONAL_ASSISTANT_COMPRESSION
+("gzip", "bz2", "xz", а також "zstd" і "lz4", якщо встановлено пакети
+zstandard / lz4). При читанні формат визначається за першими байтами
+файлу, тож файли з різним стисненням (або без нього) читаються однаково,
+а зміна налаштування не потребує перетворення наявних файлів.
+
+Стиснення й розпаковування потокові: дані проходять через файлові
+об'єкти кодеків, без проміжної копії всього файлу в пам'яті.
+"""
+
+import importlib
+import io
+import os
+from contextlib import contextmanager
+
+# Змінна оточення, яка обирає стиснення нових файлів
+COMPRESSION_ENV = "PERSONAL_ASSISTANT_COMPRESSION"
+NO_COMPRESSION = "none"
+
+
+# Модулі кодеків імпортуються при першому використанні: більшість запусків
+# працює з нестисненими файлами, а bz2 / lzma / gzip сповільнюють старт
+_imported = {}
+
+
+def _module(name):
+    """Імпортує модуль кодека; None, якщо пакет не встановлено."""
+    if name not in _imported:
+        try:
+            _imported[name] = importlib.import_module(name)
+        except ImportError:
+            _imported[name] = None
+    return _imported[name]
+
+
+def _zstd_reader(f):
+    # Читач zstandard не має readline, потрібного pickle
+    decompressor = _module("zstandard").ZstdDecompressor()
+    return io.BufferedReader(decompressor.stream_reader(f, closefd=False))
+
+
+def _zstd_writer(f):
+    return _module("zstandard").ZstdCompressor(level=3).stream_writer(f, closefd=False)
+
+
+# Назва -> (перші байти файлу, пакет для встановлення, читач, записувач).
+# Читач і записувач загортають відкритий бінарний файл і не закривають його.
+# Рівні стиснення — розумний компроміс для файлів даних: xz з пресетом 1
+# стискає їх майже як пресет 6, але в 4–8 разів швидше.
+CODECS = {
+    "gzip": (
+        b"\x1f\x8b", None,
+        lambda f: _module("gzip").GzipFile(fileobj=f, mode="rb"),
+        # Ім'я тимчасового файлу в заголовок gzip не записуємо
+        lambda f: _module("gzip").GzipFile(
+            filename="", fileobj=f, mode="wb", compresslevel=6, mtime=0
+        ),
+    ),
+    "bz2": (
+        b"BZh", None,
+        lambda f: _module("bz2").BZ2File(f, "rb"),
+        lambda f: _module("bz2").BZ2File(f, "wb", compresslevel=9),
+    ),
+    "xz": (
+        b"\xfd7zXZ\x00", None,
+        lambda f: _module("lzma").LZMAFile(f, "rb"),
+        lambda f: _module("lzma").LZMAFile(f, "wb", preset=1),
+    ),
+    "zstd": (b"\x28\xb5\x2f\xfd", "zstandard", _zstd_reader, _zstd_writer),
+    "lz4": (
+        b"\x04\x22\x4d\x18", "lz4",
+        lambda f: _module("lz4.frame").LZ4FrameFile(f, "rb"),
+        lambda f: _module("lz4.frame").LZ4FrameFile(f, "wb"),
+    ),
+}
+
+# Кодеки, яким потрібен сторонній пакет: назва -> модуль
+_MODULES = {"zstd": "zstandard", "lz4": "lz4.frame"}
+
+
+def is_available(name):
+    """Чи можна використати кодек name у цьому оточенні."""
+    return name == NO_COMPRESSION or (
+        name in CODECS and (name not in _MODULES or _module(_MODULES[name]) is not None)
+    )
+
+
+def available_codecs():
+    """Назви кодеків, доступних у цьому оточенні (разом з "none")."""
+    return [NO_COMPRESSION] + [name for name in CODECS if is_available(name)]
+
+
+def get_compression(name=None):
+    """
+    Перевіряє назву стиснення.
+
+    Args:
+        name: Назва кодека; за замовчуванням береться зі змінної оточення
+            PERSONAL_ASSISTANT_COMPRESSION, інакше "none"
+
+    Raises:
+        ValueError: якщо кодек невідомий або його пакет не встановлено
+    """
+    name = name or os.environ.get(COMPRESSION_ENV) or NO_COMPRESSION
+    if name != NO_COMPRESSION and name not in CODECS:
+        raise ValueError(
+            f"Unknown compression '{name}'. Available: {', '.join(available_codecs())}"
+        )
+    if not is_available(name):
+        raise ValueError(
+            f"Compression '{name}' requires the '{CODECS[name][1]}' package."
+        )
+    return name
+
+
+def detect(f):
+    """Визначає стиснення відкритого файлу за першими байтами; позиція не змінюється."""
+    position = f.tell()
+    header = f.read(8)
+    f.seek(position)
+    for name, (magic, *_) in CODECS.items():
+        if header.startswith(magic):
+            return name
+    return NO_COMPRESSION
+
+
+def open_reader(f):
+    """
+    Повертає файловий об'єкт з розпакованими даними відкритого файлу f.
+
+    Raises:
+        ValueError: якщо файл стиснуто кодеком, пакет якого не встановлено
+    """
+    name = detect(f)
+    if name == NO_COMPRESSION:
+        return f
+    if not is_available(name):
+        raise ValueError(
+            f"Data file is compressed with {name}; install the "
+            f"'{CODECS[name][1]}' package to read it."
+        )
+    return CODECS[name][2](f)
+
+
+@contextmanager
+def writer(f, name=NO_COMPRESSION):
+    """
+    Контекст, що стискає все записане в нього кодеком name у файл f.
+
+    Стиснені дані дописуються у f повністю при виході з контексту; сам f
+    лишається відкритим (для fsync).
+    """
+    if name == NO_COMPRESSION:
+        yield f
+        return
+    out = CODECS[name][3](f)
+    try:
+        yield out
+    finally:
+        out.close()
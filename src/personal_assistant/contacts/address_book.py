@@ -1,17 +1,293 @@
 """
 AddressBook class for managing collection of contacts.
 """
+import calendar
+import re
+from bisect import bisect_left, insort
 from collections import UserDict
-from datetime import datetime, timedelta
-# import re
+from datetime import date, datetime, timedelta
+from itertools import count
+
+from .birthday_query import month_days
+from .columns import ContactColumns
+from .name_index import NameGrams, NameTrie
 # import pickle
 
+# Номери поколінь даних книг (див. AddressBook._touch)
+_GENERATIONS = count(1)
+
+
+def normalize_phone(phone):
+    """Залишає в номері лише цифри 0-9: "050-123-45-67" -> "0501234567"."""
+    return re.sub(r"[^0-9]", "", phone)
+
+
 # --------------------- ADDRESSBOOK CLASS ---------------------
 
 class AddressBook(UserDict):
     """Клас для зберігання та управління записами контактів."""
+
+    # Версія структури індексів; при зміні індекси зі старих файлів перебудовуються
+    _INDEX_VERSION = 5
+    # Індекси, які можна не зберігати: без них книга будує їх при першому запиті
+    _INDEX_ATTRS = ("_birthday_index", "_birthday_order", "_phone_index", "_email_index", "_name_trie")
+
+    def __init__(self):
+        super().__init__()
+        self._init_indexes()
+        self._init_versions()
+        self._touch()
+
+    def __getstate__(self):
+        # Стовпці для аналітики та індекс триграм не серіалізуємо: вони будуються при потребі
+        state = self.__dict__.copy()
+        state.pop("_columns", None)
+        state.pop("_name_grams", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._columns = None
+        self._name_grams = None
+        self._touch()
+        versions = state.get("_versions")
+        if versions is None or len(versions) != len(self.data):
+            # Файли старого формату або збережені через save_data: версія записів — 0
+            versions = versions or {}
+            self._versions = {key: versions.get(key, 0) for key in self.data}
+        self._changed = set()
+        if state.get("_index_version") != self._INDEX_VERSION:
+            self._rebuild_indexes()
+        elif not all(name in state for name in self._INDEX_ATTRS):
+            # Знімок (snapshot_storage) зберігається без індексів
+            self._indexes_built = False
+        else:
+            self._indexes_built = True
+            if isinstance(self.data, dict):
+                for name, record in self.data.items():
+                    self._attach(name, record)
+
+    # --------------------- INDEXES ---------------------
+
+    def _init_indexes(self):
+        self._index_version = self._INDEX_VERSION
+        # False — індексів ще немає: зміни записів їх не оновлюють, а
+        # перший запит до них будує їх з записів (_ensure_indexes)
+        self._indexes_built = True
+        # (місяць, день) -> імена (dict як впорядкована множина)
+        self._birthday_index = {}
+        # Відсортований список (порядковий номер дати народження, ім'я)
+        self._birthday_order = []
+        # Нормалізований телефон -> {ім'я: кількість таких номерів у записі}
+        self._phone_index = {}
+        # email -> імена (dict як впорядкована множина)
+        self._email_index = {}
+        # Імена для пошуку за префіксом
+        self._name_trie = NameTrie()
+        # Триграми імен для пошуку з помилками (NameGrams) і стовпці для
+        # аналітики (ContactColumns) будуються при першому запиті
+        self._name_grams = None
+        self._columns = None
+
+    def _rebuild_indexes(self):
+        """Перебудовує індекси з нуля (наприклад, для файлів старого формату)."""
+        self._init_indexes()
+        if isinstance(self.data, dict):
+            for name, record in self.data.items():
+                self._attach(name, record)
+                self._index_record(name, record, bulk=True)
+        else:
+            # Ліниві відображення прив'язують записи при читанні (on_load)
+            for name, record in self.data.index_items():
+                self._index_record(name, record, bulk=True)
+        # Один sort замість вставки кожної дати у відсортований список
+        self._birthday_order.sort()
+
+    def _ensure_indexes(self):
+        """Будує індекси, якщо книгу завантажено без них."""
+        if not self._indexes_built:
+            # Ліниві індекси ведуться і без решти індексів, тож лишаються як є
+            name_grams, columns = self._name_grams, self._columns
+            self._rebuild_indexes()
+            self._name_grams, self._columns = name_grams, columns
+
+    def _attach(self, name, record):
+        """Прив'язує запис до книги, щоб його зміни оновлювали індекси."""
+        record._owner = self
+
+    def _index_record(self, name, record, bulk=False):
+        if not self._indexes_built:
+            return
+        self._name_trie.add(name)
+        if record.birthday:
+            self._index_birthday(name, record.birthday, bulk)
+        for phone in record.phones:
+            self._index_phone(name, phone.value)
+        if record.email:
+            self._email_index.setdefault(record.email.value, {})[name] = None
+
+    def _unindex_record(self, name, record):
+        if not self._indexes_built:
+            return
+        self._name_trie.remove(name)
+        if record.birthday:
+            self._unindex_birthday(name, record.birthday)
+        for phone in record.phones:
+            self._unindex_phone(name, phone.value)
+        if record.email:
+            self._unindex_email(name, record.email.value)
+
+    def _index_birthday(self, name, birthday, bulk=False):
+        """Додає дату до індексів; з bulk=True список дат сортує викликач."""
+        key = (birthday.date.month, birthday.date.day)
+        self._birthday_index.setdefault(key, {})[name] = None
+        entry = (birthday._raw, name)
+        if bulk:
+            self._birthday_order.append(entry)
+        else:
+            insort(self._birthday_order, entry)
+
+    def _unindex_birthday(self, name, birthday):
+        key = (birthday.date.month, birthday.date.day)
+        names = self._birthday_index.get(key)
+        if names is not None:
+            names.pop(name, None)
+            if not names:
+                del self._birthday_index[key]
+        entry = (birthday._raw, name)
+        position = bisect_left(self._birthday_order, entry)
+        if position < len(self._birthday_order) and self._birthday_order[position] == entry:
+            del self._birthday_order[position]
+
+    def _birthday_changed(self, record, old_birthday):
+        """Викликається з Record.add_birthday."""
+        name = record.name.value
+        self._mark_changed(name)
+        if not self._indexes_built:
+            return
+        if old_birthday:
+            self._unindex_birthday(name, old_birthday)
+        self._index_birthday(name, record.birthday)
+
+    def _index_phone(self, name, phone):
+        names = self._phone_index.setdefault(normalize_phone(phone), {})
+        names[name] = names.get(name, 0) + 1
+
+    def _unindex_phone(self, name, phone):
+        key = normalize_phone(phone)
+        names = self._phone_index.get(key)
+        if names is None or name not in names:
+            return
+        names[name] -= 1
+        if not names[name]:
+            del names[name]
+        if not names:
+            del self._phone_index[key]
+
+    def _unindex_email(self, name, email):
+        names = self._email_index.get(email)
+        if names is not None:
+            names.pop(name, None)
+            if not names:
+                del self._email_index[email]
+
+    def _phone_added(self, record, phone):
+        """Викликається з Record.add_phone / edit_phone."""
+        self._mark_changed(record.name.value)
+        if self._indexes_built:
+            self._index_phone(record.name.value, phone)
+
+    def _phone_removed(self, record, phone):
+        """Викликається з Record.remove_phone / edit_phone."""
+        self._mark_changed(record.name.value)
+        if self._indexes_built:
+            self._unindex_phone(record.name.value, phone)
+
+    def _email_changed(self, record, old_email):
+        """Викликається з Record.add_email."""
+        name = record.name.value
+        self._mark_changed(name)
+        if not self._indexes_built:
+            return
+        if old_email:
+            self._unindex_email(name, old_email.value)
+        self._email_index.setdefault(record.email.value, {})[name] = None
+
+    def _address_changed(self, record):
+        """Викликається з Record.add_address."""
+        self._mark_changed(record.name.value)
+
+    # --------------------- VERSIONS ---------------------
+
+    def _init_versions(self):
+        # Ім'я -> версія запису у збереженому файлі (див. storage.merge_saved)
+        self._versions = {}
+        # Імена записів, змінених після останнього збереження
+        self._changed = set()
+
+    def _touch(self):
+        """Починає нове покоління даних: кешовані результати запитів застарівають (query_cache)."""
+        self._generation = next(_GENERATIONS)
+
+    def _mark_changed(self, name):
+        """Позначає запис зміненим — для збереження, кешу запитів і лінивих індексів."""
+        self._changed.add(name)
+        self._touch()
+        self._lazy_indexes_changed(name)
+
+    def _lazy_indexes_changed(self, name):
+        """Позначає запис для оновлення індексу триграм і стовпців, якщо їх уже побудовано."""
+        if self._name_grams is not None:
+            self._name_grams.dirty.add(name)
+        if self._columns is not None:
+            self._columns.dirty.add(name)
+
+    def _reset_lazy_indexes(self):
+        """Відкидає індекс триграм і стовпці: їх буде побудовано заново при потребі."""
+        self._name_grams = None
+        self._columns = None
+
+    def _adopt(self, name, record):
+        """Замінює запис версією, збереженою іншою сесією (None — там запис видалено)."""
+        self._touch()
+        self._lazy_indexes_changed(name)
+        old_record = self.data.get(name)
+        if old_record is not None:
+            self._unindex_record(name, old_record)
+            old_record._owner = None
+        if record is None:
+            if old_record is not None:
+                del self.data[name]
+            return
+        self.data[name] = record
+        self._attach(name, record)
+        self._index_record(name, record)
+
+    def _detach_new(self, next_key):
+        """
+        Нові записи, які треба перенумерувати перед злиттям.
+
+        Імена контактів задає користувач, тож нові записи не перейменовуються:
+        однакове ім'я, додане у двох сесіях, — конфлікт.
+        """
+        return []
+
+    def _attach_new(self, records):
+        return []
+
+    # --------------------- CRUD ---------------------
+
     def add_record(self, record):
-        self.data[record.name.value] = record
+        name = record.name.value
+        self._mark_changed(name)
+        old_record = self.data.get(name)
+        if old_record is not None:
+            self._unindex_record(name, old_record)
+            # Замінений запис більше не оновлює індекси книги
+            old_record._owner = None
+        self.data[name] = record
+        self._attach(name, record)
+        self._index_record(name, record)
 
     def find(self, name):
         """Знаходить запис за іменем."""
@@ -20,29 +296,186 @@ class AddressBook(UserDict):
     def delete(self, name):
         """Видаляє запис за іменем."""
         if name in self.data:
+            record = self.data[name]
+            self._mark_changed(name)
+            self._unindex_record(name, record)
+            record._owner = None
             del self.data[name]
         else:
             raise KeyError("Record not found.")
 
-    def get_upcoming_birthdays(self):
-        """Повертає користувачів, яких треба привітати протягом наступного тижня."""
-        today = datetime.today().date()
-        upcoming_birthdays = []
+    # --------------------- NAME SEARCH ---------------------
+
+    def complete_names(self, prefix, limit=10):
+        """Повертає до limit імен, що починаються з prefix (без урахування регістру)."""
+        self._ensure_indexes()
+        return self._name_trie.complete(prefix, limit)
+
+    def _fuzzy_index(self):
+        """
+        Індекс триграм імен (NameGrams).
+
+        Будується при першому пошуку з помилками; далі перед пошуком
+        застосовуються лише імена записів, змінених після попереднього.
+        """
+        if self._name_grams is None:
+            self._name_grams = NameGrams.from_names(self.data)
+        elif self._name_grams.dirty:
+            self._name_grams.refresh(self.data.__contains__)
+        return self._name_grams
+
+    def _fuzzy_names(self, query, max_distance, limit=None):
+        """Імена в межах max_distance правок від найближчих; з limit — щонайменше limit, якщо є."""
+        return [name for _, name in self._fuzzy_index().search(query, max_distance, limit)]
+
+    def search_names(self, query, limit=10, max_distance=2):
+        """
+        Шукає імена за префіксом, а також з помилками (до max_distance правок).
+
+        Пошук з помилками виконується, лише якщо збігів за префіксом менше limit.
+
+        Returns:
+            list: до limit імен; спершу збіги за префіксом, потім найближчі
+        """
+        names = dict.fromkeys(self.complete_names(query, limit))
+        if len(names) >= limit:
+            return list(names)
+        # Серед найближчих можуть бути й збіги за префіксом, тож потрібно limit імен
+        for name in self._fuzzy_names(query, max_distance, limit):
+            if len(names) >= limit:
+                break
+            names.setdefault(name)
+        return list(names)
+
+    # --------------------- REVERSE LOOKUPS ---------------------
+
+    def _names_by_phone(self, phone):
+        self._ensure_indexes()
+        return list(self._phone_index.get(phone, ()))
+
+    def _names_by_email(self, email):
+        self._ensure_indexes()
+        return list(self._email_index.get(email, ()))
+
+    def find_by_phone(self, phone):
+        """Повертає записи, що містять номер телефону (формат номера не важливий)."""
+        return [self.data[name] for name in self._names_by_phone(normalize_phone(phone))]
 
-        for record in self.data.values():
-            if not record.birthday:
-                continue
+    def find_by_email(self, email):
+        """Повертає записи з цим email (без урахування регістру)."""
+        return [self.data[name] for name in self._names_by_email(email.strip().lower())]
 
-            birthday = record.birthday.value
-            birthday_date = datetime.strptime(birthday, "%d.%m.%Y").date()
-            birthday_this_year = birthday_date.replace(year=today.year)
+    # --------------------- ANALYTICS ---------------------
 
-            if birthday_this_year < today:
-                birthday_this_year = birthday_this_year.replace(year=today.year + 1)
+    def columns(self):
+        """
+        Стовпці контактів для агрегатів (див. columns.ContactColumns).
 
-            days_until_birthday = (birthday_this_year - today).days
+        Будуються при першому виклику; далі перераховуються лише рядки
+        записів, змінених після попереднього виклику.
+        """
+        if self._columns is None:
+            self._columns = self._build_columns()
+        elif self._columns.dirty:
+            self._columns.refresh(self.data)
+        return self._columns
 
-            if 0 <= days_until_birthday <= 7:
+    def _build_columns(self):
+        return ContactColumns.from_records(self.data.items())
+
+    # --------------------- BIRTHDAYS ---------------------
+
+    def _birthdays_on(self, day):
+        """
+        Імена контактів, чий день народження припадає на day.
+
+        У невисокосний рік народжені 29 лютого святкують 28 лютого.
+        """
+        self._ensure_indexes()
+        names = list(self._birthday_index.get((day.month, day.day), ()))
+        if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+            names.extend(self._birthday_index.get((2, 29), ()))
+        return names
+
+    def find_by_birthday(self, queries):
+        """
+        Контакти, дата народження яких підходить хоча б під один запит.
+
+        Args:
+            queries: [BirthdayQuery, ...] (див. birthday_query.parse_birthday_query)
+
+        Returns:
+            list: [(порядковий номер дати, ім'я), ...] у хронологічному порядку
+        """
+        found = set()
+        for query in queries:
+            found.update(self._birthday_matches(query))
+        return sorted(found)
+
+    def _birthday_matches(self, query):
+        """
+        Пари (дата, ім'я) для одного BirthdayQuery.
+
+        Без обмеження років дні перебираються через календарний індекс
+        (місяць, день); з ним — діапазонами дат у відсортованому списку,
+        тож час залежить від кількості знайдених записів і діапазонів, а
+        не від розміру книги.
+        """
+        self._ensure_indexes()
+        first, last, months, days = query
+        order = self._birthday_order
+        if not order:
+            return []
+        if first is None and last is None and (months is not None or days is not None):
+            return [
+                (self.data[name].birthday._raw, name)
+                for key in month_days(months, days)
+                for name in self._birthday_index.get(key, ())
+            ]
+
+        # Межі обмежуються найранішою і найпізнішою датою в книзі
+        first = order[0][0] if first is None else max(first, order[0][0])
+        last = order[-1][0] if last is None else min(last, order[-1][0])
+        if first > last:
+            return []
+        if months is None and days is None:
+            return self._born_between(first, last)
+
+        found = []
+        for year in range(date.fromordinal(first).year, date.fromordinal(last).year + 1):
+            for month in sorted(months or range(1, 13)):
+                month_start = date(year, month, 1).toordinal()
+                month_length = calendar.monthrange(year, month)[1]
+                if days is None:
+                    found += self._born_between(
+                        max(month_start, first), min(month_start + month_length - 1, last)
+                    )
+                    continue
+                for day in days:
+                    ordinal = month_start + day - 1
+                    if day <= month_length and first <= ordinal <= last:
+                        found += self._born_between(ordinal, ordinal)
+        return found
+
+    def _born_between(self, first, last):
+        """Пари (дата, ім'я) з датою народження від first до last включно."""
+        order = self._birthday_order
+        return order[bisect_left(order, (first,)):bisect_left(order, (last + 1,))]
+
+    def get_upcoming_birthdays(self, days=7):
+        """
+        Повертає користувачів, яких треба привітати протягом наступних days днів.
+
+        Дні перебираються через календарний індекс, тож час роботи залежить
+        від days і кількості знайдених записів, а не від розміру книги.
+        Привітання з днів народження у вихідні переносяться на понеділок.
+        """
+        today = datetime.today().date()
+        upcoming_birthdays = []
+
+        for offset in range(days + 1):
+            birthday_this_year = today + timedelta(days=offset)
+            for name in self._birthdays_on(birthday_this_year):
                 congratulation_date = birthday_this_year
                 if congratulation_date.weekday() == 5:
                     congratulation_date += timedelta(days=2)
@@ -50,11 +483,10 @@ class AddressBook(UserDict):
                     congratulation_date += timedelta(days=1)
 
                 upcoming_birthdays.append({
-                    "name": record.name.value,
+                    "name": name,
                     "congratulation_date": congratulation_date.strftime("%d.%m.%Y")
                 })
 
         return upcoming_birthdays
-    
-    #def edit_record(self):
 
+    #def edit_record(self):
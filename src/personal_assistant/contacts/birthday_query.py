@@ -0,0 +1,190 @@
+"""
+Запити за датою народження: день, місяць, рік, діапазон років, вік.
+
+Приклади (find-birthday):
+    05.1990                  -> частина дати ДД.ММ.РРРР: травень 1990
+    1990                     -> будь-хто, народжений у 1990
+    --month 3 --year 1990    -> березень 1990
+    --day 12 --month 3       -> 12 березня будь-якого року
+    --year 1980-1989         -> діапазон років (включно)
+    --age 30-40              -> вік від 30 до 40 років (включно)
+
+Запит перетворюється на список BirthdayQuery; контакт підходить, якщо
+підходить хоча б під один з них. Кожен BirthdayQuery обчислюється через
+індекси книги (див. AddressBook.find_by_birthday), а не перебором записів.
+"""
+
+import calendar
+from collections import namedtuple
+from datetime import date
+
+# first / last — межі порядкових номерів дат (date.toordinal) включно або
+# None; months / days — допустимі місяці й дні місяця або None (будь-які)
+BirthdayQuery = namedtuple("BirthdayQuery", "first last months days")
+
+USAGE = (
+    "Usage: find-birthday <part of DD.MM.YYYY> or find-birthday "
+    "[--day D] [--month M] [--year YYYY[-YYYY]] [--age N[-N]]"
+)
+
+# Позиції частин у рядку ДД.ММ.РРРР
+_DAY, _MONTH, _YEAR = (0, 2), (3, 5), (6, 10)
+_DOTS = (2, 5)
+_DATE_LENGTH = 10
+
+
+def parse_birthday_query(args, today=None):
+    """
+    Розбирає аргументи find-birthday.
+
+    Якщо перший аргумент не починається з "--", він вважається частиною
+    дати ДД.ММ.РРРР (як у попередніх версіях), інакше — набором умов.
+
+    Args:
+        args: Аргументи команди
+        today: Сьогоднішня дата (для --age і відсікання майбутніх років)
+
+    Returns:
+        list: [BirthdayQuery, ...]
+
+    Raises:
+        ValueError: якщо умови записано некоректно
+    """
+    today = today or date.today()
+    if not args[0].startswith("--"):
+        return substring_queries(args[0].lower(), today)
+
+    first, last, months, days = None, None, None, None
+    options = iter(args)
+    for option in options:
+        value = next(options, None)
+        if value is None:
+            raise ValueError(f"Missing value for {option}. {USAGE}")
+        if option == "--day":
+            days = {_number(value, 1, 31, option)}
+        elif option == "--month":
+            months = {_number(value, 1, 12, option)}
+        elif option == "--year":
+            low, high = _range(value, 1, today.year, option)
+            first, last = _narrow(first, last, date(low, 1, 1), date(high, 12, 31))
+        elif option == "--age":
+            low, high = _range(value, 0, today.year - 1, option)
+            first, last = _narrow(
+                first, last,
+                date.fromordinal(years_before(today, high + 1).toordinal() + 1),
+                years_before(today, low),
+            )
+        else:
+            raise ValueError(f"Unknown option {option}. {USAGE}")
+    return [BirthdayQuery(first, last, months and frozenset(months), days and frozenset(days))]
+
+
+def substring_queries(query, today):
+    """
+    Перетворює частину рядка ДД.ММ.РРРР на запити за індексами.
+
+    Для кожного можливого положення підрядка в ДД.ММ.РРРР визначаються
+    допустимі дні, місяці й роки. Роки, що задані початком (19, 199,
+    1990), дають один діапазон; інші (напр. "90" — кінець року) — по
+    запиту на кожен підходящий рік до поточного.
+    """
+    queries = []
+    for offset in range(_DATE_LENGTH - len(query) + 1):
+        parts = {_DAY: {}, _MONTH: {}, _YEAR: {}}
+        for position, char in enumerate(query, offset):
+            if position in _DOTS:
+                if char != ".":
+                    break
+                continue
+            if not ("0" <= char <= "9"):
+                break
+            for (start, end), pattern in parts.items():
+                if start <= position < end:
+                    pattern[position - start] = char
+        else:
+            queries.extend(_alignment_queries(parts, today))
+    return queries
+
+
+def _alignment_queries(parts, today):
+    days = _matching(range(1, 32), 2, parts[_DAY])
+    months = _matching(range(1, 13), 2, parts[_MONTH])
+    if days == set() or months == set():
+        return []
+    year_pattern = parts[_YEAR]
+    if not year_pattern:
+        return [BirthdayQuery(None, None, months, days)]
+    if sorted(year_pattern) == list(range(len(year_pattern))):
+        # Початок року: 19 -> 1900..1999
+        prefix = "".join(year_pattern[i] for i in range(len(year_pattern)))
+        low = int(prefix.ljust(4, "0"))
+        high = min(int(prefix.ljust(4, "9")), today.year)
+        if low > high or high < 1:
+            return []
+        return [BirthdayQuery(date(max(low, 1), 1, 1).toordinal(),
+                              date(high, 12, 31).toordinal(), months, days)]
+    return [
+        BirthdayQuery(date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal(), months, days)
+        for year in _matching(range(1, today.year + 1), 4, year_pattern)
+    ]
+
+
+def _matching(values, width, pattern):
+    """Значення, запис яких з width цифр збігається з pattern {позиція: цифра}; None — будь-які."""
+    if not pattern:
+        return None
+    return frozenset(
+        value for value in values
+        if all(f"{value:0{width}d}"[position] == char for position, char in pattern.items())
+    )
+
+
+def _number(value, low, high, option):
+    if not (value.isascii() and value.isdigit()) or not low <= int(value) <= high:
+        raise ValueError(f"{option} must be a number from {low} to {high}. {USAGE}")
+    return int(value)
+
+
+def _range(value, low, high, option):
+    start, _, end = value.partition("-")
+    start = _number(start, low, high, option)
+    end = _number(end, low, high, option) if end else start
+    if start > end:
+        raise ValueError(f"{option} range must go from low to high. {USAGE}")
+    return start, end
+
+
+def _narrow(first, last, low, high):
+    """Перетинає межі first..last з діапазоном дат low..high."""
+    low, high = low.toordinal(), high.toordinal()
+    return (low if first is None else max(first, low)), (high if last is None else min(last, high))
+
+
+def years_before(day, years):
+    """Та сама дата years років тому (29 лютого -> 28 лютого невисокосного року)."""
+    year = max(day.year - years, 1)
+    if day.month == 2 and day.day == 29 and not calendar.isleap(year):
+        return date(year, 2, 28)
+    return day.replace(year=year)
+
+
+def matches(query, ordinal):
+    """Чи підходить дата з порядковим номером ordinal під BirthdayQuery."""
+    first, last, months, days = query
+    if (first is not None and ordinal < first) or (last is not None and ordinal > last):
+        return False
+    if months is None and days is None:
+        return True
+    day = date.fromordinal(ordinal)
+    return (months is None or day.month in months) and (days is None or day.day in days)
+
+
+def month_days(months, days):
+    """Пари (місяць, день), що задовольняють обмеження (None — будь-які), без неіснуючих дат."""
+    return [
+        (month, day)
+        for month in sorted(months or range(1, 13))
+        for day in sorted(days or range(1, 32))
+        # 2000 — високосний рік, тож 29 лютого теж допустиме
+        if day <= calendar.monthrange(2000, month)[1]
+    ]
@@ -0,0 +1,253 @@
+"""
+Columnar snapshot of an AddressBook for analytics (contact-stats).
+
+Поля контактів копіюються у стовпці array: дати народження — порядкові
+номери (date.toordinal), місяці народження, номери доменів email (домени
+інтернуються), кількість телефонів, а самі телефони — int64 в окремому
+стовпці. Агрегати рахуються над стовпцями без об'єктів Record і Field:
+з NumPy (якщо встановлено) — векторно, інакше через Counter, sorted і
+bisect, які обходять array на C.
+
+Стовпці будуються при першому запиті (AddressBook.columns), а далі
+оновлюються інкрементно: книга позначає змінені записи у dirty, і перед
+наступним агрегатом перераховуються лише їхні рядки. Рядки видалених
+контактів і слоти видалених телефонів використовуються повторно.
+"""
+
+import importlib
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from datetime import date
+
+from .birthday_query import years_before
+
+# Значення порожніх і звільнених комірок
+NO_BIRTHDAY = 0
+NO_DOMAIN = -1
+FREE = -1
+
+# Номер телефону з 10 цифр // OPERATOR_DIVISOR -> код оператора (050, 067...)
+OPERATOR_DIVISOR = 10 ** 7
+
+# NumPy необов'язковий і імпортується лише при першій агрегації
+_imported = {}
+
+
+def _numpy():
+    """Модуль numpy або None, якщо його не встановлено."""
+    if "numpy" not in _imported:
+        try:
+            _imported["numpy"] = importlib.import_module("numpy")
+        except ImportError:
+            _imported["numpy"] = None
+    return _imported["numpy"]
+
+
+class ContactColumns:
+    """
+    Стовпці контактів книги: рядок i описує один контакт.
+
+    birthdays, months, domains і phone_counts мають по одному значенню на
+    рядок; у рядках видалених контактів phone_counts дорівнює FREE.
+    Телефони зберігаються окремо (phones), у слотах, перелічених для
+    кожного рядка в _phone_slots.
+    """
+
+    def __init__(self):
+        # Ім'я -> номер рядка
+        self.rows = {}
+        self._free_rows = []
+        self.birthdays = array("i")
+        self.months = array("b")
+        self.domains = array("i")
+        self.phone_counts = array("h")
+        self.phones = array("q")
+        # Номер рядка -> слоти його телефонів у phones
+        self._phone_slots = {}
+        self._free_phones = []
+        # Інтерновані домени email: номер -> домен і навпаки
+        self.domain_names = []
+        self._domain_ids = {}
+        # Імена записів, рядки яких треба перерахувати (див. refresh)
+        self.dirty = set()
+
+    @classmethod
+    def from_records(cls, items):
+        """Будує стовпці з пар (ім'я, Record)."""
+        columns = cls()
+        for name, record in items:
+            columns.set_record(name, record)
+        return columns
+
+    # --------------------- MUTATIONS ---------------------
+
+    def refresh(self, records):
+        """
+        Перераховує рядки записів із dirty.
+
+        Args:
+            records: Відображення ім'я -> Record (book.data); відсутнє
+                ім'я означає, що контакт видалено
+        """
+        for name in self.dirty:
+            self.set_record(name, records.get(name))
+        self.dirty.clear()
+
+    def set_record(self, name, record):
+        if record is None:
+            self.remove(name)
+            return
+        self.set_row(
+            name,
+            record.birthday._raw if record.birthday else None,
+            record.email.value if record.email else None,
+            [phone._raw for phone in record.phones],
+        )
+
+    def set_row(self, name, birthday, email, phones):
+        """
+        Записує рядок контакту name (новий або наявний).
+
+        Args:
+            birthday: Порядковий номер дати народження або None
+            email: Email або None
+            phones: Номери телефонів як цілі числа
+        """
+        row = self.rows.get(name)
+        if row is None:
+            row = self.rows[name] = self._new_row()
+        else:
+            self._clear_phones(row)
+        self.birthdays[row] = birthday or NO_BIRTHDAY
+        self.months[row] = date.fromordinal(birthday).month if birthday else 0
+        self.domains[row] = self._domain_id(email)
+        self.phone_counts[row] = len(phones)
+        slots = []
+        for phone in phones:
+            if self._free_phones:
+                slot = self._free_phones.pop()
+                self.phones[slot] = phone
+            else:
+                slot = len(self.phones)
+                self.phones.append(phone)
+            slots.append(slot)
+        if slots:
+            self._phone_slots[row] = slots
+
+    def remove(self, name):
+        row = self.rows.pop(name, None)
+        if row is None:
+            return
+        self._clear_phones(row)
+        self.birthdays[row] = NO_BIRTHDAY
+        self.months[row] = 0
+        self.domains[row] = NO_DOMAIN
+        self.phone_counts[row] = FREE
+        self._free_rows.append(row)
+
+    def _new_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        self.birthdays.append(NO_BIRTHDAY)
+        self.months.append(0)
+        self.domains.append(NO_DOMAIN)
+        self.phone_counts.append(FREE)
+        return len(self.birthdays) - 1
+
+    def _clear_phones(self, row):
+        for slot in self._phone_slots.pop(row, ()):
+            self.phones[slot] = FREE
+            self._free_phones.append(slot)
+
+    def _domain_id(self, email):
+        if not email:
+            return NO_DOMAIN
+        domain = email.rpartition("@")[2].lower()
+        domain_id = self._domain_ids.get(domain)
+        if domain_id is None:
+            domain_id = self._domain_ids[domain] = len(self.domain_names)
+            self.domain_names.append(domain)
+        return domain_id
+
+    # --------------------- AGGREGATES ---------------------
+
+    def __len__(self):
+        return len(self.rows)
+
+    def count_by_domain(self):
+        """[(домен, кількість контактів), ...] від найпоширенішого домену."""
+        counts = _bincount(self.domains, len(self.domain_names))
+        return sorted(
+            ((self.domain_names[domain_id], count) for domain_id, count in enumerate(counts) if count),
+            key=lambda item: (-item[1], item[0]),
+        )
+
+    def count_by_month(self):
+        """Кількість днів народження в кожному місяці: список з 12 чисел."""
+        return _bincount(self.months, 13)[1:]
+
+    def count_by_phone_count(self):
+        """[(кількість телефонів, кількість контактів), ...] за зростанням."""
+        counts = _bincount(self.phone_counts)
+        return [(phones, count) for phones, count in enumerate(counts) if count]
+
+    def count_by_operator(self):
+        """[(код оператора, кількість номерів), ...] від найпоширенішого коду."""
+        numpy = _numpy()
+        if numpy is not None:
+            phones = numpy.frombuffer(self.phones, dtype=numpy.int64)
+            codes = numpy.bincount(phones[phones >= 0] // OPERATOR_DIVISOR).tolist()
+            counts = {code: count for code, count in enumerate(codes) if count}
+        else:
+            counts = Counter(phone // OPERATOR_DIVISOR for phone in self.phones if phone >= 0)
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def count_by_age(self, today=None, step=10):
+        """
+        Кількість контактів у вікових групах по step років.
+
+        Returns:
+            list: [(вік від, вік до, кількість), ...] від наймолодших до
+            найстаршої непорожньої групи
+        """
+        today = today or date.today()
+        numpy = _numpy()
+        if numpy is not None:
+            birthdays = numpy.sort(numpy.frombuffer(self.birthdays, dtype=numpy.int32))
+        else:
+            birthdays = sorted(self.birthdays)
+        # Нулі (контакти без дати) — на початку відсортованого стовпця
+        start = bisect_right(birthdays, NO_BIRTHDAY)
+        if start == len(birthdays):
+            return []
+        oldest = int(birthdays[start])
+
+        # Межі груп: народжені після years_before(today, age) ще не мають age років
+        ages = [0]
+        while years_before(today, ages[-1]).toordinal() >= oldest and ages[-1] < today.year:
+            ages.append(ages[-1] + step)
+        positions = [bisect_right(birthdays, years_before(today, age).toordinal()) for age in ages]
+        return [
+            (ages[i], ages[i + 1] - 1, positions[i] - positions[i + 1])
+            for i in range(len(ages) - 1)
+        ]
+
+
+def _bincount(column, length=None):
+    """
+    Кількість входжень значень 0..length-1 у стовпці (від'ємні не враховуються).
+
+    Без length довжина визначається найбільшим значенням.
+    """
+    numpy = _numpy()
+    if numpy is not None:
+        values = numpy.frombuffer(column, dtype=column.typecode)
+        values = values[values >= 0]
+        counts = numpy.bincount(values, minlength=length or 0).tolist()
+    else:
+        counter = Counter(column)
+        if length is None:
+            length = max((value for value in counter if value >= 0), default=-1) + 1
+        counts = [counter[value] for value in range(length)]
+    return counts if length is None else counts[:length]
@@ -1,6 +1,7 @@
 """
 Record class for managing contact information.
 """
+import calendar
 from collections import UserDict
 from datetime import datetime, timedelta
 
@@ -9,32 +10,44 @@ from .fields import Phone
 from .fields import Birthday
 from .fields import Email
 from .fields import Address
-from .address_book import AddressBook
+from .address_book import AddressBook, normalize_phone
+from .birthday_query import parse_birthday_query
 
 # Decorator for handling input errors
-from .input_error import input_error
+from .input_error import ErrorMessage, input_error
+from ..pagination import page_lines, parse_page_args, skip_through, stale_cursor
 
 
 # --------------------- RECORD CLASS ---------------------
 
 class Record:
     """Клас для зберігання інформації про контакт (ім’я + телефони + день народження)."""
+
+    # Поля, що серіалізуються; _owner — AddressBook, до якої доданий запис
+    _FIELDS = ("name", "phones", "birthday", "email", "address")
+    __slots__ = _FIELDS + ("_owner",)
+
     def __init__(self, name):
         self.name = Name(name)
         self.phones = []
         self.birthday = None
         self.email = None
         self.address = None
+        self._owner = None
 
     def add_phone(self, phone):
         """Додає новий номер телефону."""
         self.phones.append(Phone(phone))
+        if self._owner is not None:
+            self._owner._phone_added(self, phone)
 
     def remove_phone(self, phone):
         """Видаляє номер телефону зі списку."""
         for p in self.phones:
             if p.value == phone:
                 self.phones.remove(p)
+                if self._owner is not None:
+                    self._owner._phone_removed(self, phone)
                 return True
         raise ValueError("Phone not found.")
 
@@ -43,6 +56,9 @@ class Record:
         for p in self.phones:
             if p.value == old_phone:
                 p.value = Phone(new_phone).value
+                if self._owner is not None:
+                    self._owner._phone_removed(self, old_phone)
+                    self._owner._phone_added(self, p.value)
                 return True
         raise ValueError("Old phone not found.")
 
@@ -55,15 +71,68 @@ class Record:
 
     def add_birthday(self, birthday):
         """Додає день народження до контакту."""
+        old_birthday = self.birthday
         self.birthday = Birthday(birthday)
+        if self._owner is not None:
+            self._owner._birthday_changed(self, old_birthday)
 
     def add_email(self, email):
         """Додає email до контакту."""
+        old_email = self.email
         self.email = Email(email)
+        if self._owner is not None:
+            self._owner._email_changed(self, old_email)
     
     def add_address(self, address):
         """Додає адресу до контакту."""
         self.address = Address(address)
+        if self._owner is not None:
+            self._owner._address_changed(self)
+
+    def _add_fields(self, phones=(), birthday=None, email=None, address=None):
+        """
+        Додає вже перевірені поля без повторної валідації (масовий імпорт).
+
+        Поля створюються через Field._from_raw із значень, які повернула
+        validation.validate_contact_row. Телефони, що вже є у записі,
+        пропускаються; решта полів замінюється, якщо передана.
+        """
+        owner = self._owner
+        existing = {phone._raw for phone in self.phones}
+        for raw in phones:
+            if raw in existing:
+                continue
+            existing.add(raw)
+            phone = Phone._from_raw(raw)
+            self.phones.append(phone)
+            if owner is not None:
+                owner._phone_added(self, phone.value)
+        if birthday is not None:
+            old_birthday, self.birthday = self.birthday, Birthday._from_raw(birthday)
+            if owner is not None:
+                owner._birthday_changed(self, old_birthday)
+        if email is not None:
+            old_email, self.email = self.email, Email._from_raw(email)
+            if owner is not None:
+                owner._email_changed(self, old_email)
+        if address is not None:
+            self.address = Address._from_raw(address)
+            if owner is not None:
+                owner._address_changed(self)
+
+    def __getstate__(self):
+        # Посилання на AddressBook не серіалізуємо: воно відновлюється при завантаженні
+        return {field: getattr(self, field) for field in self._FIELDS}
+
+    def __setstate__(self, state):
+        # Старі файли зберігали __dict__ запису; поля, яких там бракує, лишаються None
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for field in self._FIELDS:
+            setattr(self, field, state.get(field))
+        if self.phones is None:
+            self.phones = []
+        self._owner = None
 
     def __str__(self):
         phones = ", ".join(p.value for p in self.phones) if self.phones else "no phones"
@@ -106,7 +175,15 @@ def search_contact(args, book: AddressBook):
     record = book.find(name)
 
     if record is None:
-        raise KeyError(f"Contact '{name}' not found.")
+        # Пошук за префіксом імені, з помилками, а потім за номером телефону
+        records = [book.find(match) for match in book.search_names(name)]
+        if not records and normalize_phone(name):
+            records = book.find_by_phone(name)
+        if not records:
+            raise KeyError(f"Contact '{name}' not found.")
+        lines = [f"Found {len(records)} contact(s):"]
+        lines.extend(f"  {record}" for record in records)
+        return "\n".join(lines)
 
     # Convert record to a readable string
     # phones = ", ".join(p.value for p in record.phones) if record.phones else "no phones"
@@ -127,6 +204,28 @@ def search_contact(args, book: AddressBook):
 
     return f"{record.name}: {phones}, {email}, {address}"
 
+@input_error
+def find_by_phone(args, book: AddressBook):
+    if not args:
+        raise ValueError("Enter a phone. Usage: find-by-phone <phone>")
+
+    phone = args[0]
+    records = book.find_by_phone(phone)
+    if not records:
+        return f"No contacts with phone {phone}."
+    return "\n".join(str(record) for record in records)
+
+@input_error
+def find_by_email(args, book: AddressBook):
+    if not args:
+        raise ValueError("Enter an email. Usage: find-by-email <email>")
+
+    email = args[0]
+    records = book.find_by_email(email)
+    if not records:
+        return f"No contacts with email {email}."
+    return "\n".join(str(record) for record in records)
+
 @input_error
 def delete_contact(args, book: AddressBook):
     if not args:
@@ -146,7 +245,7 @@ def change_phone(args, book: AddressBook):
     name, old_phone, new_phone = args
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     record.edit_phone(old_phone, new_phone)
     return "Phone number updated."
 
@@ -155,23 +254,35 @@ def show_phones(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     return "; ".join(p.value for p in record.phones)
 
+@input_error
 def show_all(args, book: AddressBook):
+    """
+    Показує контакти по одному рядку, не збираючи весь список у пам'яті.
+
+    Приймає --limit N, --offset N та --after NAME (ім'я останнього
+    показаного контакту — курсор для наступної сторінки).
+    """
+    page = parse_page_args(args)
     if not book.data:
         return "No contacts found."
-    result = []
-    for record in book.data.values():
-        result.append(str(record))
-    return "\n".join(result)
+    names = iter(book.data)
+    if page.after is not None:
+        # Контакти виводяться в порядку додавання, тож для видаленого
+        # курсора наступного імені не визначити
+        if page.after not in book.data:
+            raise stale_cursor("all-contacts", page.after)
+        names = skip_through(names, page.after)
+    return page_lines(names, page, "all-contacts", lambda name: str(book.data[name]))
 
 @input_error
 def add_birthday(args, book: AddressBook):
     name, birthday = args
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     record.add_birthday(birthday)
     return f"Birthday added for {name}."
 
@@ -180,7 +291,7 @@ def add_email(args, book: AddressBook):
     name, email = args
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     record.add_email(email)
     return f"Email added for {name}."
 
@@ -189,7 +300,7 @@ def add_address(args, book: AddressBook):
     name, address = args
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     record.add_address(address)
     return f"Address added for {name}."
 
@@ -199,41 +310,90 @@ def show_birthday(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if not record:
-        return "Contact not found."
+        return ErrorMessage("Contact not found.")
     if not record.birthday:
         return f"{name} has no birthday set."
     return record.birthday.value
 
 @input_error
 def birthdays(args, book: AddressBook):
-    upcoming = book.get_upcoming_birthdays()
+    days = 7
+    if args:
+        if not (args[0].isascii() and args[0].isdigit()):
+            raise ValueError("Number of days must be a non-negative integer. Usage: birthdays [days]")
+        days = int(args[0])
+    upcoming = book.get_upcoming_birthdays(days)
     if not upcoming:
+        if days != 7:
+            return f"No birthdays in the next {days} days."
         return "No birthdays this week."
     return "\n".join([f"{b['name']} -> {b['congratulation_date']}" for b in upcoming])
 
 @input_error
 def find_by_birthday(args, book: AddressBook):
-    if not args:
-        return "Please provide a part of birthday (DD.MM.YYYY)"
-
-    query = args[0].lower()
-    matches = []
+    """
+    Шукає контакти за частиною дати ДД.ММ.РРРР або за умовами
+    --day / --month / --year / --age (див. birthday_query).
 
-    for name, record in book.items():
-        if not getattr(record, "birthday", None):
-            continue
-
-        birthday = record.birthday.value
+    Результат — у хронологічному порядку; пошук виконується через
+    індекси дат книги, а не перебором усіх записів.
+    """
+    if not args:
+        return "Please provide a part of birthday (DD.MM.YYYY) or --day/--month/--year/--age"
 
-        if not isinstance(birthday, str):
-            continue
+    matches = book.find_by_birthday(parse_birthday_query(args))
+    if not matches:
+        return "No contacts found"
 
-        birthday_str = birthday.strip().lower()
+    return "\n".join(
+        f"{name}'s birthday is {datetime.fromordinal(ordinal):%d.%m.%Y}"
+        for ordinal, name in matches
+    )
 
-        if query in birthday_str:
-            matches.append(f"{name}'s birthday is {birthday_str}")
+# Розділи contact-stats у порядку виводу
+STAT_SECTIONS = ("domains", "months", "ages", "phones")
+# Скільки найпоширеніших доменів і кодів операторів показувати
+STAT_TOP = 10
 
-    if not matches:
-        return "No contacts found"
+@input_error
+def contact_stats(args, book: AddressBook):
+    """
+    Зведена статистика контактів: домени email, місяці народження, вік,
+    кількість телефонів і коди операторів.
+
+    Рахується над стовпцями книги (AddressBook.columns), а не перебором
+    Record. Без аргументів показує всі розділи.
+    """
+    sections = [arg.lower() for arg in args] or list(STAT_SECTIONS)
+    for section in sections:
+        if section not in STAT_SECTIONS:
+            raise ValueError(f"Unknown section {section}. Usage: contact-stats [{'|'.join(STAT_SECTIONS)}]")
+    columns = book.columns()
+    if not len(columns):
+        return "No contacts found."
 
-    return "\n".join(matches)
+    lines = []
+    if "domains" in sections:
+        domains = columns.count_by_domain()
+        without_email = len(columns) - sum(count for _, count in domains)
+        lines.append(f"Contacts by email domain ({len(domains)} domains, {without_email} without email):")
+        lines += [f"  {domain:<30} {count:>7}" for domain, count in domains[:STAT_TOP]]
+        if len(domains) > STAT_TOP:
+            lines.append(f"  ... and {len(domains) - STAT_TOP} more domains")
+    if "months" in sections:
+        lines.append("Birthdays by month:")
+        lines += [
+            f"  {calendar.month_abbr[month]:<30} {count:>7}"
+            for month, count in enumerate(columns.count_by_month(), 1)
+        ]
+    if "ages" in sections:
+        lines.append("Contacts by age:")
+        lines += [f"  {f'{low}-{high}':<30} {count:>7}" for low, high, count in columns.count_by_age()]
+    if "phones" in sections:
+        lines.append("Phones per contact:")
+        lines += [f"  {phones:<30} {count:>7}" for phones, count in columns.count_by_phone_count()]
+        lines.append("Phone operator codes:")
+        lines += [
+            f"  {f'{code:03d}':<30} {count:>7}" for code, count in columns.count_by_operator()[:STAT_TOP]
+        ]
+    return "\n".join(lines)
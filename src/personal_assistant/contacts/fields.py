@@ -3,23 +3,58 @@
 """
 
 import re
-from datetime import datetime
+from datetime import date, datetime, time
 
 
 class Field:
     """
     Базовий клас для полів запису.
     Використовує @property та @setter для контролю значення.
+
+    Поля мають __slots__ замість __dict__, тож кожне займає лише кілька
+    десятків байтів. Підкласи можуть зберігати значення у компактнішому
+    внутрішньому вигляді (див. Phone і Birthday).
     """
+    __slots__ = ("__value",)
+
     def __init__(self, value):
         self.__value = None
         self.value = value  # Викликається setter
 
+    def __getstate__(self):
+        # Серіалізуємо публічне значення: воно не залежить від внутрішнього формату
+        return {"value": self.value}
+
+    def __setstate__(self, state):
+        """
+        Відновлює поле зі стану pickle.
+
+        Приймає і поточний формат {"value": ...}, і старі файли, де поле
+        мало __dict__ з ключем "_Field__value".
+        """
+        if isinstance(state, tuple):
+            # (__dict__, __slots__) — формат pickle для об'єктів зі слотами
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.__value = None
+        self.value = state["value"] if "value" in state else state["_Field__value"]
+
     @property
     def value(self):
         """Повертає значення поля."""
         return self.__value
 
+    @property
+    def _raw(self):
+        """Внутрішнє значення поля (див. codec)."""
+        return self.__value
+
+    @classmethod
+    def _from_raw(cls, raw):
+        """Створює поле з уже перевіреного внутрішнього значення, без валідації."""
+        field = cls.__new__(cls)
+        field.__value = raw
+        return field
+
     @value.setter
     def value(self, new_value):
         """Встановлює значення поля."""
@@ -37,6 +72,8 @@ class Name(Field):
     Клас для зберігання імені контакту.
     Валідує, що ім'я не порожнє.
     """
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value):
         """
@@ -57,8 +94,18 @@ class Phone(Field):
     """
     Клас для зберігання номера телефону з валідацією.
     Телефон має містити рівно 10 цифр.
+
+    Номер зберігається як ціле число (28 байтів замість ~60 для рядка),
+    а при читанні доповнюється нулями зліва до 10 цифр.
     """
-    @Field.value.setter
+    __slots__ = ()
+
+    @property
+    def value(self):
+        """Повертає номер телефону як рядок з 10 цифр."""
+        return f"{self._Field__value:010d}"
+
+    @value.setter
     def value(self, new_value):
         """
         Встановлює номер телефону з валідацією.
@@ -71,7 +118,7 @@ class Phone(Field):
         """
         if not self._validate(new_value):
             raise ValueError("Invalid phone number format. Phone must contain exactly 10 digits.")
-        self._Field__value = new_value
+        self._Field__value = int(new_value)
 
     @staticmethod
     def _validate(value):
@@ -82,9 +129,10 @@ class Phone(Field):
             value: Рядок для перевірки
 
         Returns:
-            bool: True якщо номер коректний (10 цифр), False інакше
+            bool: True якщо номер коректний (10 цифр 0-9), False інакше
         """
-        return isinstance(value, str) and value.isdigit() and len(value) == 10
+        # isdigit() пропускає й інші цифри Unicode ("²", "٠"), тож лише ASCII
+        return isinstance(value, str) and value.isascii() and value.isdigit() and len(value) == 10
 
 
 class Email(Field):
@@ -92,8 +140,11 @@ class Email(Field):
     Клас для зберігання email адреси з валідацією.
     Перевіряє базовий формат email.
     """
-    # Простий regex для валідації email
+    __slots__ = ()
+
+    # Простий regex для валідації email (компілюється один раз)
     EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    EMAIL_PATTERN = re.compile(EMAIL_REGEX)
 
     @Field.value.setter
     def value(self, new_value):
@@ -121,19 +172,27 @@ class Email(Field):
         Returns:
             bool: True якщо email коректний, False інакше
         """
-        return isinstance(value, str) and re.match(cls.EMAIL_REGEX, value) is not None
+        return isinstance(value, str) and cls.EMAIL_PATTERN.match(value) is not None
 
 
 class Birthday(Field):
     """
     Клас для зберігання дня народження з валідацією формату.
     Формат: DD.MM.YYYY
+
+    Дата зберігається як порядковий номер дня (date.toordinal), тож
+    значення завжди повертається у нормалізованому вигляді DD.MM.YYYY.
     """
-    def __init__(self, value):
-        self.__date = None
-        super().__init__(value)
+    __slots__ = ()
 
-    @Field.value.setter
+    DATE_PATTERN = re.compile(r"([0-9]{1,2})\.([0-9]{1,2})\.([0-9]{4})\Z")
+
+    @property
+    def value(self):
+        """Повертає дату народження у форматі DD.MM.YYYY."""
+        return date.fromordinal(self._Field__value).strftime("%d.%m.%Y")
+
+    @value.setter
     def value(self, new_value):
         """
         Встановлює день народження з валідацією формату.
@@ -144,21 +203,39 @@ class Birthday(Field):
         Raises:
             ValueError: якщо дата не відповідає формату DD.MM.YYYY
         """
-        try:
-            # Перевірка коректності дати та перетворення рядка на об'єкт datetime
-            date_obj = datetime.strptime(new_value, "%d.%m.%Y")
+        self._Field__value = self.parse(new_value).toordinal()
 
-            # Перевірка, що дата не в майбутньому
-            if date_obj > datetime.now():
-                raise ValueError("Birthday cannot be in the future.")
+    @staticmethod
+    def parse(value, now=None):
+        """
+        Перевіряє дату народження і повертає її як datetime.
+
+        Args:
+            value: Дата у форматі DD.MM.YYYY
+            now: Поточний момент; при масовій перевірці передається один
+                раз на весь пакет замість виклику datetime.now() для кожного значення
 
-            self._Field__value = new_value
-            self.__date = date_obj
+        Raises:
+            ValueError: якщо дата не відповідає формату або в майбутньому
+        """
+        match = Birthday.DATE_PATTERN.match(value) if isinstance(value, str) else None
+        try:
+            if match and 1 <= int(match[1]) <= 31 and 1 <= int(match[2]) <= 12:
+                # Швидкий шлях без strptime; неіснуючий день дає той самий ValueError
+                date_obj = datetime(int(match[3]), int(match[2]), int(match[1]))
+            else:
+                # Перевірка коректності дати та перетворення рядка на об'єкт datetime
+                date_obj = datetime.strptime(value, "%d.%m.%Y")
         except ValueError as e:
             if "does not match format" in str(e) or "unconverted data remains" in str(e):
                 raise ValueError("Invalid date format. Use DD.MM.YYYY")
             raise
 
+        # Перевірка, що дата не в майбутньому
+        if date_obj > (now or datetime.now()):
+            raise ValueError("Birthday cannot be in the future.")
+        return date_obj
+
     @property
     def date(self):
         """
@@ -167,7 +244,7 @@ class Birthday(Field):
         Returns:
             datetime: Об'єкт дати народження
         """
-        return self.__date
+        return datetime.combine(date.fromordinal(self._Field__value), time())
 
 
 class Address(Field):
@@ -175,6 +252,8 @@ class Address(Field):
     Клас для зберігання адреси контакту.
     Валідує, що адреса не порожня.
     """
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value):
         """
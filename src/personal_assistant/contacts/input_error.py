@@ -1,14 +1,23 @@
 # --------------------- DECORATOR ---------------------
 
+class ErrorMessage(str):
+    """
+    Повідомлення про помилку, яке обробник повертає замість винятку.
+
+    Поводиться як звичайний рядок, але дозволяє відрізнити помилку
+    від успішного результату (наприклад, у пакетному режимі).
+    """
+
+
 def input_error(func):
     """Декоратор для обробки помилок користувача."""
     def inner(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except ValueError as e:
-            return str(e)
+            return ErrorMessage(e)
         except KeyError:
-            return "No such contact found."
+            return ErrorMessage("No such contact found.")
         except IndexError:
-            return "Enter correct arguments."
-    return inner
\ No newline at end of file
+            return ErrorMessage("Enter correct arguments.")
+    return inner
@@ -0,0 +1,274 @@
+"""
+Індекси імен контактів для пошуку за префіксом та з помилками.
+"""
+
+from collections import deque
+
+# Ключ вузла префіксного дерева, під яким зберігаються повні імена
+_END = "\0"
+# Символ, яким доповнюються ключі NameGrams перед розбиттям на грами
+_PAD = "\0"
+_NO_IDS = frozenset()
+
+
+def _char_masks(pattern):
+    """Символ -> бітова маска його позицій у pattern (для _bounded_distance)."""
+    masks = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | 1 << i
+    return masks
+
+
+def _bounded_distance(masks, length, text, max_distance):
+    """
+    Відстань редагування між шаблоном (masks і length від _char_masks) і text.
+
+    Бітово-паралельний алгоритм Маєрса: стовпець таблиці відстаней
+    зберігається бітами цілого числа, тож на кожен символ text припадає
+    кілька операцій над int замість циклу по символах шаблону. Якщо
+    відстань гарантовано більша за max_distance, повертає max_distance + 1
+    одразу, не дочитуючи text.
+    """
+    if not length:
+        return min(len(text), max_distance + 1)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative = full, 0
+    distance = length
+    remaining = len(text)
+    for char in text:
+        remaining -= 1
+        eq = masks.get(char, 0)
+        vertical = eq | negative
+        horizontal = (((eq & positive) + positive) ^ positive) | eq
+        h_positive = negative | (~(horizontal | positive) & full)
+        h_negative = positive & horizontal
+        if h_positive & last:
+            distance += 1
+        elif h_negative & last:
+            distance -= 1
+        # Кожен символ text, що лишився, зменшує відстань не більше ніж на 1
+        if distance - remaining > max_distance:
+            return max_distance + 1
+        h_positive = ((h_positive << 1) | 1) & full
+        h_negative = (h_negative << 1) & full
+        positive = h_negative | (~(vertical | h_positive) & full)
+        negative = h_positive & vertical
+    return distance if distance <= max_distance else max_distance + 1
+
+
+class NameTrie:
+    """
+    Префіксне дерево імен без урахування регістру.
+
+    Вузли — вкладені словники символ -> вузол; у кінцевому вузлі під
+    ключем _END зберігаються оригінальні імена.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, name):
+        node = self.root
+        for char in name.lower():
+            node = node.setdefault(char, {})
+        node.setdefault(_END, {})[name] = None
+
+    def remove(self, name):
+        path = [self.root]
+        for char in name.lower():
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        names = path[-1].get(_END)
+        if not names or name not in names:
+            return
+        del names[name]
+        if not names:
+            del path[-1][_END]
+        # Прибираємо порожні вузли знизу вгору
+        key = name.lower()
+        for i in range(len(key), 0, -1):
+            if path[i]:
+                break
+            del path[i - 1][key[i - 1]]
+
+    def complete(self, prefix, limit=10):
+        """
+        Повертає до limit імен, що починаються з prefix.
+
+        Обхід у ширину, тож коротші імена йдуть першими, а робота
+        обмежена кількістю знайдених імен, а не розміром дерева.
+        """
+        node = self.root
+        for char in prefix.lower():
+            node = node.get(char)
+            if node is None:
+                return []
+
+        result = []
+        queue = deque([node])
+        while queue and len(result) < limit:
+            node = queue.popleft()
+            for char, child in node.items():
+                if char == _END:
+                    result.extend(child)
+                else:
+                    queue.append(child)
+        return result[:limit]
+
+
+class NameGrams:
+    """
+    Індекс триграм імен для пошуку з помилками (за відстанню Левенштейна).
+
+    Ключ (ім'я в нижньому регістрі) доповнюється з обох боків Q - 1
+    символами _PAD і розбивається на Q-грами; повтори однієї грами в
+    ключі нумеруються, тож спільні грами рахуються як у мультимножинах.
+    Одна правка змінює не більше Q грам, тож ключ на відстані k від запиту
+    має щонайменше (грам запиту - k * Q) спільних з ним грам. Пошук
+    відбирає кандидатів за цим порогом і довжиною, а відстань рахує лише
+    для них, з раннім виходом (_bounded_distance).
+
+    Ключі мають номери; списки грам і довжин зберігають множини номерів,
+    тож видалене ім'я одразу прибирається з індексу, а його номер
+    використовується повторно.
+    """
+
+    Q = 3
+
+    def __init__(self):
+        # Грама -> номери ключів, що її містять
+        self.postings = {}
+        # Довжина ключа -> номери ключів
+        self.lengths = {}
+        # Номер -> ключ (None для звільнених номерів) і навпаки
+        self.keys = []
+        self._ids = {}
+        self._free = []
+        # Ключ -> оригінальні імена (dict як впорядкована множина)
+        self.names = {}
+        # Імена, які треба додати або прибрати перед пошуком (див. refresh)
+        self.dirty = set()
+
+    @classmethod
+    def from_names(cls, names):
+        index = cls()
+        for name in names:
+            index.add(name)
+        return index
+
+    @classmethod
+    def _grams(cls, key):
+        padded = _PAD * (cls.Q - 1) + key + _PAD * (cls.Q - 1)
+        seen = {}
+        grams = []
+        for i in range(len(padded) - cls.Q + 1):
+            gram = padded[i:i + cls.Q]
+            repeat = seen.get(gram, 0)
+            seen[gram] = repeat + 1
+            # Повтор грами — окрема грама: "ana", "ana1", ...
+            grams.append(f"{gram}{repeat}" if repeat else gram)
+        return grams
+
+    def add(self, name):
+        key = name.lower()
+        names = self.names.get(key)
+        if names is not None:
+            names[name] = None
+            return
+        self.names[key] = {name: None}
+        if self._free:
+            key_id = self._free.pop()
+            self.keys[key_id] = key
+        else:
+            key_id = len(self.keys)
+            self.keys.append(key)
+        self._ids[key] = key_id
+        for gram in self._grams(key):
+            self.postings.setdefault(gram, set()).add(key_id)
+        self.lengths.setdefault(len(key), set()).add(key_id)
+
+    def remove(self, name):
+        key = name.lower()
+        names = self.names.get(key)
+        if names is None or name not in names:
+            return
+        del names[name]
+        if names:
+            return
+        del self.names[key]
+        key_id = self._ids.pop(key)
+        for gram in self._grams(key):
+            self._discard(self.postings, gram, key_id)
+        self._discard(self.lengths, len(key), key_id)
+        self.keys[key_id] = None
+        self._free.append(key_id)
+
+    @staticmethod
+    def _discard(lists, list_key, key_id):
+        ids = lists[list_key]
+        ids.discard(key_id)
+        if not ids:
+            del lists[list_key]
+
+    def refresh(self, contains):
+        """
+        Застосовує зміни імен з dirty.
+
+        Args:
+            contains: Функція ім'я -> чи є воно в книзі
+        """
+        for name in self.dirty:
+            if contains(name):
+                self.add(name)
+            else:
+                self.remove(name)
+        self.dirty.clear()
+
+    def search(self, query, max_distance=2, limit=None):
+        """
+        Повертає [(відстань, ім'я), ...] для імен у межах max_distance,
+        відсортовані за відстанню та ім'ям.
+
+        Відстані перебираються від 0 до max_distance; з limit пошук
+        зупиняється, щойно імен на вже перевірених відстанях набирається
+        не менше limit, тож далекі кандидати не перевіряються.
+        """
+        query = query.lower()
+        masks = _char_masks(query)
+        grams = self._grams(query)
+        lists = sorted((self.postings.get(gram, _NO_IDS) for gram in grams), key=len)
+        # Номер ключа -> відстань (max_distance + 1, якщо ключ далі)
+        distances = {}
+        for k in range(max_distance + 1):
+            threshold = len(grams) - k * self.Q
+            if threshold > 0:
+                # Ключ з threshold спільними грамами є хоча б в одному з
+                # len(lists) - threshold + 1 будь-яких списків — беремо найкоротші
+                candidates = set().union(*lists[:len(lists) - threshold + 1])
+            else:
+                candidates = set().union(*(
+                    self.lengths.get(length, _NO_IDS)
+                    for length in range(len(query) - k, len(query) + k + 1)
+                ))
+            for key_id in candidates:
+                if key_id in distances:
+                    continue
+                key = self.keys[key_id]
+                if abs(len(key) - len(query)) > k:
+                    continue
+                if threshold > 1 and sum(key_id in ids for ids in lists) < threshold:
+                    continue
+                distances[key_id] = _bounded_distance(masks, len(query), key, max_distance)
+            if limit is not None and sum(
+                len(self.names[self.keys[key_id]])
+                for key_id, distance in distances.items() if distance <= k
+            ) >= limit:
+                break
+        return sorted(
+            (distance, name)
+            for key_id, distance in distances.items() if distance <= k
+            for name in self.names[self.keys[key_id]]
+        )
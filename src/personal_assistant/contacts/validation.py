@@ -0,0 +1,166 @@
+"""
+Масова перевірка полів контактів.
+
+Ті самі правила, що й у класах fields.py, але без створення об'єктів
+полів: шаблон email скомпільований один раз, а поточний час для перевірки
+дат народження береться один раз на пакет. Результат — внутрішні значення
+полів (Field._raw), з яких імпорт створює поля через Field._from_raw без
+повторної перевірки. Великі пакети можна розподілити
+між процесами (ProcessPoolExecutor), бо перевірка обмежена процесором.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .fields import Birthday, Email, Phone
+
+# Роздільник кількох телефонів (чи тегів) в одному текстовому полі, напр. у CSV
+LIST_SEPARATOR = ";"
+
+# Пакети, менші за це значення, перевіряються в поточному процесі:
+# передача даних між процесами коштує більше за саму перевірку
+MIN_PARALLEL_ROWS = 5000
+
+_EMAIL_ERROR = "Invalid email format. Email must match pattern: user@example.com"
+_PHONE_ERROR = "Invalid phone number format. Phone must contain exactly 10 digits."
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def split_list(value):
+    """Список (з JSONL) лишається списком, рядок (з CSV) розбивається за ';'."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        items = map(str, value)
+    else:
+        items = str(value).split(LIST_SEPARATOR)
+    result = []
+    for item in items:
+        item = item.strip()
+        if item:
+            result.append(item)
+    return result
+
+
+def validate_contact_row(row, now):
+    """
+    Перевіряє один рядок контакту і повертає внутрішні значення полів.
+
+    Args:
+        row: dict з ключами name, phones, birthday, email, address
+        now: Поточний момент для перевірки дати народження
+
+    Returns:
+        dict: значення у тому ж вигляді, що й Field._raw: телефони — цілі
+        числа, дата народження — порядковий номер дня (date.toordinal)
+
+    Raises:
+        ValueError: з тим самим повідомленням, що й відповідний клас поля
+    """
+    name = _text(row, "name")
+    if not name:
+        raise ValueError("Name cannot be empty.")
+
+    phones = []
+    for phone in split_list(row.get("phones")):
+        if not Phone._validate(phone):
+            raise ValueError(_PHONE_ERROR)
+        phones.append(int(phone))
+
+    birthday = _text(row, "birthday")
+    if birthday:
+        birthday = Birthday.parse(birthday, now).toordinal()
+
+    email = _text(row, "email")
+    if email:
+        if not Email._validate(email):
+            raise ValueError(_EMAIL_ERROR)
+        email = email.lower()
+
+    return {
+        "name": name,
+        "phones": phones,
+        "birthday": birthday,
+        "email": email,
+        "address": _text(row, "address"),
+    }
+
+
+def validate_contact_rows(rows, now=None):
+    """
+    Перевіряє пакет рядків у поточному процесі.
+
+    Args:
+        rows: [(номер рядка, dict або виняток, якщо рядок не розібрано), ...]
+        now: Поточний момент; за замовчуванням datetime.now() один раз на пакет
+
+    Returns:
+        tuple: (список валідних dict, список (номер рядка, повідомлення))
+    """
+    now = now or datetime.now()
+    valid, errors = [], []
+    for row_number, row in rows:
+        if isinstance(row, Exception):
+            errors.append((row_number, str(row)))
+            continue
+        try:
+            valid.append(validate_contact_row(row, now))
+        except (ValueError, TypeError) as e:
+            errors.append((row_number, str(e)))
+    return valid, errors
+
+
+class BulkValidator:
+    """
+    Перевіряє пакети рядків, розподіляючи їх між процесами.
+
+    Використовується як контекстний менеджер, щоб пул процесів
+    створювався один раз на весь імпорт:
+
+        with BulkValidator(workers=4) as validate:
+            valid, errors = validate(rows)
+
+    Результати повертаються у тому ж порядку, що й рядки на вході.
+    З workers=1 або для малих пакетів пул не використовується.
+    """
+
+    def __init__(self, workers=None, min_parallel_rows=MIN_PARALLEL_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel_rows = min_parallel_rows
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __call__(self, rows):
+        now = datetime.now()
+        if self.workers <= 1 or len(rows) < self.min_parallel_rows:
+            return validate_contact_rows(rows, now)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        chunk_size = -(-len(rows) // self.workers)
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        valid, errors = [], []
+        for chunk_valid, chunk_errors in self._executor.map(
+            validate_contact_rows, chunks, [now] * len(chunks)
+        ):
+            valid.extend(chunk_valid)
+            errors.extend(chunk_errors)
+        return valid, errors
@@ -0,0 +1,322 @@
+"""
+Opt-in instrumentation of command dispatch and storage calls.
+
+Вмикається прапорцем --instrument (див. main.py). Для кожної команди з
+cli.COMMANDS і кожного методу бекенду зберігання збирає кількість викликів
+і помилок, гістограму затримок, а за --trace-alloc — виділену пам'ять
+(tracemalloc) і приріст кількості блоків пам'яті. За --cprofile обрані
+команди виконуються під cProfile. Результати показує команда stats, а при
+виході вони записуються у JSON-файл.
+
+Вимкнена інструментація коштує одну перевірку прапорця на виклик.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from .contacts.input_error import ErrorMessage
+from .startup import PROFILE
+
+DEFAULT_OUTPUT = "assistant-stats.json"
+# Значення --cprofile, яке вмикає профілювання всіх команд
+ALL_COMMANDS = "all"
+
+# Методи бекенду зберігання, які вимірюються (див. instrument_storage).
+# Функція, яку повертає snapshot, вимірюється окремо як "write"
+STORAGE_METHODS = ("load_book", "load_notebook", "prefetch", "sync", "snapshot")
+
+# Скільки найдорожчих функцій профілю потрапляє у JSON
+PROFILE_TOP = 20
+
+
+class Metric:
+    """
+    Накопичені виміри однієї команди чи методу сховища.
+
+    Затримки зберігаються гістограмою з кошиками-степенями двійки в
+    мікросекундах: кошик i містить виклики тривалістю до 2**i мкс, тож
+    квантилі оцінюються з точністю до двох разів без зберігання вимірів.
+    """
+
+    __slots__ = ("calls", "errors", "total", "longest", "buckets", "allocated", "peak", "blocks")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.longest = 0.0
+        # Номер кошика -> кількість викликів
+        self.buckets = {}
+        # Сумарні виділені байти (приріст), максимальний пік і приріст блоків
+        self.allocated = 0
+        self.peak = 0
+        self.blocks = 0
+
+    def add(self, elapsed, ok, memory=None):
+        self.calls += 1
+        self.errors += not ok
+        self.total += elapsed
+        self.longest = max(self.longest, elapsed)
+        bucket = int(elapsed * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        if memory is not None:
+            allocated, peak, blocks = memory
+            self.allocated += allocated
+            self.peak = max(self.peak, peak)
+            self.blocks += blocks
+
+    def quantile(self, q):
+        """Оцінка квантиля затримки в секундах (верхня межа кошика)."""
+        rank = q * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1_000_000, self.longest)
+        return self.longest
+
+    def to_dict(self, memory=False):
+        data = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.calls * 1000, 3),
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "max_ms": round(self.longest * 1000, 3),
+            # Верхня межа кошика в мікросекундах -> кількість викликів
+            "histogram_us": {str(1 << bucket): self.buckets[bucket] for bucket in sorted(self.buckets)},
+        }
+        if memory:
+            data["allocated_kb"] = round(self.allocated / 1024, 1)
+            data["peak_kb"] = round(self.peak / 1024, 1)
+            data["blocks"] = self.blocks
+        return data
+
+
+class Instrumentation:
+    """
+    Реєстр метрик сесії; за замовчуванням вимкнений і нічого не збирає.
+
+    Метрики групуються за видом: "command" (команди CLI) і "storage"
+    (методи бекенду зберігання). Запис на диск виконується у фоновому
+    потоці журналу, тож метрики оновлюються під блокуванням.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_allocations = False
+        # Назви команд, які виконуються під cProfile (або ALL_COMMANDS)
+        self.profile_commands = frozenset()
+        self.output = None
+        # вид -> назва -> Metric
+        self.metrics = {"command": {}, "storage": {}}
+        # Назва команди -> cProfile.Profile
+        self.profiles = {}
+        self._lock = threading.Lock()
+
+    def enable(self, output=DEFAULT_OUTPUT, trace_allocations=False, profile_commands=()):
+        """
+        Вмикає збір метрик.
+
+        Args:
+            output: JSON-файл, куди метрики записуються при виході (None — не записувати)
+            trace_allocations: Вимірювати пам'ять через tracemalloc (сповільнює роботу)
+            profile_commands: Назви команд для cProfile або ("all",)
+        """
+        self.enabled = True
+        self.profile_commands = frozenset(profile_commands)
+        if trace_allocations:
+            import tracemalloc
+
+            self.trace_allocations = True
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if output:
+            self.output = output
+            atexit.register(self.dump)
+
+    def _profiled(self, name):
+        return ALL_COMMANDS in self.profile_commands or name in self.profile_commands
+
+    def _profile(self, name):
+        import cProfile
+
+        with self._lock:
+            profile = self.profiles.get(name)
+            if profile is None:
+                profile = self.profiles[name] = cProfile.Profile()
+        return profile
+
+    def record(self, kind, name, elapsed, ok, memory=None):
+        with self._lock:
+            metric = self.metrics[kind].get(name)
+            if metric is None:
+                metric = self.metrics[kind][name] = Metric()
+            metric.add(elapsed, ok, memory)
+
+    @contextmanager
+    def _memory(self, result):
+        """Вимірює пам'ять, виділену в контексті; [байти, пік, блоки] дописуються у result."""
+        if not self.trace_allocations:
+            yield
+            return
+        import tracemalloc
+
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            result.extend((current - start, peak - start, sys.getallocatedblocks() - blocks))
+
+    def call(self, kind, name, function, *args):
+        """
+        Викликає function(*args) і враховує виклик у метриці (kind, name).
+
+        Помилкою вважається виняток або ErrorMessage. Якщо команда повертає
+        лінивий ітератор рядків, час і профіль його обходу додаються до
+        того ж виклику, а вимір записується, коли обхід завершено.
+        """
+        profile = self._profile(name) if kind == "command" and self._profiled(name) else None
+        memory = []
+        start = perf_counter()
+        try:
+            with self._memory(memory):
+                if profile is None:
+                    result = function(*args)
+                else:
+                    result = profile.runcall(function, *args)
+        except BaseException:
+            self.record(kind, name, perf_counter() - start, False, memory or None)
+            raise
+        elapsed = perf_counter() - start
+        if hasattr(result, "__next__"):
+            return self._measure_lines(kind, name, result, elapsed, memory or None, profile)
+        self.record(kind, name, elapsed, not isinstance(result, ErrorMessage), memory or None)
+        return result
+
+    def _measure_lines(self, kind, name, lines, elapsed, memory, profile):
+        """Віддає рядки лінивого результату, додаючи час їх отримання до виміру."""
+        ok = True
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    line = next(lines) if profile is None else profile.runcall(next, lines)
+                except StopIteration:
+                    break
+                except BaseException:
+                    ok = False
+                    raise
+                finally:
+                    elapsed += perf_counter() - start
+                yield line
+        finally:
+            self.record(kind, name, elapsed, ok, memory)
+
+    def instrument_storage(self, storage):
+        """
+        Підміняє методи бекенду STORAGE_METHODS на такі, що вимірюють виклики.
+
+        Функція запису, яку повертає snapshot, теж вимірюється (як "write"),
+        хоч і виконується у фоновому потоці. Повертає той самий storage.
+        """
+        for method in STORAGE_METHODS:
+            original = getattr(storage, method)
+
+            def measured(*args, _name=method, _original=original):
+                return self.call("storage", _name, _original, *args)
+            setattr(storage, method, measured)
+
+        snapshot = storage.snapshot
+
+        def measured_snapshot(book, notebook):
+            write = snapshot(book, notebook)
+            return lambda: self.call("storage", "write", write)
+        storage.snapshot = measured_snapshot
+        return storage
+
+    # --- ЗВІТИ ---
+    def report(self):
+        """Таблиці метрик команд і сховища для команди stats (рядки)."""
+        lines = []
+        memory = self.trace_allocations
+        header = f"{'':<20} {'calls':>6} {'errors':>6} {'avg ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+        if memory:
+            header += f" {'alloc KB':>9} {'peak KB':>9}"
+        for kind, title in (("command", "command"), ("storage", "storage")):
+            with self._lock:
+                metrics = sorted(
+                    self.metrics[kind].items(), key=lambda item: item[1].total, reverse=True
+                )
+            if not metrics:
+                continue
+            lines.append(title + header[len(title):])
+            for name, metric in metrics:
+                line = (
+                    f"{name:<20} {metric.calls:>6} {metric.errors:>6} "
+                    f"{metric.total / metric.calls * 1000:>9.3f} "
+                    f"{metric.quantile(0.5) * 1000:>9.3f} {metric.quantile(0.95) * 1000:>9.3f} "
+                    f"{metric.longest * 1000:>9.3f}"
+                )
+                if memory:
+                    line += f" {metric.allocated / metric.calls / 1024:>9.1f} {metric.peak / 1024:>9.1f}"
+                lines.append(line)
+        if self.profiles:
+            lines.append(f"cProfile: {', '.join(sorted(self.profiles))} (see {self.output or 'dump()'})")
+        return lines or ["No commands measured yet."]
+
+    def to_dict(self):
+        with self._lock:
+            data = {
+                kind: {name: metric.to_dict(self.trace_allocations) for name, metric in metrics.items()}
+                for kind, metrics in self.metrics.items()
+            }
+            profiles = dict(self.profiles)
+        data["startup"] = {label: round(elapsed, 3) for label, elapsed in PROFILE.sections}
+        data["profiles"] = {name: _top_functions(profile) for name, profile in profiles.items()}
+        return data
+
+    def dump(self, output=None):
+        """
+        Записує метрики у JSON (і профілі cProfile поруч, у <файл>.<команда>.prof).
+
+        Returns:
+            str: шлях до JSON-файлу
+        """
+        output = output or self.output or DEFAULT_OUTPUT
+        data = self.to_dict()
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        stem = os.path.splitext(output)[0]
+        for name, profile in self.profiles.items():
+            profile.dump_stats(f"{stem}.{name}.prof")
+        return output
+
+
+def _top_functions(profile, limit=PROFILE_TOP):
+    """Найдорожчі (за сумарним часом з вкладеними викликами) функції профілю."""
+    import pstats
+
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, function), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+INSTRUMENTATION = Instrumentation()
@@ -0,0 +1,126 @@
+"""
+Lazy mapping used by storage backends that do not load everything into memory.
+"""
+
+from collections.abc import MutableMapping
+from heapq import merge
+
+
+class LazyMap(MutableMapping):
+    """
+    Відображення ключ -> об'єкт, що читає об'єкти зі сховища лише при зверненні.
+
+    Прочитані або додані об'єкти кешуються і саме вони записуються
+    назад при збереженні; видалені ключі запам'ятовуються до збереження.
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self.deleted = set()
+        # Нові ключі, яких ще немає у сховищі (dict як впорядкована множина)
+        self._new = {}
+        # Викликається як on_load(key, value) для кожного прочитаного об'єкта
+        self.on_load = None
+
+    # Методи, які реалізують нащадки
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _stored_keys(self):
+        raise NotImplementedError
+
+    def _stored_count(self):
+        raise NotImplementedError
+
+    def _is_stored(self, key):
+        raise NotImplementedError
+
+    def _stored_keys_after(self, key):
+        """Ключі сховища, більші за key, за зростанням."""
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        if key in self.cache:
+            return self.cache[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        value = self._load(key)
+        if value is None:
+            raise KeyError(key)
+        self.cache[key] = value
+        if self.on_load is not None:
+            self.on_load(key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.cache and key not in self:
+            self._new[key] = None
+        self.deleted.discard(key)
+        self.cache[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.cache.pop(key, None)
+        self._new.pop(key, None)
+        if self._is_stored(key):
+            self.deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self.cache:
+            return True
+        if key in self.deleted:
+            return False
+        return self._is_stored(key)
+
+    def __iter__(self):
+        for key in self._stored_keys():
+            if key not in self.deleted and key not in self._new:
+                yield key
+        yield from list(self._new)
+
+    def keys_after(self, key):
+        """
+        Ключі, більші за key, за зростанням — для курсорів пагінації.
+
+        Сховище відбирає ключі саме, тож сторінка не перебирає всі ключі.
+        """
+        stored = (
+            stored_key for stored_key in self._stored_keys_after(key)
+            if stored_key not in self.deleted and stored_key not in self._new
+        )
+        return merge(stored, sorted(new_key for new_key in self._new if new_key > key))
+
+    def index_items(self):
+        """
+        Пари (ключ, запис) для побудови індексів книги.
+
+        Нащадки можуть віддавати поля записів, не читаючи самих записів
+        (див. snapshot_storage); за замовчуванням записи читаються.
+        """
+        return self.items()
+
+    def __len__(self):
+        return self._stored_count() - len(self.deleted) + len(self._new)
+
+    def forget(self, key):
+        """
+        Відкидає незбережені зміни ключа: наступне звернення прочитає сховище.
+
+        Returns:
+            об'єкт з кешу або None
+        """
+        self.deleted.discard(key)
+        self._new.pop(key, None)
+        return self.cache.pop(key, None)
+
+    def changes(self):
+        """
+        Повертає (змінені об'єкти, видалені ключі) для запису на диск.
+
+        Після виклику нові та видалені ключі вважаються записаними.
+        """
+        deleted = self.deleted
+        self.deleted = set()
+        self._new = {}
+        return self.cache, deleted
@@ -1,15 +1,105 @@
 """
 Main entry point for Personal Assistant CLI application.
+
+Модулі режимів (cli, server, client) імпортуються лише після розбору
+аргументів і лише для обраного режиму, щоб короткі сесії запускались
+швидко (див. --profile-startup).
 """
-from .cli import run_cli
+from .startup import PROFILE
+
+import argparse
+import sys
 
+from .instrumentation import ALL_COMMANDS, DEFAULT_OUTPUT, INSTRUMENTATION
+from .protocol import DEFAULT_ADDRESS
 
-def main():
+
+def main(argv=None):
     """
     Main function to run Personal Assistant.
+
+    Без аргументів запускає інтерактивний режим; з --batch виконує
+    команди з файлу (або зі stdin, якщо вказано "-"); з --serve запускає
+    сервер зі спільними даними, а з --connect працює як його клієнт.
+    З --profile-startup у stderr друкується час імпортів, завантаження
+    кожного файлу даних і час до першого запрошення; з --instrument
+    збираються метрики команд і сховища (команда stats, JSON при виході).
     """
-    run_cli()
+    parser = argparse.ArgumentParser(prog="personal-assistant")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--batch",
+        metavar="FILE",
+        help='execute commands from FILE ("-" for stdin) and save once at the end',
+    )
+    mode.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        nargs="?",
+        const=DEFAULT_ADDRESS,
+        help=f"serve the data to clients on host:port or unix:/path (default: {DEFAULT_ADDRESS})",
+    )
+    mode.add_argument(
+        "--connect",
+        metavar="ADDRESS",
+        nargs="?",
+        const=DEFAULT_ADDRESS,
+        help="run the interactive prompt against a server started with --serve",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report import, data loading and time-to-first-prompt timings to stderr",
+    )
+    parser.add_argument(
+        "--instrument",
+        metavar="FILE",
+        nargs="?",
+        const=DEFAULT_OUTPUT,
+        help="collect per-command and storage metrics (see the stats command) "
+             f"and write them to FILE as JSON at exit (default: {DEFAULT_OUTPUT})",
+    )
+    parser.add_argument(
+        "--trace-alloc",
+        action="store_true",
+        help="with --instrument, also measure memory allocated by each call (tracemalloc)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="COMMANDS",
+        type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+        default=[],
+        help=f'with --instrument, run the comma-separated COMMANDS (or "{ALL_COMMANDS}") '
+             "under cProfile; profiles are saved next to the JSON file",
+    )
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        PROFILE.enable()
+    if args.instrument is not None:
+        INSTRUMENTATION.enable(args.instrument, args.trace_alloc, args.cprofile)
+    elif args.trace_alloc or args.cprofile:
+        parser.error("--trace-alloc and --cprofile require --instrument")
+
+    if args.serve is not None:
+        with PROFILE.measure("import server"):
+            from .server import run_server
+        return run_server(args.serve)
+    if args.connect is not None:
+        with PROFILE.measure("import client"):
+            from .client import run_client
+        return run_client(args.connect)
+
+    with PROFILE.measure("import cli"):
+        from .cli import run_batch, run_cli
+    if args.batch is None:
+        run_cli()
+        return 0
+
+    if args.batch == "-":
+        return run_batch(sys.stdin)
+    with open(args.batch, encoding="utf-8") as f:
+        return run_batch(f)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
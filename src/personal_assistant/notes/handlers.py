@@ -1,3 +1,6 @@
+from itertools import chain
+
+from ..pagination import page_lines, parse_page_args
 from .note import Note
 
 
@@ -13,7 +16,7 @@ def get_note_id(id_str):
 # --- ОБРОБНИКИ НОТАТОК ТА ТЕГІВ ---
 
 
-def add_note_handler(args, book, notebook):
+def add_note_handler(args, notebook):
     """Додає нову нотатку (однорядковий контент)."""
     if not args:
         raise IndexError("Будь ласка, введіть контент для нотатки.")
@@ -24,13 +27,20 @@ def add_note_handler(args, book, notebook):
     return f"Note added with ID: {note_id}"
 
 
-def find_notes_handler(args, book, notebook):
-    """Шукає нотатки за ключовим словом."""
+def find_notes_handler(args, notebook):
+    """
+    Шукає нотатки за ключовим словом.
+
+    З прапорцем --ranked шукає за всіма словами запиту і впорядковує
+    результати за релевантністю.
+    """
+    ranked = "--ranked" in args
+    args = [arg for arg in args if arg != "--ranked"]
     if not args:
         raise IndexError("Будь ласка, введіть ключове слово для пошуку.")
 
-    query = args[0]
-    found_notes = notebook.find_note(query)
+    query = " ".join(args) if ranked else args[0]
+    found_notes = notebook.find_note(query, ranked=ranked)
 
     if not found_notes:
         return f"No notes found containing: '{query}'"
@@ -41,12 +51,27 @@ def find_notes_handler(args, book, notebook):
     return "\n".join(output_lines)
 
 
-def show_all_notes_handler(args, book, notebook):
-    """Показує всі нотатки."""
-    return str(notebook)
+def show_all_notes_handler(args, notebook):
+    """
+    Показує нотатки по одній, не збираючи весь список у пам'яті.
+
+    Приймає --limit N, --offset N та --after ID (ID останньої показаної
+    нотатки — курсор для наступної сторінки).
+    """
+    page = parse_page_args(args)
+    if not notebook.data:
+        return "No notes saved."
+    after = get_note_id(page.after) if page.after is not None else 0
+    lines = page_lines(
+        notebook.iter_ids(after),
+        page,
+        "show-notes",
+        lambda note_id: f"ID {note_id}: {notebook.data[note_id]}",
+    )
+    return chain(["--- Note Book ---"], lines)
 
 
-def edit_note_handler(args, book, notebook):
+def edit_note_handler(args, notebook):
     """Редагує існуючу нотатку за ID."""
     if len(args) < 2:
         raise IndexError("Будь ласка, введіть Note ID та новий контент.")
@@ -59,7 +84,7 @@ def edit_note_handler(args, book, notebook):
     return f"Note ID {note_id} updated successfully."
 
 
-def delete_note_handler(args, book, notebook):
+def delete_note_handler(args, notebook):
     """Видаляє нотатку за ID."""
     if not args:
         raise IndexError("Будь ласка, введіть Note ID.")
@@ -72,7 +97,7 @@ def delete_note_handler(args, book, notebook):
         raise KeyError(f"Note with ID {note_id} not found.")
 
 
-def add_tag_handler(args, book, notebook):
+def add_tag_handler(args, notebook):
     """Додає тег до нотатки."""
     if len(args) < 2:
         raise IndexError("Будь ласка, вкажіть ID нотатки та тег.")
@@ -87,12 +112,20 @@ def add_tag_handler(args, book, notebook):
     return f"Tag '{tag}' added to Note ID {note_id}."
 
 
-def find_by_tag_handler(args, book, notebook):
-    """Шукає нотатки за тегом."""
+def find_by_tag_handler(args, notebook):
+    """
+    Шукає нотатки за тегом.
+
+    Можна поєднувати теги через and / or / not, напр.:
+    find-by-tag work and urgent not done
+
+    Один тег шукається як є, навіть якщо це and / or / not чи -тег;
+    у виразах такі теги беруться в лапки: find-by-tag work and "-draft"
+    """
     if not args:
         raise IndexError("Будь ласка, введіть тег для пошуку.")
 
-    tag_query = args[0]
+    tag_query = " ".join(args)
     found_notes = notebook.find_by_tag(tag_query)
 
     if not found_notes:
@@ -104,7 +137,7 @@ def find_by_tag_handler(args, book, notebook):
     return "\n".join(output_lines)
 
 
-def sort_notes_by_tag_handler(args, book, notebook):
+def sort_notes_by_tag_handler(args, notebook):
     """
     Показує всі нотатки, відсортовані за тегами.
 
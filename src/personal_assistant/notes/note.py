@@ -1,10 +1,22 @@
 from collections import UserDict
 from datetime import datetime
+from itertools import count
+
+from bisect import bisect_left, insort
+
+from .tag_query import evaluate_tag_query, parse_tag_query
+from .text_index import TextIndex
+
+# Номери поколінь даних книг (див. NoteBook._touch)
+_GENERATIONS = count(1)
 
 class Note:
     """
     Представляє окрему нотатку з контентом та тегами.
     """
+
+    # (NoteBook, ID) нотатки, коли вона додана до NoteBook
+    _owner = None
     
     def __init__(self, content, tags=None):
         self.content = content 
@@ -22,12 +34,28 @@ class Note:
         # Валідація: контент не може бути порожнім
         if not new_content or not new_content.strip():
             raise ValueError("Note content cannot be empty.")
+        old_content = getattr(self, "_content", None)
         self._content = new_content
+        if self._owner is not None:
+            notebook, note_id = self._owner
+            notebook._content_changed(note_id, old_content, new_content)
         
     # --- Логіка керування тегами ---
     def add_tag(self, tag):
         """Додає один тег до нотатки, перетворюючи його на нижній регістр."""
-        self.tags.add(tag.strip().lower())
+        tag = tag.strip().lower()
+        if tag in self.tags:
+            return
+        self.tags.add(tag)
+        if self._owner is not None:
+            notebook, note_id = self._owner
+            notebook._tag_added(note_id, self, tag)
+
+    def __getstate__(self):
+        # Посилання на NoteBook не серіалізуємо: воно відновлюється при завантаженні
+        state = self.__dict__.copy()
+        state.pop("_owner", None)
+        return state
         
     def __str__(self):
         tags_info = f" (Tags: {', '.join(self.tags)})" if self.tags else ""
@@ -38,22 +66,222 @@ class NoteBook(UserDict):
     Контейнер для об'єктів Note.
     """
     
+    # Версія структури індексів; при зміні індекси зі старих файлів перебудовуються
+    _INDEX_VERSION = 2
+    # Індекси, які можна не зберігати: без них книга будує їх при першому запиті
+    _INDEX_ATTRS = ("_text_index", "_tag_index", "_tag_order", "_tag_sort_keys")
+
     def __init__(self):
         super().__init__()
         self._next_id = 1 
+        self._init_indexes()
+        self._init_versions()
+        self._touch()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._touch()
+        versions = state.get("_versions")
+        if versions is None or len(versions) != len(self.data):
+            # Файли старого формату або збережені через save_notes: версія нотаток — 0
+            versions = versions or {}
+            self._versions = {key: versions.get(key, 0) for key in self.data}
+        self._changed = set()
+        self._renumbered = []
+        if state.get("_index_version") != self._INDEX_VERSION:
+            self._rebuild_indexes()
+        elif not all(name in state for name in self._INDEX_ATTRS):
+            # Знімок (snapshot_storage) зберігається без індексів
+            self._indexes_built = False
+        else:
+            self._indexes_built = True
+            if isinstance(self.data, dict):
+                for note_id, note in self.data.items():
+                    self._attach(note_id, note)
+
+    # --- ІНДЕКСИ ---
+    def _init_indexes(self):
+        self._index_version = self._INDEX_VERSION
+        # False — індексів ще немає: зміни нотаток їх не оновлюють, а
+        # перший запит до них будує їх з нотаток (_ensure_indexes)
+        self._indexes_built = True
+        self._text_index = TextIndex()
+        # Тег -> множина ID нотаток
+        self._tag_index = {}
+        # Відсортований список ключів (-кількість тегів, перший тег, ID)
+        # і поточний ключ кожної нотатки — для sort_notes_by_tag
+        self._tag_order = []
+        self._tag_sort_keys = {}
+
+    def _rebuild_indexes(self, text_index=None):
+        """
+        Перебудовує індекси з нуля (наприклад, для файлів старого формату).
+
+        Args:
+            text_index: Збережений повнотекстовий індекс (див. codec), щоб
+                не будувати його заново
+        """
+        self._init_indexes()
+        if text_index is not None:
+            self._text_index = text_index
+        for note_id, note in self.data.items():
+            self._attach(note_id, note)
+            if text_index is None:
+                self._text_index.add(note_id, note.content)
+            self._tag_order.append(self._index_tags(note_id, note))
+        # Один sort замість вставки кожного ключа у відсортований список
+        self._tag_order.sort()
+
+    def _ensure_indexes(self):
+        """Будує індекси, якщо книгу завантажено без них."""
+        if not self._indexes_built:
+            self._rebuild_indexes()
+
+    def _attach(self, note_id, note):
+        """Прив'язує нотатку до книги, щоб її зміни оновлювали індекси."""
+        note._owner = (self, note_id)
+
+    @staticmethod
+    def _tag_sort_key(note_id, note):
+        first_tag = min(note.tags) if note.tags else ""
+        return (-len(note.tags), first_tag, note_id)
+
+    def _index_note(self, note_id, note):
+        if not self._indexes_built:
+            return
+        self._text_index.add(note_id, note.content)
+        insort(self._tag_order, self._index_tags(note_id, note))
+
+    def _index_tags(self, note_id, note):
+        """Додає теги нотатки до індексу тегів; повертає її ключ для _tag_order."""
+        for tag in note.tags:
+            self._tag_index.setdefault(tag, set()).add(note_id)
+        key = self._tag_sort_key(note_id, note)
+        self._tag_sort_keys[note_id] = key
+        return key
+
+    def _unindex_note(self, note_id, note):
+        if not self._indexes_built:
+            return
+        self._text_index.remove(note_id, note.content)
+        for tag in note.tags:
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(note_id)
+                if not ids:
+                    del self._tag_index[tag]
+        key = self._tag_sort_keys.pop(note_id, None)
+        if key is not None:
+            del self._tag_order[bisect_left(self._tag_order, key)]
+
+    def _tag_added(self, note_id, note, tag):
+        """Викликається з Note.add_tag після додавання нового тегу."""
+        self._mark_changed(note_id)
+        if not self._indexes_built:
+            return
+        self._tag_index.setdefault(tag, set()).add(note_id)
+        old_key = self._tag_sort_keys.get(note_id)
+        if old_key is not None:
+            del self._tag_order[bisect_left(self._tag_order, old_key)]
+        key = self._tag_sort_key(note_id, note)
+        self._tag_sort_keys[note_id] = key
+        insort(self._tag_order, key)
+
+    def _content_changed(self, note_id, old_content, new_content):
+        """Викликається з сеттера Note.content."""
+        self._mark_changed(note_id)
+        if not self._indexes_built:
+            return
+        self._text_index.remove(note_id, old_content)
+        self._text_index.add(note_id, new_content)
+
+    # --- ВЕРСІЇ (див. storage.merge_saved) ---
+    def _init_versions(self):
+        # ID -> версія нотатки у збереженому файлі
+        self._versions = {}
+        # ID нотаток, змінених після останнього збереження
+        self._changed = set()
+        # [(старий ID, новий ID), ...] нотаток, перенумерованих при злитті
+        # (_attach_new); журнал записує їх при компакції (див. Journal.replay)
+        self._renumbered = []
+
+    def _touch(self):
+        """Починає нове покоління даних: кешовані результати запитів застарівають (query_cache)."""
+        self._generation = next(_GENERATIONS)
+
+    def _mark_changed(self, note_id):
+        """Позначає нотатку зміненою — для збереження і для кешу запитів."""
+        self._changed.add(note_id)
+        self._touch()
+
+    def _adopt(self, note_id, note):
+        """Замінює нотатку версією, збереженою іншою сесією (None — там її видалено)."""
+        self._touch()
+        old_note = self.data.get(note_id)
+        if old_note is not None:
+            self._unindex_note(note_id, old_note)
+            old_note._owner = None
+        if note is None:
+            if old_note is not None:
+                del self.data[note_id]
+            return
+        self.data[note_id] = note
+        self._attach(note_id, note)
+        self._index_note(note_id, note)
+        self._next_id = max(self._next_id, note_id + 1)
+
+    def _detach_new(self, next_id):
+        """
+        Забирає з книги нові нотатки, ID яких могла зайняти інша сесія.
+
+        Args:
+            next_id: Наступний вільний ID у збереженому файлі
+
+        Returns:
+            list: [(старий ID, нотатка), ...] для _attach_new після злиття
+        """
+        new_ids = sorted(
+            note_id for note_id in self._changed
+            if note_id not in self._versions and note_id in self.data
+        )
+        # ID, які вже видала інша сесія, не використовуються повторно
+        self._next_id = max(self._next_id, next_id)
+        if not new_ids or new_ids[0] >= next_id:
+            return []
+        self._touch()
+        detached = []
+        for note_id in new_ids:
+            note = self.data[note_id]
+            self._unindex_note(note_id, note)
+            note._owner = None
+            del self.data[note_id]
+            self._changed.discard(note_id)
+            detached.append((note_id, note))
+        return detached
+
+    def _attach_new(self, detached):
+        """Додає нотатки, забрані _detach_new, під новими ID; повертає [(старий, новий)]."""
+        renumbered = [(note_id, self.add_note(note)) for note_id, note in detached]
+        self._renumbered += renumbered
+        return renumbered
 
     # --- CRUD: ДОДАВАННЯ ---
     def add_note(self, note):
         """Додає нову нотатку і повертає її ID."""
-        self.data[self._next_id] = note
+        note_id = self._next_id
+        self._mark_changed(note_id)
+        self.data[note_id] = note
+        self._attach(note_id, note)
+        self._index_note(note_id, note)
         self._next_id += 1
-        return self._next_id - 1
+        return note_id
 
     # --- CRUD: РЕДАГУВАННЯ ---
     def edit_note(self, note_id, new_content):
         """Редагує зміст нотатки за її ID."""
         if note_id not in self.data:
             raise KeyError(f"Note with ID {note_id} not found.")
+        # Викине ValueError, якщо контент порожній; індекс оновить сеттер
         self.data[note_id].content = new_content
         return True
     
@@ -61,29 +289,64 @@ class NoteBook(UserDict):
     def delete_note(self, note_id):
         """Видаляє нотатку за ID."""
         if note_id in self.data:
+            note = self.data[note_id]
+            self._mark_changed(note_id)
+            self._unindex_note(note_id, note)
+            note._owner = None
             del self.data[note_id]
             return True
         return False
 
     # --- ПОШУК (Базовий) ---
-    def find_note(self, query):
-        """Здійснює пошук за ключовими словами в тексті нотатки."""
-        found_notes = {}
+    def find_note(self, query, ranked=False):
+        """
+        Здійснює пошук за ключовими словами в тексті нотатки.
+
+        Кандидати відбираються через індекс триграм, тож перевіряються
+        лише нотатки, які можуть містити запит. Для запитів, коротших
+        за триграму, виконується повний перебір.
+
+        Args:
+            query: Підрядок для пошуку (без урахування регістру)
+            ranked: Якщо True, шукає за словами запиту і впорядковує
+                результати за релевантністю (BM25)
+
+        Returns:
+            dict: {note_id: note}
+        """
+        self._ensure_indexes()
+        if ranked:
+            return {note_id: self.data[note_id] for note_id in self._text_index.rank(query)}
+
         query = query.lower()
-        for note_id, note in self.data.items():
+        candidates = self._text_index.candidates(query)
+        if candidates is None:
+            items = self.data.items()
+        else:
+            items = ((note_id, self.data[note_id]) for note_id in sorted(candidates))
+
+        found_notes = {}
+        for note_id, note in items:
             if query in note.content.lower():
                 found_notes[note_id] = note
         return found_notes
     
     # --- ПОШУК ЗА ТЕГАМИ (Бонусне завдання) ---
     def find_by_tag(self, tag_query):
-        """Знаходить нотатки, що містять заданий тег."""
-        found_notes = {}
-        tag_query = tag_query.strip().lower()
-        for note_id, note in self.data.items():
-            if tag_query in note.tags:
-                found_notes[note_id] = note
-        return found_notes
+        """
+        Знаходить нотатки за тегом або булевим виразом з тегів.
+
+        Підтримуються AND / OR / NOT (див. tag_query), напр. "work and not done".
+        Результат обчислюється перетином списків ID з індексу тегів.
+        """
+        self._ensure_indexes()
+        groups = parse_tag_query(tag_query)
+        ids = evaluate_tag_query(
+            groups,
+            lambda tag: self._tag_index.get(tag, set()),
+            lambda: self.data.keys(),
+        )
+        return {note_id: self.data[note_id] for note_id in sorted(ids)}
 
     # --- СОРТУВАННЯ ЗА ТЕГАМИ ---
     def sort_notes_by_tag(self):
@@ -95,26 +358,36 @@ class NoteBook(UserDict):
         2. За алфавітом першого тега (за наявності тегів)
         3. За ID нотатки (для стабільності сортування)
 
+        Порядок підтримується індексом при кожній зміні тегів,
+        тож тут сортування не виконується.
+
         Returns:
             list: Список кортежів (note_id, note), відсортованих за тегами
         """
-        def sort_key(item):
-            note_id, note = item
-            # Кількість тегів (інвертуємо для спадаючого порядку)
-            tag_count = -len(note.tags)
-            # Перший тег за алфавітом (або порожній рядок, якщо тегів немає)
-            first_tag = sorted(note.tags)[0] if note.tags else ""
-            # ID нотатки для стабільності
-            return (tag_count, first_tag, note_id)
-
-        sorted_notes = sorted(self.data.items(), key=sort_key)
-        return sorted_notes
+        self._ensure_indexes()
+        return [(note_id, self.data[note_id]) for *_, note_id in self._tag_order]
+
+    def iter_ids(self, after=0):
+        """
+        Повертає ID нотаток за зростанням, починаючи після after.
+
+        Перебір лінивий і не проходить нотатки до курсора: усі ID менші за
+        _next_id, тож для словника перебирається діапазон ID після after,
+        а ліниві бекенди відбирають ключі самі (LazyMap.keys_after).
+        Видалений курсор не заважає: вивід продовжується з наступного ID.
+        """
+        if isinstance(self.data, dict):
+            return (
+                note_id for note_id in range(after + 1, self._next_id)
+                if note_id in self.data
+            )
+        return self.data.keys_after(after)
 
     def __str__(self):
         if not self.data:
             return "No notes saved."
         
         output_lines = ["--- Note Book ---"]
-        for note_id in sorted(self.data.keys()):
+        for note_id in self.iter_ids():
             output_lines.append(f"ID {note_id}: {self.data[note_id]}")
         return "\n".join(output_lines)
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Булеві запити за тегами: AND / OR / NOT.
+
+Приклади:
+    work                     -> нотатки з тегом work
+    work and urgent          -> з обома тегами
+    work urgent              -> те саме (AND за замовчуванням)
+    work or home             -> з будь-яким із тегів
+    work not done            -> з тегом work, але без done
+    work and -done or home   -> "-" теж означає NOT
+
+Запит з одного слова — завжди тег як є (find-by-tag -draft, find-by-tag
+or). У довших запитах тег, що збігається з оператором або починається з
+"-", береться в лапки: work and "or", not '-draft'.
+"""
+
+QUOTES = ("\"", "'")
+
+
+def _literal(word):
+    """Тег у лапках без лапок або None, якщо слово не взято в лапки."""
+    if len(word) >= 2 and word[0] == word[-1] and word[0] in QUOTES:
+        return word[1:-1]
+    return None
+
+
+def parse_tag_query(query):
+    """
+    Розбирає запит у диз'юнкцію груп (OR), кожна з яких — кон'юнкція (AND).
+
+    Запит з одного слова і слова в лапках — теги, а не оператори.
+
+    Returns:
+        list: [(множина тегів, множина заперечених тегів), ...]
+
+    Raises:
+        ValueError: якщо в запиті немає жодного тегу
+    """
+    words = query.lower().split()
+    if len(words) == 1:
+        tag = _literal(words[0])
+        return [({words[0] if tag is None else tag}, set())]
+
+    groups = []
+    positive, negative = set(), set()
+    negate = False
+    for word in words:
+        tag = _literal(word)
+        if tag is None:
+            if word == "or":
+                groups.append((positive, negative))
+                positive, negative = set(), set()
+                continue
+            if word == "and":
+                continue
+            if word == "not":
+                negate = not negate
+                continue
+            tag = word
+            if word.startswith("-") and len(word) > 1:
+                tag = word[1:]
+                negate = not negate
+        (negative if negate else positive).add(tag)
+        negate = False
+    groups.append((positive, negative))
+
+    groups = [group for group in groups if group[0] or group[1]]
+    if not groups:
+        raise ValueError("Tag query is empty.")
+    return groups
+
+
+def evaluate_tag_query(groups, lookup, universe):
+    """
+    Обчислює запит перетином і об'єднанням списків ID нотаток.
+
+    Args:
+        groups: Результат parse_tag_query
+        lookup: Функція tag -> множина ID нотаток з цим тегом
+        universe: Функція без аргументів, що повертає множину всіх ID
+            (потрібна лише для груп, які складаються з самих NOT)
+
+    Returns:
+        set: ID нотаток, що задовольняють запит
+    """
+    result = set()
+    for positive, negative in groups:
+        if positive:
+            # Починаємо з найкоротшого списку, щоб перетин був дешевшим
+            postings = sorted((lookup(tag) for tag in positive), key=len)
+            matched = set(postings[0])
+            for ids in postings[1:]:
+                matched &= ids
+                if not matched:
+                    break
+        else:
+            matched = set(universe())
+        for tag in negative:
+            if not matched:
+                break
+            matched -= lookup(tag)
+        result |= matched
+    return result
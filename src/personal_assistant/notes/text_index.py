@@ -0,0 +1,103 @@
+"""
+Інкрементальний повнотекстовий індекс для нотаток.
+"""
+
+import math
+import re
+
+TOKEN_REGEX = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Розбиває текст на слова у нижньому регістрі."""
+    return TOKEN_REGEX.findall(text.lower())
+
+
+class TextIndex:
+    """
+    Інвертований індекс: слово -> {ID нотатки: кількість входжень},
+    а також індекс триграм: триграма -> множина ID нотаток.
+
+    Триграми дозволяють знаходити кандидатів для пошуку підрядка
+    (зокрема всередині слова), а слова — ранжувати результати за BM25.
+    """
+
+    NGRAM = 3
+
+    def __init__(self):
+        self.postings = {}
+        self.grams = {}
+        self.lengths = {}
+        self.total_length = 0
+
+    @classmethod
+    def _grams(cls, text):
+        return {text[i:i + cls.NGRAM] for i in range(len(text) - cls.NGRAM + 1)}
+
+    def add(self, doc_id, text):
+        """Додає текст нотатки до індексу."""
+        tokens = tokenize(text)
+        self.lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+        for token in tokens:
+            posting = self.postings.setdefault(token, {})
+            posting[doc_id] = posting.get(doc_id, 0) + 1
+        for gram in self._grams(text.lower()):
+            self.grams.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id, text):
+        """Видаляє текст нотатки з індексу."""
+        self.total_length -= self.lengths.pop(doc_id, 0)
+        for token in set(tokenize(text)):
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+        for gram in self._grams(text.lower()):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def candidates(self, query):
+        """
+        Повертає ID нотаток, які можуть містити query як підрядок.
+
+        Returns:
+            set або None, якщо запит коротший за триграму і індекс не допоможе
+        """
+        grams = self._grams(query.lower())
+        if not grams:
+            return None
+        # Перетинаємо, починаючи з найкоротших списків
+        postings = sorted((self.grams.get(gram, set()) for gram in grams), key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def rank(self, query, k1=1.5, b=0.75):
+        """
+        Ранжує нотатки за BM25 для слів запиту.
+
+        Returns:
+            list: ID нотаток, від найрелевантнішої
+        """
+        total = len(self.lengths)
+        if not total:
+            return []
+        avg_length = self.total_length / total or 1
+        scores = {}
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = k1 * (1 - b + b * self.lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0) + idf * tf * (k1 + 1) / (tf + norm)
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
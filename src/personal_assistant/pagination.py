@@ -0,0 +1,101 @@
+"""
+Pagination helpers for commands that list many rows.
+
+Рядки виводу генеруються ліниво, тож перша сторінка з'являється одразу,
+а пам'ять не залежить від розміру книги.
+"""
+
+from itertools import islice
+
+
+class Page:
+    """Параметри сторінки: --limit N, --offset N та курсор --after KEY."""
+
+    __slots__ = ("limit", "offset", "after")
+
+    def __init__(self, limit=None, offset=0, after=None):
+        self.limit = limit
+        self.offset = offset
+        self.after = after
+
+
+def _count(value, option, minimum=0):
+    if value is None or not (value.isascii() and value.isdigit()) or int(value) < minimum:
+        kind = "a positive" if minimum else "a non-negative"
+        raise ValueError(f"{option} must be {kind} integer.")
+    return int(value)
+
+
+def parse_page_args(args):
+    """
+    Розбирає аргументи пагінації.
+
+    Returns:
+        Page
+
+    Raises:
+        ValueError: якщо значення відсутнє або некоректне, чи аргумент невідомий
+    """
+    page = Page()
+    args = iter(args)
+    for arg in args:
+        if arg == "--limit":
+            page.limit = _count(next(args, None), "--limit", minimum=1)
+        elif arg == "--offset":
+            page.offset = _count(next(args, None), "--offset")
+        elif arg == "--after":
+            page.after = next(args, None)
+            if page.after is None:
+                raise ValueError("--after requires a value.")
+        else:
+            raise ValueError(f"Unknown option '{arg}'. Use --limit N, --offset N or --after KEY.")
+    return page
+
+
+def skip_through(keys, cursor):
+    """
+    Пропускає ключі до cursor включно.
+
+    Викликач має перевірити, що cursor серед ключів (див. stale_cursor):
+    інакше пропущено було б усе.
+    """
+    keys = iter(keys)
+    for key in keys:
+        if key == cursor:
+            break
+    return keys
+
+
+def stale_cursor(command, cursor):
+    """Помилка для курсора --after, якого вже немає (наприклад, запис видалено)."""
+    return ValueError(
+        f"'{cursor}' is no longer listed; run {command} without --after to start again."
+    )
+
+
+def page_lines(keys, page, command, render):
+    """
+    Повертає рядки сторінки, не читаючи зайвого.
+
+    Пропущені (--offset) ключі не рендеряться, тож лінивим бекендам
+    не доводиться завантажувати відповідні записи. Якщо після сторінки
+    лишились записи, останнім іде підказка з курсором для наступної сторінки.
+
+    Args:
+        keys: Ключі записів у порядку виводу
+        page: Page
+        command: Назва команди (для підказки)
+        render: Функція ключ -> рядок виводу
+
+    Yields:
+        str: рядки виводу
+    """
+    shown = 0
+    last_key = None
+    for key in islice(keys, page.offset, None):
+        if page.limit is not None and shown >= page.limit:
+            yield f"Next page: {command} --after {last_key} --limit {page.limit}"
+            return
+        yield render(key)
+        last_key = key
+        shown += 1
@@ -0,0 +1,37 @@
+"""
+Wire format shared by the assistant server and its thin client.
+
+Протокол — JSON-рядки (один об'єкт на рядок) через TCP або Unix-сокет
+(див. server.py). Модуль не залежить від asyncio, тож клієнт і розбір
+аргументів командного рядка імпортують лише його.
+"""
+
+import json
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+
+def parse_address(address):
+    """
+    Розбирає адресу сервера.
+
+    "unix:/path/to.sock" або шлях з "/" — Unix-сокет, "host:port" — TCP.
+
+    Returns:
+        tuple: ("unix", шлях) або ("tcp", (host, port))
+
+    Raises:
+        ValueError: якщо адреса некоректна
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if "/" in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Invalid server address '{address}'. Use host:port or unix:/path")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
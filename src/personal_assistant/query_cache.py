@@ -0,0 +1,121 @@
+"""
+LRU cache of read-only query results (find-note, find-by-tag, birthdays...).
+
+Результат команди зберігається за ключем (команда, нормалізовані
+аргументи) разом з поколіннями книг, які вона читає. AddressBook і NoteBook
+отримують нове покоління (_generation) при кожній зміні своїх даних, у
+тому числі через методи Record і Note та при злитті змін інших сесій, тож
+запис кешу, створений до зміни, більше не видається — кеш не треба
+очищати вручну. Обсяг кешу обмежено сумарним розміром результатів:
+при переповненні видаляються записи, які найдовше не використовувались.
+"""
+
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Обмеження сумарного розміру кешованих результатів
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _generations(needs):
+    """Функція, що повертає покоління книг, від яких залежить результат команди."""
+    if "book" in needs and "notebook" in needs:
+        return lambda book, notebook: (book._generation, notebook._generation)
+    if "book" in needs:
+        return lambda book, notebook: book._generation
+    if "notebook" in needs:
+        return lambda book, notebook: notebook._generation
+    return lambda book, notebook: None
+
+
+class QueryCache:
+    """
+    LRU-кеш результатів команд, які не змінюють даних.
+
+    Кешуються лише успішні результати-рядки: помилки (ErrorMessage,
+    винятки) і лінивий вивід щоразу обчислюються заново.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # (команда, ключ) -> (покоління, результат, розмір)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Записи, відкинуті через зміну даних, і витіснені через розмір
+        self.stale = 0
+        self.evictions = 0
+
+    def wrap(self, name, key, needs, call):
+        """
+        Обгортає виклик команди name кешем.
+
+        Args:
+            name: Назва команди
+            key: Функція args -> хешований ключ (нормалізовані аргументи)
+            needs: Залежності команди (див. cli.Command): за ними
+                визначається, покоління яких книг перевіряти
+            call: Функція (args, book, notebook) -> результат
+        """
+        generations = _generations(needs)
+
+        def cached(args, book, notebook):
+            entry_key = (name, key(args))
+            generation = generations(book, notebook)
+            entry = self.entries.get(entry_key)
+            if entry is not None:
+                if entry[0] == generation:
+                    self.entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return entry[1]
+                self._discard(entry_key)
+                self.stale += 1
+            self.misses += 1
+            result = call(args, book, notebook)
+            if type(result) is str:
+                self._store(entry_key, generation, result)
+            return result
+        return cached
+
+    def _store(self, entry_key, generation, result):
+        size = sys.getsizeof(result) + sys.getsizeof(entry_key[1])
+        if size > self.max_bytes:
+            return
+        self.entries[entry_key] = (generation, result, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._discard(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _discard(self, entry_key):
+        _, _, size = self.entries.pop(entry_key)
+        self.size -= size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    @contextmanager
+    def disabled(self):
+        """Контекст, у якому результати не кешуються (напр. для бенчмарків)."""
+        max_bytes = self.max_bytes
+        self.clear()
+        self.max_bytes = 0
+        try:
+            yield
+        finally:
+            self.max_bytes = max_bytes
+
+    def report(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (
+            f"Query cache: {len(self.entries)} entries, {self.size / 1024:.1f} KB "
+            f"of {self.max_bytes / 1024:.0f} KB; hits {self.hits}, misses {self.misses} "
+            f"({hit_rate:.1f}% hit rate), stale {self.stale}, evicted {self.evictions}"
+        )
+
+
+QUERY_CACHE = QueryCache()
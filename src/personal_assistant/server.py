@@ -0,0 +1,284 @@
+"""
+Asyncio server that shares one AddressBook/NoteBook between many clients.
+
+Протокол — JSON-рядки (один об'єкт на рядок) через TCP або Unix-сокет.
+Автентифікації немає, тож команди імпорту й експорту працюють лише з
+файлами в каталозі даних сервера (поточному каталозі при запуску).
+
+Запит:
+    {"id": 1, "command": "add", "args": ["Anna", "0501234567"]}
+
+Відповідь (довгий вивід надсилається кількома частинами з "done": false):
+    {"id": 1, "ok": true, "lines": ["Contact added."], "done": true}
+    {"id": 2, "ok": false, "error": "Contact not found.", "done": true}
+
+Команди всіх клієнтів виконуються по одній в окремому потоці даних:
+кеші книг і з'єднання SQLite не розраховані на кілька потоків. Команди,
+що змінюють дані, записуються у журнал, як у run_cli. Довга команда не
+зупиняє цикл подій, а вивід надсилається клієнту частинами вже після
+виконання, тож повільний клієнт не затримує інших.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, time
+
+from .cli import COMMANDS, execute, output_lines, replay_journal
+from .contacts.input_error import ErrorMessage
+from .protocol import DEFAULT_ADDRESS, encode, parse_address
+from .storage import Journal, get_storage
+
+# Скільки рядків виводу надсилати в одному повідомленні
+CHUNK_LINES = 256
+# Максимальна довжина рядка запиту
+MAX_REQUEST_BYTES = 1 << 20
+
+OUTSIDE_DATA_DIR = "Files must be inside the server data directory."
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# METRICS
+# -------------------------
+
+class Metrics:
+    """Кількість запитів, помилок і затримка (з очікуванням у черзі потоку даних) за командами."""
+
+    def __init__(self):
+        self.started = time()
+        self.connections = 0
+        self.total_connections = 0
+        # команда -> [запити, помилки, сумарна затримка, максимальна затримка]
+        self.commands = {}
+
+    def record(self, command, elapsed, ok):
+        stats = self.commands.setdefault(command, [0, 0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += not ok
+        stats[2] += elapsed
+        stats[3] = max(stats[3], elapsed)
+
+    def report(self):
+        requests = sum(stats[0] for stats in self.commands.values())
+        lines = [
+            f"Uptime: {time() - self.started:.0f} s, connections: {self.connections} "
+            f"active / {self.total_connections} total, requests: {requests}",
+        ]
+        if not self.commands:
+            return lines
+        lines.append(f"{'command':<20} {'requests':>8} {'errors':>7} {'avg ms':>9} {'max ms':>9}")
+        for command, (count, errors, total, longest) in sorted(
+            self.commands.items(), key=lambda item: item[1][2], reverse=True
+        ):
+            lines.append(
+                f"{command:<20} {count:>8} {errors:>7} "
+                f"{total / count * 1000:>9.3f} {longest * 1000:>9.3f}"
+            )
+        return lines
+
+
+# -------------------------
+# SERVER
+# -------------------------
+
+class AssistantServer:
+    """Обслуговує команди з cli.COMMANDS для всіх клієнтів над спільними даними."""
+
+    def __init__(self, storage=None):
+        # Файли даних і файли імпорту/експорту — відносно поточного каталогу
+        self.data_dir = os.path.realpath(os.getcwd())
+        # Усі звернення до даних — в одному потоці і по черзі: кеші книг не
+        # розраховані на кілька потоків, а з'єднання SQLite прив'язане до
+        # потоку, що його створив. Тому й окреме блокування не потрібне
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assistant-data")
+        self.executor.submit(self._open, storage).result()
+        self.metrics = Metrics()
+
+    def _open(self, storage):
+        self.storage = storage or get_storage()
+        self.book = self.storage.load_book()
+        self.notebook = self.storage.load_notebook()
+        self.journal = Journal(self.storage)
+        replay_journal(self.journal, self.book, self.notebook)
+
+    async def _run(self, function, *args):
+        """Виконує function(*args) у потоці даних, не блокуючи цикл подій."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def handle_client(self, reader, writer):
+        self.metrics.connections += 1
+        self.metrics.total_connections += 1
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # Задовгий запит або клієнт обірвав з'єднання
+                    break
+                if not raw:
+                    break
+                try:
+                    await self.handle_request(raw, writer)
+                except ConnectionError:
+                    break
+        finally:
+            self.metrics.connections -= 1
+            writer.close()
+
+    async def handle_request(self, raw, writer):
+        start = perf_counter()
+        try:
+            request = json.loads(raw)
+            request_id = request.get("id")
+            command = str(request["command"]).lower()
+            args = [str(arg) for arg in request.get("args", [])]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            writer.write(encode({"id": None, "ok": False, "error": "Invalid request.", "done": True}))
+            await writer.drain()
+            return
+
+        ok = await self.dispatch(request_id, command, args, writer)
+        self.metrics.record(command, perf_counter() - start, ok)
+
+    async def dispatch(self, request_id, command, args, writer):
+        """Виконує команду і надсилає відповідь. Повертає False, якщо сталася помилка."""
+
+        async def send(lines, done, error=None):
+            message = {"id": request_id, "ok": error is None, "done": done}
+            if error is None:
+                message["lines"] = lines
+            else:
+                message["error"] = error
+            writer.write(encode(message))
+            await writer.drain()
+
+        if command == "server-stats":
+            await send(self.metrics.report(), True)
+            return True
+
+        handler = COMMANDS.get(command)
+        if handler is None:
+            await send(None, True, "Invalid command.")
+            return False
+        if handler.file_arg is not None and not self.in_data_dir(handler.file_arg(args)):
+            await send(None, True, OUTSIDE_DATA_DIR)
+            return False
+
+        # Вивід формується повністю в потоці даних, а надсилається вже поза
+        # ним: повільний клієнт не затримує команди інших клієнтів
+        if handler.target is not None:
+            result, lines = await self._run(self._execute_write, handler, command, args)
+        else:
+            result, lines = await self._run(self._render, handler, args)
+
+        if isinstance(result, ErrorMessage):
+            await send(None, True, str(result))
+            return False
+        # Довгий вивід передаємо частинами, даючи обслужити інших клієнтів між ними
+        chunks = [lines[start:start + CHUNK_LINES] for start in range(0, len(lines), CHUNK_LINES)]
+        chunks = chunks or [[]]
+        for chunk in chunks[:-1]:
+            await send(chunk, False)
+            await asyncio.sleep(0)
+        await send(chunks[-1], True)
+        return True
+
+    def in_data_dir(self, filename):
+        """Чи лежить файл (шлях відносно каталогу даних) у каталозі даних, з урахуванням посилань."""
+        path = os.path.realpath(os.path.join(self.data_dir, filename))
+        return os.path.commonpath([self.data_dir, path]) == self.data_dir
+
+    def _render(self, handler, args):
+        """Виконує команду і повертає (результат, рядки виводу)."""
+        result = execute(handler, args, self.book, self.notebook)
+        if isinstance(result, ErrorMessage):
+            return result, []
+        return result, list(output_lines(result))
+
+    def _execute_write(self, handler, command, args):
+        if handler.checkpoint:
+            # Команда не журналюється (див. cli.Command): її зміни зберігаються одразу
+            rendered = self._render(handler, args)
+            self.report_conflicts(self.journal.compact(self.book, self.notebook, background=False))
+            return rendered
+        self.journal.append(handler.target, command, args, self.notebook)
+        rendered = self._render(handler, args)
+        self._compact_if_needed()
+        return rendered
+
+    def _compact_if_needed(self):
+        if self.journal.should_compact():
+            self.report_conflicts(self.journal.compact(self.book, self.notebook))
+
+    @staticmethod
+    def report_conflicts(messages):
+        """Конфлікти зі змінами інших процесів, що працюють з тими ж файлами, — у лог."""
+        for message in messages:
+            log.warning("Conflict: %s", message)
+
+    async def autosave(self):
+        """Зберігає зміни, що лишились після останньої команди, навіть коли клієнти мовчать."""
+        while True:
+            await asyncio.sleep(self.journal.autosave_every)
+            if self.journal.should_compact():
+                await self._run(self._compact_if_needed)
+
+    def close(self):
+        """Зберігає дані, закриває журнал і зупиняє потік даних."""
+        self.executor.submit(self._close).result()
+        self.executor.shutdown()
+
+    def _close(self):
+        self.report_conflicts(self.journal.compact(self.book, self.notebook, background=False))
+        self.journal.close()
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        """Приймає з'єднання, доки процес не отримає SIGINT або SIGTERM."""
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(
+                self.handle_client, target, limit=MAX_REQUEST_BYTES
+            )
+        else:
+            host, port = target
+            server = await asyncio.start_server(
+                self.handle_client, host, port, limit=MAX_REQUEST_BYTES
+            )
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows: зупинка через KeyboardInterrupt
+                pass
+
+        log.info("Serving on %s", address)
+        autosave = asyncio.create_task(self.autosave())
+        async with server:
+            await stop.wait()
+        autosave.cancel()
+        if kind == "unix" and os.path.exists(target):
+            os.remove(target)
+
+
+def run_server(address=DEFAULT_ADDRESS):
+    """Запускає сервер і зберігає дані після зупинки; повідомлення сервера — у stderr."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = AssistantServer()
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        log.info("Server stopped.")
+    return 0
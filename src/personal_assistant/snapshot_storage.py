@@ -0,0 +1,408 @@
+"""
+Snapshot storage with an offset index and lazy, memory-mapped loading.
+
+Формат файлу знімка:
+
+    MAGIC
+    запис 1 | запис 2 | ...            (кожен запис — codec.dumps_record)
+    футер: кадри codec — заголовок {"kind", "state", "table"}, таблиця
+           розташувань записів (ключ, зсув, довжина, версія) і, для
+           контактів, таблиця полів індексів (ім'я, телефони, дата, email)
+    зсув футера (8 байт, little-endian)
+
+Записи, футер і сегменти змін кодуються codec, як у BinaryStorage, тож
+читання знімка не виконує коду з файлу. При завантаженні читається лише
+футер, а сам файл відображається в пам'ять (mmap); Record/Note
+матеріалізуються тільки при зверненні. Індекси книги будуються при
+першому запиті, якому вони потрібні; індекси контактів — з таблиці полів
+індексів, яка розкодовується лише тоді, без читання самих записів.
+"""
+
+import io
+import mmap
+import os
+import struct
+from bisect import bisect_right
+
+from . import codec
+from .contacts.address_book import AddressBook
+from .lazy_map import LazyMap
+from .notes.note import NoteBook
+from .storage import (
+    CONTACT_LABEL,
+    LOCK_FILE,
+    NOTE_LABEL,
+    FileLock,
+    fold_segments,
+    load_binary_data,
+    load_binary_notes,
+    load_segmented,
+    prefetch_files,
+    remove_segments,
+    save_segment,
+    segments_stamp,
+    should_fold,
+    sync_file,
+)
+
+MAGIC = b"PASNAP2\n"
+TRAILER = struct.Struct("<Q")
+
+# Вид книги -> таблиця розташувань її записів у футері
+LOCATIONS = {"contacts": "contact_locations", "notes": "note_locations"}
+# Вид книги -> таблиця полів, з яких будуються її індекси
+INDEX_TABLES = {"contacts": "contact_index"}
+
+
+class _SnapshotMap(LazyMap):
+    """LazyMap поверх відображеного в пам'ять файлу знімка."""
+
+    def __init__(self, mm, kind, table, index, index_offset=None):
+        """
+        Args:
+            kind: "contacts" або "notes"
+            table: (версія, поля) таблиці kind, якою закодовано записи
+            index: Ключ -> (зсув, довжина) запису у файлі
+            index_offset: Зсув таблиці полів індексів (None — її немає)
+        """
+        super().__init__()
+        self.mm = mm
+        self.kind = kind
+        self.table = table
+        self.index = index
+        self.index_offset = index_offset
+        # Відсортовані ключі index для keys_after; будуються при першому запиті
+        self.sorted_keys = None
+
+    def _load(self, key):
+        location = self.index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return codec.loads_record(self.kind, self.mm[offset:offset + length], *self.table)
+
+    def _stored_keys(self):
+        return iter(list(self.index))
+
+    def _stored_count(self):
+        return len(self.index)
+
+    def _is_stored(self, key):
+        return key in self.index
+
+    def _stored_keys_after(self, key):
+        if self.sorted_keys is None:
+            self.sorted_keys = sorted(self.index)
+        keys = self.sorted_keys
+        return (keys[i] for i in range(bisect_right(keys, key), len(keys)))
+
+    def stored_index_rows(self):
+        """
+        Рядки таблиці полів індексів: ключ -> рядок.
+
+        Returns:
+            dict або None, якщо таблиці немає чи її записано іншою схемою
+        """
+        name = INDEX_TABLES.get(self.kind)
+        if name is None or self.index_offset is None:
+            return None
+        f = io.BytesIO(self.mm[self.index_offset:len(self.mm) - TRAILER.size])
+        for table_name, version, fields, rows in codec.iter_tables(f):
+            if table_name != name:
+                raise ValueError(codec.CORRUPTED)
+            if codec.SCHEMAS[name] != (version, fields):
+                return None
+            return {row[0]: row for row in rows}
+        return None
+
+    def index_items(self):
+        """
+        Пари (ключ, запис) для побудови індексів без читання записів.
+
+        Прочитані й нові записи беруться з кешу, решта — з таблиці полів
+        індексів; без неї записи читаються, як у LazyMap. Порядок — порядок
+        ключів, як у книги в пам'яті.
+        """
+        rows = self.stored_index_rows()
+        if rows is None:
+            return self.items()
+        return (
+            (key, self.cache[key] if key in self.cache else codec.load_contact_index(rows[key]))
+            for key in self
+        )
+
+    def raw(self, key):
+        """Закодовані байти запису без його матеріалізації."""
+        offset, length = self.index[key]
+        return self.mm[offset:offset + length]
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+
+def _kind(book):
+    return "contacts" if isinstance(book, AddressBook) else "notes"
+
+
+def _read_footer(footer):
+    """
+    Розбирає футер знімка.
+
+    Таблиця полів індексів, що йде за таблицею розташувань, тут не
+    читається — лише запам'ятовується її зсув (див. _SnapshotMap).
+
+    Returns:
+        tuple: (вид книги, стан, (версія, поля) таблиці записів,
+            ключ -> (зсув, довжина), ключ -> версія запису,
+            зсув таблиці полів індексів у футері або None)
+    """
+    f = io.BytesIO(footer)
+    header = codec.read_frame(f)
+    try:
+        kind, state, table = header["kind"], header["state"], header["table"]
+        version = table["version"]
+        fields = tuple((field, field_type) for field, field_type in table["fields"])
+    except (TypeError, KeyError, ValueError):
+        raise ValueError(codec.CORRUPTED)
+    if kind not in LOCATIONS or not isinstance(state, dict) or not isinstance(version, int):
+        raise ValueError(codec.CORRUPTED)
+
+    index, versions = {}, {}
+    name, table_version, table_fields, rows = next(codec.iter_tables(f), (None,) * 4)
+    if name != LOCATIONS[kind] or codec.SCHEMAS[name] != (table_version, table_fields):
+        raise ValueError(codec.CORRUPTED)
+    for key, offset, length, record_version in rows:
+        index[key] = (offset, length)
+        versions[key] = record_version
+    index_offset = f.tell() if kind in INDEX_TABLES else None
+    return kind, state, (version, fields), index, versions, index_offset
+
+
+def _open(filename):
+    """Відображає файл знімка в пам'ять і читає його футер (див. _read_footer)."""
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if mm[:len(MAGIC)] != MAGIC or len(mm) < len(MAGIC) + TRAILER.size:
+            raise ValueError(f"{filename} is not a snapshot file.")
+        (footer_offset,) = TRAILER.unpack(mm[-TRAILER.size:])
+        if not len(MAGIC) <= footer_offset <= len(mm) - TRAILER.size:
+            raise ValueError(codec.CORRUPTED)
+        *footer, index_offset = _read_footer(mm[footer_offset:-TRAILER.size])
+    except Exception:
+        mm.close()
+        raise
+    if index_offset is not None:
+        index_offset += footer_offset
+    return (mm, *footer, index_offset)
+
+
+def load_snapshot(filename, book_cls):
+    """
+    Відкриває знімок і повертає книгу з лінивим доступом до записів.
+
+    Returns:
+        book_cls або None, якщо файлу знімка немає
+
+    Raises:
+        ValueError: якщо файл пошкоджений або це знімок іншої книги
+    """
+    try:
+        mm, kind, state, table, index, versions, index_offset = _open(filename)
+    except FileNotFoundError:
+        return None
+    book = book_cls()
+    if kind != _kind(book):
+        mm.close()
+        raise ValueError(codec.CORRUPTED)
+    book.data = _SnapshotMap(mm, kind, table, index, index_offset)
+    book.data.on_load = book._attach
+    # Стан без індексів: __setstate__ позначає їх непобудованими (_ensure_indexes)
+    book_state = {
+        "_index_version": book._INDEX_VERSION,
+        "_versions": versions,
+        "_segment": state.get("segment", 0),
+    }
+    if state.get("journal_seqs") is not None:
+        book_state["_journal_seqs"] = dict(state["journal_seqs"])
+    if kind == "notes":
+        book_state["_next_id"] = max(
+            [state.get("next_id", 1)] + [note_id + 1 for note_id in index]
+        )
+    book.__setstate__(book_state)
+    return book
+
+
+def save_snapshot(book, filename):
+    """
+    Записує книгу у форматі знімка.
+
+    Незмінені записи копіюються з поточного знімка як байти, без
+    розкодування; кодуються лише прочитані або нові записи, а також усі
+    записи, якщо поточний знімок записано старішою схемою codec.
+    """
+    kind = _kind(book)
+    data = book.data
+    keys = list(data)
+    lazy = isinstance(data, _SnapshotMap) and data.mm is not None
+    stored_index_rows = None
+    if lazy:
+        cached, _ = data.changes()
+        if data.table != codec.SCHEMAS[kind]:
+            cached = data
+        elif kind in INDEX_TABLES:
+            stored_index_rows = data.stored_index_rows()
+    else:
+        cached = data
+    versions = book._versions
+    index_rows = [] if kind in INDEX_TABLES else None
+
+    tmp_filename = f"{filename}.tmp"
+    locations = []
+    with open(tmp_filename, "wb") as f:
+        f.write(MAGIC)
+        offset = len(MAGIC)
+        for key in keys:
+            version = versions.get(key, 0)
+            if key in cached:
+                record = cached[key]
+                payload = codec.dumps_record(kind, key, record, version)
+            else:
+                record = None
+                payload = data.raw(key)
+            if index_rows is not None:
+                if record is None and stored_index_rows is not None:
+                    index_rows.append(stored_index_rows[key])
+                else:
+                    # Знімок без таблиці полів індексів: запис розкодовується
+                    if record is None:
+                        record = codec.loads_record(kind, payload, *data.table)
+                    index_rows.extend(codec.contact_index_rows([(key, record)]))
+            f.write(payload)
+            locations.append((key, offset, len(payload), version))
+            offset += len(payload)
+
+        version, fields = codec.SCHEMAS[kind]
+        state = {
+            "journal_seqs": getattr(book, "_journal_seqs", None),
+            "segment": getattr(book, "_segment", 0),
+        }
+        if kind == "notes":
+            state["next_id"] = book._next_id
+        codec.write_frame(f, {
+            "kind": kind,
+            "state": state,
+            "table": {"version": version, "fields": [list(field) for field in fields]},
+        })
+        codec.write_table(f, LOCATIONS[kind], locations)
+        if index_rows is not None:
+            codec.write_table(f, INDEX_TABLES[kind], index_rows)
+        codec.write_frame(f, None)
+        f.write(TRAILER.pack(offset))
+        f.flush()
+        os.fsync(f.fileno())
+
+    if lazy:
+        # Старе відображення потрібно закрити до заміни файлу (Windows)
+        data.close()
+    os.replace(tmp_filename, filename)
+
+    if lazy:
+        data.mm, _, _, data.table, data.index, _, data.index_offset = _open(filename)
+        data.sorted_keys = None
+
+
+class SnapshotStorage:
+    """
+    Бекенд зберігання у файлах знімків з індексом зсувів.
+
+    Якщо знімків ще немає, дані беруться з бінарних файлів (або, якщо
+    і їх немає, з pickle-файлів) і при першому збереженні записуються у
+    форматі знімка. Як і в BinaryStorage, між повними записами змінені
+    записи дописуються сегментами codec `addressbook.snap.<номер>`, а зміни інших сесій зливаються перед записом.
+    Знімки відображаються в пам'ять, тож не стискаються (див. compression).
+    """
+
+    def __init__(self, book_file="addressbook.snap", notes_file="notes.snap",
+                 legacy_book_file="addressbook.bin", legacy_notes_file="notes.bin",
+                 lock_file=LOCK_FILE):
+        self.book_file = book_file
+        self.notes_file = notes_file
+        self.legacy_book_file = legacy_book_file
+        self.legacy_notes_file = legacy_notes_file
+        self.lock_file = lock_file
+        self._stamps = {}
+        self._prefetched = {}
+
+    def lock(self):
+        return FileLock(self.lock_file)
+
+    def load_book(self):
+        self._stamps[self.book_file] = segments_stamp(self.book_file)
+        book = self._load_book(self.book_file)
+        return book if book is not None else load_binary_data(self.legacy_book_file)
+
+    def load_notebook(self):
+        self._stamps[self.notes_file] = segments_stamp(self.notes_file)
+        notebook = self._load_notebook(self.notes_file)
+        return notebook if notebook is not None else load_binary_notes(self.legacy_notes_file)
+
+    @staticmethod
+    def _load_book(filename):
+        return load_segmented(
+            filename, lambda filename: load_snapshot(filename, AddressBook), codec.loads_segment
+        )
+
+    @staticmethod
+    def _load_notebook(filename):
+        return load_segmented(
+            filename, lambda filename: load_snapshot(filename, NoteBook), codec.loads_segment
+        )
+
+    def _save(self, book, filename, full=False):
+        """Записує сегмент змін книги або, якщо настав час (should_fold), увесь знімок."""
+        if full or should_fold(filename):
+            folded = fold_segments(book, filename)
+            save_snapshot(book, filename)
+            remove_segments(filename, folded)
+        else:
+            save_segment(book, filename, codec.dumps_segment)
+        self._stamps[filename] = segments_stamp(filename)
+
+    def save_book(self, book):
+        self._save(book, self.book_file, full=True)
+
+    def save_notebook(self, notebook):
+        self._save(notebook, self.notes_file, full=True)
+
+    def _loaders(self):
+        return [(self.book_file, self._load_book), (self.notes_file, self._load_notebook)]
+
+    def prefetch(self):
+        """Відкриває без блокування знімки, змінені іншими сесіями."""
+        self._prefetched = prefetch_files(self._loaders(), self._stamps)
+
+    def sync(self, book, notebook):
+        """Зливає зміни зі знімків, записаних іншими сесіями (див. PickleStorage.sync)."""
+        prefetched, self._prefetched = self._prefetched, {}
+        (book_file, load_book), (notes_file, load_notebook) = self._loaders()
+        return (
+            sync_file(book, book_file, self._stamps, load_book, CONTACT_LABEL, prefetched)
+            + sync_file(notebook, notes_file, self._stamps, load_notebook, NOTE_LABEL, prefetched)
+        )
+
+    def snapshot(self, book, notebook):
+        """
+        Записує зміни обох книг одразу.
+
+        Зазвичай дописується лише сегмент зі зміненими записами; при
+        повному записі незмінені записи копіюються байтами, тож він теж не
+        потребує серіалізації всієї книги. Повертається порожня функція
+        для журналу. Незавантажену книгу (None) не записує.
+        """
+        for target, filename in ((book, self.book_file), (notebook, self.notes_file)):
+            if target is not None:
+                self._save(target, filename)
+        return lambda: None
@@ -0,0 +1,815 @@
+"""
+SQLite storage engine for contacts and notes.
+
+Записи не завантажуються в пам'ять цілком: AddressBook та NoteBook
+отримують як `data` відображення поверх таблиць SQLite, яке матеріалізує
+Record/Note лише при зверненні, а пошукові запити виконує через індекси.
+"""
+
+import calendar
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+
+from .contacts.address_book import AddressBook, normalize_phone
+from .contacts.birthday_query import matches, month_days
+from .contacts.columns import ContactColumns
+from .contacts.contact import Record
+from .lazy_map import LazyMap
+from .notes.note import Note, NoteBook
+from .notes.tag_query import evaluate_tag_query, parse_tag_query
+from .notes.text_index import TextIndex, tokenize
+from .storage import (
+    CONTACT_LABEL,
+    LOCK_FILE,
+    NOTE_LABEL,
+    FileLock,
+    commit_versions,
+    conflict_message,
+    journal_seqs,
+    load_binary_data,
+    load_binary_notes,
+    merge_journal_seqs,
+    renumbered_message,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    name_key TEXT,
+    email TEXT,
+    address TEXT,
+    birthday TEXT,
+    birthday_md TEXT,
+    birthday_ord INTEGER,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS contacts_name_key ON contacts (name_key);
+CREATE INDEX IF NOT EXISTS contacts_birthday_md ON contacts (birthday_md);
+CREATE INDEX IF NOT EXISTS contacts_birthday_ord ON contacts (birthday_ord);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email);
+
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL REFERENCES contacts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL,
+    PRIMARY KEY (contact_id, position)
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    date_added TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (note_id, tag)
+);
+CREATE INDEX IF NOT EXISTS note_tags_tag ON note_tags (tag);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Ключ meta з наступним вільним ID нотатки
+NEXT_NOTE_ID = "notes_next_id"
+
+# Повнотекстовий пошук нотаток (FTS5): notes_fts — за словами (ранжування
+# bm25 для find-note --ranked), notes_trigram — за триграмами (кандидати для
+# пошуку підрядка). Обидві таблиці беруть текст з notes (external content),
+# а тригери оновлюють їх разом з notes.
+NOTE_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (
+    content, content='notes', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_trigram USING fts5 (
+    content, content='notes', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS notes_search_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, content) VALUES (new.id, new.content);
+    INSERT INTO notes_trigram (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_search_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO notes_trigram (notes_trigram, rowid, content)
+        VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_search_update AFTER UPDATE OF content ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO notes_trigram (notes_trigram, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    INSERT INTO notes_fts (rowid, content) VALUES (new.id, new.content);
+    INSERT INTO notes_trigram (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Запис нотатки: UPDATE замість REPLACE, бо REPLACE видаляє рядок без
+# тригерів DELETE і лишив би старий текст в індексах FTS
+NOTE_UPSERT = (
+    "INSERT INTO notes (id, content, date_added, version) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET content = excluded.content, "
+    "date_added = excluded.date_added, version = excluded.version"
+)
+
+
+def connect(filename):
+    """Відкриває базу даних і створює схему, якщо її ще немає."""
+    conn = sqlite3.connect(filename)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    _add_name_key(conn)
+    _add_versions(conn)
+    _add_birthday_ord(conn)
+    conn.executescript(SCHEMA)
+    _add_note_search(conn)
+    return conn
+
+
+def _add_note_search(conn):
+    """
+    Створює таблиці FTS5 для пошуку нотаток і заповнює їх для наявних нотаток.
+
+    Якщо SQLite зібрано без FTS5 (чи без токенізатора trigram), таблиці не
+    створюються, і SQLiteNoteBook шукає перебором тексту нотаток.
+    """
+    if has_note_search(conn):
+        return
+    try:
+        with conn:
+            conn.executescript(NOTE_SEARCH_SCHEMA)
+            conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO notes_trigram (notes_trigram) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        pass
+
+
+def has_note_search(conn):
+    """Чи є в базі таблиці FTS5 для пошуку нотаток."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'notes_trigram'"
+    ).fetchone() is not None
+
+
+def _add_name_key(conn):
+    """Додає колонку name_key (ім'я в нижньому регістрі) до баз старого формату."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(contacts)")]
+    if not columns or "name_key" in columns:
+        return
+    # SQLite lower() змінює лише ASCII, тому ключ обчислює Python
+    conn.create_function("py_lower", 1, str.lower, deterministic=True)
+    with conn:
+        conn.execute("ALTER TABLE contacts ADD COLUMN name_key TEXT")
+        conn.execute("UPDATE contacts SET name_key = py_lower(name)")
+
+
+def _add_versions(conn):
+    """Додає колонку version (див. storage.merge_saved) до баз старого формату."""
+    for table in ("contacts", "notes"):
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if columns and "version" not in columns:
+            with conn:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_birthday_ord(conn):
+    """Додає колонку birthday_ord (date.toordinal дати народження) до баз старого формату."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(contacts)")]
+    if not columns or "birthday_ord" in columns:
+        return
+    conn.create_function("py_birthday_ord", 1, _parse_birthday_ord, deterministic=True)
+    with conn:
+        conn.execute("ALTER TABLE contacts ADD COLUMN birthday_ord INTEGER")
+        conn.execute(
+            "UPDATE contacts SET birthday_ord = py_birthday_ord(birthday) WHERE birthday IS NOT NULL"
+        )
+
+
+def _parse_birthday_ord(value):
+    """ДД.ММ.РРРР (як зберігає Birthday.value) -> порядковий номер дати."""
+    day, month, year = map(int, value.split("."))
+    return date(year, month, day).toordinal()
+
+
+def _birthday_md(record):
+    """Ключ MM-DD для індексу днів народження."""
+    if not record.birthday:
+        return None
+    return record.birthday.date.strftime("%m-%d")
+
+
+# -------------------------
+# LAZY MAPPINGS OVER TABLES
+# -------------------------
+
+
+class _SQLiteMap(LazyMap):
+    """LazyMap поверх таблиці SQLite."""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+        # Ключ -> версія прочитаного запису в базі
+        self.versions = {}
+
+
+class _ContactMap(_SQLiteMap):
+    def _load(self, name):
+        row = self.conn.execute(
+            "SELECT id, email, address, birthday, version FROM contacts WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        contact_id, email, address, birthday, version = row
+        self.versions[name] = version
+        record = Record(name)
+        for (phone,) in self.conn.execute(
+                "SELECT phone FROM phones WHERE contact_id = ? ORDER BY position", (contact_id,)):
+            record.add_phone(phone)
+        if birthday:
+            record.add_birthday(birthday)
+        if email:
+            record.add_email(email)
+        if address:
+            record.add_address(address)
+        return record
+
+    def _stored_keys(self):
+        return (name for (name,) in self.conn.execute("SELECT name FROM contacts ORDER BY id"))
+
+    def _stored_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def _is_stored(self, name):
+        return self.conn.execute(
+            "SELECT 1 FROM contacts WHERE name = ?", (name,)
+        ).fetchone() is not None
+
+
+class _NoteMap(_SQLiteMap):
+    def _load(self, note_id):
+        row = self.conn.execute(
+            "SELECT content, date_added, version FROM notes WHERE id = ?", (note_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        content, date_added, version = row
+        self.versions[note_id] = version
+        tags = [tag for (tag,) in self.conn.execute(
+            "SELECT tag FROM note_tags WHERE note_id = ?", (note_id,))]
+        note = Note(content, tags)
+        note.date_added = date_added
+        return note
+
+    def _stored_keys(self):
+        return (note_id for (note_id,) in self.conn.execute("SELECT id FROM notes ORDER BY id"))
+
+    def _stored_keys_after(self, note_id):
+        return (key for (key,) in self.conn.execute(
+            "SELECT id FROM notes WHERE id > ? ORDER BY id", (note_id,)))
+
+    def _stored_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def _is_stored(self, note_id):
+        return self.conn.execute(
+            "SELECT 1 FROM notes WHERE id = ?", (note_id,)
+        ).fetchone() is not None
+
+
+# -------------------------
+# BOOKS WITH PUSHED-DOWN QUERIES
+# -------------------------
+
+
+class SQLiteAddressBook(AddressBook):
+    """AddressBook, записи якої зберігаються в SQLite і читаються за потребою."""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.data = _ContactMap(conn)
+        self.data.on_load = self._attach
+        self._versions = self.data.versions
+
+    # Індекси в пам'яті не ведуться: пошук виконується запитами до бази,
+    # тож зміни запису лише позначають його для запису (і для лінивого
+    # індексу триграм імен, спільного з AddressBook — див. _fuzzy_index)
+    def _index_record(self, name, record, bulk=False):
+        pass
+
+    def _unindex_record(self, name, record):
+        pass
+
+    def _birthday_changed(self, record, old_birthday):
+        self._mark_changed(record.name.value)
+
+    def _phone_added(self, record, phone):
+        self._mark_changed(record.name.value)
+
+    def _phone_removed(self, record, phone):
+        self._mark_changed(record.name.value)
+
+    def _email_changed(self, record, old_email):
+        self._mark_changed(record.name.value)
+
+    def complete_names(self, prefix, limit=10):
+        """Імена з префіксом через індекс contacts_name_key."""
+        key = prefix.lower()
+        names = dict.fromkeys(
+            name for name in self.data.cache if name.lower().startswith(key)
+        )
+        rows = self.data.conn.execute(
+            "SELECT name FROM contacts WHERE name_key >= ? AND name_key < ? "
+            "ORDER BY length(name_key), name_key LIMIT ?",
+            (key, key + "\U0010ffff", limit + len(self.data.deleted)),
+        )
+        for (name,) in rows:
+            if name not in self.data.deleted:
+                names.setdefault(name)
+        return list(names)[:limit]
+
+    def _merge_cached(self, names, matches):
+        """Додає до імен з бази записи з кешу, для яких matches(record) істинне."""
+        names = [
+            name for name in names
+            if name not in self.data.cache and name not in self.data.deleted
+        ]
+        names.extend(name for name, record in self.data.cache.items() if matches(record))
+        return names
+
+    def _names_by_phone(self, phone):
+        """Власники номера через індекс phones_phone."""
+        names = dict.fromkeys(name for (name,) in self.data.conn.execute(
+            "SELECT c.name FROM phones p JOIN contacts c ON c.id = p.contact_id "
+            "WHERE p.phone = ? ORDER BY c.id", (phone,)))
+        return self._merge_cached(
+            names, lambda record: any(normalize_phone(p.value) == phone for p in record.phones))
+
+    def _names_by_email(self, email):
+        """Власники email через індекс contacts_email."""
+        names = [name for (name,) in self.data.conn.execute(
+            "SELECT name FROM contacts WHERE email = ? ORDER BY id", (email,))]
+        return self._merge_cached(
+            names, lambda record: record.email is not None and record.email.value == email)
+
+    def _birthdays_on(self, day):
+        """Імена з днем народження на day: з бази через індекс birthday_md та з кешу."""
+        keys = [(day.month, day.day)]
+        if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+            keys.append((2, 29))
+        md_keys = [f"{month:02d}-{d:02d}" for month, d in keys]
+
+        placeholders = ", ".join("?" * len(md_keys))
+        names = [name for (name,) in self.data.conn.execute(
+            f"SELECT name FROM contacts WHERE birthday_md IN ({placeholders}) ORDER BY id",
+            md_keys)]
+        return self._merge_cached(
+            names,
+            lambda record: bool(record.birthday)
+            and (record.birthday.date.month, record.birthday.date.day) in keys,
+        )
+
+    def _build_columns(self):
+        """Стовпці аналітики з таблиць contacts і phones, без матеріалізації Record."""
+        phones = {}
+        for contact_id, phone in self.data.conn.execute(
+                "SELECT contact_id, phone FROM phones ORDER BY contact_id, position"):
+            phones.setdefault(contact_id, []).append(int(phone))
+        columns = ContactColumns()
+        for contact_id, name, ordinal, email in self.data.conn.execute(
+                "SELECT id, name, birthday_ord, email FROM contacts ORDER BY id"):
+            if name not in self.data.cache and name not in self.data.deleted:
+                columns.set_row(name, ordinal, email, phones.get(contact_id, ()))
+        for name, record in self.data.cache.items():
+            columns.set_record(name, record)
+        return columns
+
+    def _birthday_matches(self, query):
+        """Дати народження з бази через індекси birthday_ord / birthday_md та з кешу."""
+        first, last, months, days = query
+        clauses, params = ["birthday_ord IS NOT NULL"], []
+        if first is not None:
+            clauses.append("birthday_ord >= ?")
+            params.append(first)
+        if last is not None:
+            clauses.append("birthday_ord <= ?")
+            params.append(last)
+        if months is not None or days is not None:
+            md_keys = [f"{month:02d}-{day:02d}" for month, day in month_days(months, days)]
+            clauses.append(f"birthday_md IN ({', '.join('?' * len(md_keys))})")
+            params += md_keys
+        rows = self.data.conn.execute(
+            f"SELECT birthday_ord, name FROM contacts WHERE {' AND '.join(clauses)}", params
+        )
+        found = [
+            (ordinal, name) for ordinal, name in rows
+            if name not in self.data.cache and name not in self.data.deleted
+        ]
+        found.extend(
+            (record.birthday._raw, name)
+            for name, record in self.data.cache.items()
+            if record.birthday and matches(query, record.birthday._raw)
+        )
+        return found
+
+
+class SQLiteNoteBook(NoteBook):
+    """NoteBook, нотатки якої зберігаються в SQLite і читаються за потребою."""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.data = _NoteMap(conn)
+        self.data.on_load = self._attach
+        self._versions = self.data.versions
+        self._fts = has_note_search(conn)
+
+    # Індекси в пам'яті не ведуться: пошук виконується запитами до бази
+    def _index_note(self, note_id, note):
+        pass
+
+    def _unindex_note(self, note_id, note):
+        pass
+
+    def _tag_added(self, note_id, note, tag):
+        self._mark_changed(note_id)
+
+    def find_note(self, query, ranked=False):
+        """
+        Шукає нотатки через таблиці FTS5 (див. NOTE_SEARCH_SCHEMA).
+
+        З ranked слова запиту шукаються в notes_fts і впорядковуються за
+        bm25; інакше notes_trigram дає кандидатів, які містять усі триграми
+        запиту, а підрядок перевіряється лише в їхньому тексті. Запити,
+        коротші за триграму, перебирають текст нотаток, як і NoteBook.
+        """
+        if not self._fts:
+            return self._scan_notes(query, ranked)
+        with self._pending_applied():
+            if ranked:
+                ids = self._ranked_ids(query)
+            else:
+                ids = self._substring_ids(query)
+        return {note_id: self.data[note_id] for note_id in ids}
+
+    def _ranked_ids(self, query):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        # Кожне слово — окрема фраза в лапках, щоб текст запиту не розбирався як синтаксис FTS5
+        match = " OR ".join('"{}"'.format(token.replace('"', '""')) for token in sorted(tokens))
+        return [note_id for (note_id,) in self.data.conn.execute(
+            "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts), rowid",
+            (match,))]
+
+    def _substring_ids(self, query):
+        query = query.lower()
+        if len(query) < TextIndex.NGRAM:
+            rows = self.data.conn.execute("SELECT id, content FROM notes ORDER BY id")
+        else:
+            rows = self.data.conn.execute(
+                "SELECT rowid, content FROM notes_trigram WHERE notes_trigram MATCH ? ORDER BY rowid",
+                ('"{}"'.format(query.replace('"', '""')),))
+        # Складання регістру FTS5 і str.lower відрізняються, тож підрядок перевіряється тут
+        return [note_id for note_id, content in rows if query in content.lower()]
+
+    @contextmanager
+    def _pending_applied(self):
+        """
+        Тимчасово записує незбережені зміни нотаток у базу, щоб пошук FTS їх бачив.
+
+        Зміни пишуться всередині SAVEPOINT, який після пошуку відкочується:
+        у базі лишається лише те, що збережено (snapshot).
+        """
+        if not self._changed:
+            yield
+            return
+        conn = self.data.conn
+        conn.execute("SAVEPOINT note_search")
+        try:
+            for note_id in self._changed:
+                note = self.data.cache.get(note_id)
+                if note is None:
+                    conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                else:
+                    conn.execute(NOTE_UPSERT, (
+                        note_id, note.content, note.date_added, self._versions.get(note_id, 0)))
+            yield
+        finally:
+            conn.execute("ROLLBACK TO note_search")
+            conn.execute("RELEASE note_search")
+
+    def _scan_notes(self, query, ranked):
+        """Пошук без FTS5: перебирає лише текст нотаток, не матеріалізуючи зайві Note."""
+        contents = {
+            note_id: content
+            for note_id, content in self.data.conn.execute("SELECT id, content FROM notes ORDER BY id")
+            if note_id not in self.data.cache and note_id not in self.data.deleted
+        }
+        contents.update((note_id, note.content) for note_id, note in self.data.cache.items())
+
+        if ranked:
+            # Тимчасовий індекс лише для ранжування цього запиту
+            index = TextIndex()
+            for note_id, content in contents.items():
+                index.add(note_id, content)
+            return {note_id: self.data[note_id] for note_id in index.rank(query)}
+
+        query = query.lower()
+        return {
+            note_id: self.data[note_id]
+            for note_id in sorted(contents)
+            if query in contents[note_id].lower()
+        }
+
+    def _tag_ids(self, tag):
+        """ID нотаток з тегом: з бази через індекс note_tags_tag та з кешу."""
+        ids = {
+            note_id
+            for (note_id,) in self.data.conn.execute(
+                "SELECT note_id FROM note_tags WHERE tag = ?", (tag,))
+            if note_id not in self.data.cache and note_id not in self.data.deleted
+        }
+        ids.update(note_id for note_id, note in self.data.cache.items() if tag in note.tags)
+        return ids
+
+    def find_by_tag(self, tag_query):
+        """Обчислює булевий запит за тегами через індекс note_tags_tag."""
+        groups = parse_tag_query(tag_query)
+        ids = evaluate_tag_query(groups, self._tag_ids, lambda: set(self.data))
+        return {note_id: self.data[note_id] for note_id in sorted(ids)}
+
+    def sort_notes_by_tag(self):
+        """Сортує всі нотатки (порядок у пам'яті для SQLite не ведеться)."""
+        return sorted(self.data.items(), key=lambda item: self._tag_sort_key(*item))
+
+
+# -------------------------
+# STORAGE BACKEND
+# -------------------------
+
+
+class SQLiteStorage:
+    """
+    Бекенд зберігання у файлі SQLite.
+
+    При першому запуску переносить дані з бінарних або pickle-файлів, якщо вони є.
+    Записуються лише змінені записи, і лише якщо їх версія в базі не
+    змінилась після читання (оптимістичне блокування, див. sync).
+    """
+
+    def __init__(self, filename="assistant.db", book_file="addressbook.bin",
+                 notes_file="notes.bin", lock_file=LOCK_FILE):
+        self.filename = filename
+        self.book_file = book_file
+        self.notes_file = notes_file
+        self.lock_file = lock_file
+        self.conn = connect(filename)
+        self._data_version = self._current_data_version()
+
+    def lock(self):
+        return FileLock(self.lock_file)
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _current_data_version(self):
+        """Змінюється, коли інше з'єднання записує у базу."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _journal_seqs(self, target):
+        """
+        Номери записів журналу за сесіями з meta (ключі <target>_journal_seq:<сесія>).
+
+        Ключ без сесії лишився від журналу старого формату (сесія "").
+        """
+        prefix = f"{target}_journal_seq"
+        rows = self.conn.execute(
+            "SELECT key, value FROM meta WHERE key = ? OR key LIKE ?", (prefix, prefix + ":%")
+        )
+        return {key.partition(":")[2]: value for key, value in rows}
+
+    def _write_journal_seqs(self, target, seqs):
+        prefix = f"{target}_journal_seq"
+        self.conn.execute("DELETE FROM meta WHERE key = ? OR key LIKE ?", (prefix, prefix + ":%"))
+        self.conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            ((f"{prefix}:{session}" if session else prefix, seq) for session, seq in seqs.items()),
+        )
+
+    def _migrate(self, key, load, write):
+        """Одноразово переносить дані з файлу попереднього бекенду у базу."""
+        if self._meta(key) is not None:
+            return
+        data = load()
+        with self.conn:
+            write(self.conn, data)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, 1)", (key,))
+
+    def load_book(self):
+        self._migrate("contacts_migrated", lambda: load_binary_data(self.book_file),
+                      lambda conn, book: _write_contacts(conn, book.data, versions=book._versions))
+        book = SQLiteAddressBook(self.conn)
+        book._journal_seqs = self._journal_seqs("book")
+        return book
+
+    def load_notebook(self):
+        self._migrate("notes_migrated", lambda: load_binary_notes(self.notes_file),
+                      lambda conn, notebook: _write_notes(conn, notebook.data,
+                                                          versions=notebook._versions,
+                                                          next_id=notebook._next_id))
+        notebook = SQLiteNoteBook(self.conn)
+        notebook._next_id = self._next_note_id()
+        notebook._journal_seqs = self._journal_seqs("notebook")
+        return notebook
+
+    def _next_note_id(self):
+        """
+        Наступний вільний ID нотатки.
+
+        Лічильник зберігається в meta (NEXT_NOTE_ID), тож ID видаленої
+        останньої нотатки не видається повторно; MAX(id) — для баз, створених
+        до появи лічильника.
+        """
+        max_id = self.conn.execute("SELECT MAX(id) FROM notes").fetchone()[0] or 0
+        return max(self._meta(NEXT_NOTE_ID) or 1, max_id + 1)
+
+    def prefetch(self):
+        """Нічого не читає наперед: версії перевіряються запитами під блокуванням."""
+
+    def sync(self, book, notebook):
+        """
+        Перевіряє версії змінених записів у базі і підвищує їх.
+
+        Викликається під блокуванням lock() перед snapshot(), тож між
+        перевіркою і записом інші сесії базу не змінюють. Зміни записів,
+        які інша сесія змінила чи видалила після нашого читання, відкидаються;
+        незмінені записи з кешу перечитуються, якщо база змінилась.
+
+        Книгу, яку сесія не завантажила (None), пропускає.
+
+        Returns:
+            list: повідомлення про конфлікти
+        """
+        messages = []
+        if book is not None:
+            messages += _check_versions(
+                self.conn, book, "SELECT version FROM contacts WHERE name = ?", CONTACT_LABEL)
+        if notebook is not None:
+            detached = notebook._detach_new(self._next_note_id())
+            messages += _check_versions(
+                self.conn, notebook, "SELECT version FROM notes WHERE id = ?", NOTE_LABEL)
+            messages += [
+                renumbered_message(NOTE_LABEL, old_id, new_id)
+                for old_id, new_id in notebook._attach_new(detached)
+            ]
+
+        data_version = self._current_data_version()
+        for target, name in ((book, "book"), (notebook, "notebook")):
+            if target is None:
+                continue
+            if data_version != self._data_version:
+                # Запити до бази тепер можуть повернути інші результати
+                target._touch()
+                if target is book:
+                    # Невідомо, які контакти змінила інша сесія: індекс триграм
+                    # і стовпці будуються заново
+                    book._reset_lazy_indexes()
+                for key in list(target.data.cache):
+                    if key not in target._changed:
+                        _forget(target, key)
+            merge_journal_seqs(target, self._journal_seqs(name))
+            commit_versions(target)
+        self._data_version = data_version
+        return messages
+
+    def snapshot(self, book, notebook):
+        """
+        Записує зміни обох книг в одній транзакції.
+
+        Записуються лише змінені записи, тож запис дешевий і виконується
+        одразу; повертається порожня функція для журналу.
+        """
+        with self.conn:
+            if book is not None:
+                _write_contacts(self.conn, book.data, book._changed, book._versions)
+                self._write_journal_seqs("book", journal_seqs(book))
+            if notebook is not None:
+                _write_notes(self.conn, notebook.data, notebook._changed, notebook._versions,
+                             notebook._next_id)
+                self._write_journal_seqs("notebook", journal_seqs(notebook))
+        return lambda: None
+
+    def save_book(self, book):
+        with self.conn:
+            _write_contacts(self.conn, book.data, book._changed, book._versions)
+
+    def save_notebook(self, notebook):
+        with self.conn:
+            _write_notes(self.conn, notebook.data, notebook._changed, notebook._versions,
+                         notebook._next_id)
+
+
+def _forget(book, key):
+    """Відкидає кешований запис книги і його версію; його буде перечитано з бази."""
+    book._touch()
+    if isinstance(book, AddressBook):
+        book._lazy_indexes_changed(key)
+    value = book.data.forget(key)
+    if value is not None:
+        value._owner = None
+    book._versions.pop(key, None)
+    book._changed.discard(key)
+
+
+def _check_versions(conn, book, query, label):
+    """
+    Відкидає зміни записів, які інша сесія змінила в базі після їх читання.
+
+    Returns:
+        list: повідомлення про конфлікти
+    """
+    messages = []
+    for key in list(book._changed):
+        row = conn.execute(query, (key,)).fetchone()
+        version = row[0] if row else None
+        if version == book._versions.get(key):
+            continue
+        if key in book._versions or key in book.data.cache:
+            messages.append(conflict_message(label, key, "changed" if row else "deleted"))
+        _forget(book, key)
+    return messages
+
+
+def _changes(data, keys):
+    """
+    Записи для запису та видалені ключі.
+
+    Для SQLite — лише змінені ключі, для dict (перенесення з pickle) — усі записи.
+    """
+    if not isinstance(data, _SQLiteMap):
+        return data, set()
+    data.changes()
+    # У порядку кешу, тобто додавання, а не в порядку множини keys
+    records = {key: value for key, value in data.cache.items() if key in keys}
+    return records, set(keys) - records.keys()
+
+
+def _write_contacts(conn, data, keys=(), versions=None):
+    versions = versions or {}
+    records, deleted = _changes(data, keys)
+    conn.executemany("DELETE FROM contacts WHERE name = ?", ((name,) for name in deleted))
+    for name, record in records.items():
+        conn.execute(
+            "INSERT INTO contacts "
+            "(name, name_key, email, address, birthday, birthday_md, birthday_ord, version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET email = excluded.email, "
+            "address = excluded.address, birthday = excluded.birthday, "
+            "birthday_md = excluded.birthday_md, birthday_ord = excluded.birthday_ord, "
+            "version = excluded.version",
+            (
+                name,
+                name.lower(),
+                record.email.value if record.email else None,
+                record.address.value if record.address else None,
+                record.birthday.value if record.birthday else None,
+                _birthday_md(record),
+                record.birthday._raw if record.birthday else None,
+                versions.get(name, 0),
+            ),
+        )
+        (contact_id,) = conn.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()
+        conn.execute("DELETE FROM phones WHERE contact_id = ?", (contact_id,))
+        conn.executemany(
+            "INSERT INTO phones (contact_id, position, phone) VALUES (?, ?, ?)",
+            ((contact_id, i, p.value) for i, p in enumerate(record.phones)),
+        )
+
+
+def _write_notes(conn, data, keys=(), versions=None, next_id=None):
+    versions = versions or {}
+    if next_id is not None:
+        # Лічильник лише зростає: інша сесія могла вже видати більші ID
+        conn.execute(
+            "INSERT INTO meta VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (NEXT_NOTE_ID, next_id),
+        )
+    notes, deleted = _changes(data, keys)
+    conn.executemany("DELETE FROM notes WHERE id = ?", ((note_id,) for note_id in deleted))
+    for note_id, note in notes.items():
+        conn.execute(NOTE_UPSERT, (note_id, note.content, note.date_added, versions.get(note_id, 0)))
+        conn.execute("DELETE FROM note_tags WHERE note_id = ?", (note_id,))
+        conn.executemany(
+            "INSERT INTO note_tags (note_id, tag) VALUES (?, ?)",
+            ((note_id, tag) for tag in note.tags),
+        )
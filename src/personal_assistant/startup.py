@@ -0,0 +1,65 @@
+"""
+Startup profiling for the console entry point (--profile-startup).
+
+Показує, скільки часу від запуску забирають імпорти модулів, завантаження
+кожного файлу даних і скільки минає до першого запрошення (або першої
+команди пакетного режиму). Модуль навмисно нічого не імпортує, окрім time
+і sys, тож його можна завантажувати першим.
+"""
+
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+
+# Момент імпорту модуля — відлік для "time to first prompt"
+STARTED = perf_counter()
+
+
+class StartupProfile:
+    """
+    Збирає тривалість етапів запуску; вимкнений профіль нічого не робить.
+
+    Етапи друкуються у stderr одразу після завершення, бо дані
+    завантажуються ліниво — часто вже після першого запрошення.
+    """
+
+    def __init__(self, stream=None):
+        self.enabled = False
+        self.stream = stream
+        # [(етап, мс), ...]
+        self.sections = []
+        self._depth = 0
+        self._first_prompt = None
+
+    def enable(self, stream=None):
+        self.enabled = True
+        self.stream = stream or self.stream or sys.stderr
+
+    @contextmanager
+    def measure(self, label):
+        """Вимірює етап; вкладені етапи друкуються з відступом."""
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            elapsed = (perf_counter() - start) * 1000
+            self.sections.append((label, elapsed))
+            self._print(f"{'  ' * self._depth}{label}: {elapsed:.1f} ms")
+
+    def first_prompt(self, label="first prompt"):
+        """Відмічає момент першого запрошення (лише перший виклик)."""
+        if not self.enabled or self._first_prompt is not None:
+            return
+        self._first_prompt = (perf_counter() - STARTED) * 1000
+        self._print(f"time to {label}: {self._first_prompt:.1f} ms")
+
+    def _print(self, line):
+        print(f"[startup] {line}", file=self.stream, flush=True)
+
+
+PROFILE = StartupProfile()
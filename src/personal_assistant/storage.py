@@ -2,49 +2,1104 @@
 Storage module for saving and loading contacts and notes.
 """
 
+import glob
+import json
+import os
 import pickle
+import threading
+import time
 
-from .contacts.address_book import AddressBook
-from .notes.note import NoteBook
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокування через msvcrt
+    fcntl = None
+    import msvcrt
+
+from .compression import NO_COMPRESSION, get_compression, open_reader, writer
+from .instrumentation import INSTRUMENTATION
+
+# Моделі та codec імпортуються під час першого читання чи запису даних, а
+# не разом з модулем: cli відкриває сховище ще до першої команди
 
 # -------------------------
 # SAVE/LOAD DATA TO/FROM FILE
 # -------------------------
 
 
-def save_data(book, filename="addressbook.pkl"):
-    """Зберігає AddressBook у файл."""
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+def _dump_atomic(filename, dump, compression=NO_COMPRESSION):
+    """
+    Записує файл функцією dump(f) у тимчасовий файл і атомарно підміняє ним цільовий.
 
+    Args:
+        compression: Назва кодека стиснення (див. compression.CODECS)
+    """
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "wb") as f:
+        with writer(f, compression) as out:
+            dump(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
 
-def load_data(filename="addressbook.pkl"):
-    """Завантажує AddressBook з файлу або створює нову."""
+
+def _write_atomic(filename, payload, compression=NO_COMPRESSION):
+    """Записує байти у тимчасовий файл і атомарно підміняє ним цільовий."""
+    _dump_atomic(filename, lambda f: f.write(payload), compression)
+
+
+def _load_pickle(filename):
     try:
         with open(filename, "rb") as f:
-            return pickle.load(f)
+            return pickle.load(open_reader(f))
     except FileNotFoundError:
-        return AddressBook()
+        return None
+
 
+def save_data(book, filename="addressbook.pkl", compression=None):
+    """
+    Зберігає AddressBook у файл повністю (разом з усіма сегментами змін).
 
-def save_notes(notebook, filename="notes.pkl"):
-    """Зберігає NoteBook у файл."""
-    with open(filename, "wb") as f:
-        pickle.dump(notebook, f)
+    Args:
+        compression: Назва кодека стиснення; за замовчуванням — зі змінної
+            оточення PERSONAL_ASSISTANT_COMPRESSION (див. get_compression).
+            При завантаженні стиснення визначається автоматично.
+    """
+    compression = get_compression(compression)
+    folded = fold_segments(book, filename)
+    _dump_atomic(filename, lambda f: pickle.dump(book, f), compression)
+    remove_segments(filename, folded)
+
+
+def load_data(filename="addressbook.pkl"):
+    """Завантажує AddressBook з файлу та його сегментів змін або створює нову."""
+    from .contacts.address_book import AddressBook
+
+    book = load_segmented(filename, _load_pickle)
+    return book if book is not None else AddressBook()
+
+
+def save_notes(notebook, filename="notes.pkl", compression=None):
+    """Зберігає NoteBook у файл повністю (стиснення — як у save_data)."""
+    compression = get_compression(compression)
+    folded = fold_segments(notebook, filename)
+    _dump_atomic(filename, lambda f: pickle.dump(notebook, f), compression)
+    remove_segments(filename, folded)
 
 
 def load_notes(filename="notes.pkl"):
-    """Завантажує NoteBook з файлу або створює нову."""
+    """Завантажує NoteBook з файлу та його сегментів змін або створює нову."""
+    from .notes.note import NoteBook
+
+    notebook = load_segmented(filename, _load_pickle)
+    if notebook is None:
+        return NoteBook()
+
+    # _next_id не менший за максимальний ID + 1 (старі файли могли його не мати);
+    # збережене значення не зменшуємо, щоб ID видалених нотаток не повторювались
+    if notebook.data:
+        max_id = max(notebook.data.keys())
+        notebook._next_id = max(getattr(notebook, "_next_id", 1), max_id + 1)
+
+    return notebook
+
+
+# -------------------------
+# BINARY FORMAT (див. codec)
+# -------------------------
+
+
+def _load_binary(filename):
+    from . import codec
+
     try:
         with open(filename, "rb") as f:
-            notebook = pickle.load(f)
+            return codec.load(open_reader(f))
+    except FileNotFoundError:
+        return None
+
+
+def load_binary_segmented(filename):
+    """Завантажує книгу з бінарного файлу та його сегментів змін (None, якщо файлу немає)."""
+    from . import codec
 
-            # Відновлюємо _next_id до максимального значення + 1
-            # Це гарантує, що нові нотатки отримають унікальні ID
-            if notebook.data:
-                max_id = max(notebook.data.keys())
-                notebook._next_id = max_id + 1
+    return load_segmented(filename, _load_binary, codec.loads_segment)
 
-            return notebook
+
+def save_binary(book, filename, compression=None):
+    """
+    Зберігає AddressBook або NoteBook у бінарному форматі повністю.
+
+    Книга кодується (і стискається, див. save_data) у файл потоково,
+    блок за блоком, без проміжної копії всього файлу в пам'яті.
+    """
+    from . import codec
+
+    compression = get_compression(compression)
+    folded = fold_segments(book, filename)
+    _dump_atomic(filename, lambda f: codec.dump(book, f), compression)
+    remove_segments(filename, folded)
+
+
+def load_binary_data(filename="addressbook.bin", legacy_filename="addressbook.pkl"):
+    """
+    Завантажує AddressBook з бінарного файлу.
+
+    Якщо його ще немає, контакти беруться з pickle-файлу legacy_filename
+    і при наступному збереженні записуються в новому форматі.
+    """
+    book = load_binary_segmented(filename)
+    return book if book is not None else load_data(legacy_filename)
+
+
+def load_binary_notes(filename="notes.bin", legacy_filename="notes.pkl"):
+    """Завантажує NoteBook з бінарного файлу або pickle-файлу legacy_filename."""
+    notebook = load_binary_segmented(filename)
+    return notebook if notebook is not None else load_notes(legacy_filename)
+
+
+# -------------------------
+# CONCURRENT SESSIONS
+# -------------------------
+
+# Файл міжпроцесного блокування даних (спільний для всіх бекендів)
+LOCK_FILE = "assistant.lock"
+
+CONTACT_LABEL = "Contact '{}'"
+NOTE_LABEL = "Note {}"
+
+
+class FileLock:
+    """
+    Міжпроцесне блокування через файл: flock у POSIX, msvcrt.locking у Windows.
+
+    Дані блокуються лише на час злиття і запису знімка (див. Journal.compact),
+    а не на всю інтерактивну сесію.
+    """
+
+    def __init__(self, filename=LOCK_FILE):
+        self.filename = filename
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """
+        Захоплює блокування.
+
+        Returns:
+            bool: False, якщо blocking=False і блокування утримує інший процес
+        """
+        f = open(self.filename, "a+b")
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(f.fileno(), flags)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.05)
+        except OSError:
+            f.close()
+            if blocking:
+                raise
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def file_stamp(filename):
+    """Ознака версії файлу: змінюється щоразу, коли файл атомарно замінюють."""
+    try:
+        st = os.stat(filename)
     except FileNotFoundError:
-        return NoteBook()
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def journal_seqs(book):
+    """
+    Номери останніх записів журналів (за сесіями), які вже є у знімку книги.
+
+    Знімки старого формату мають один номер `_journal_seq` для журналу
+    без сесії; він відповідає сесії "".
+    """
+    seqs = getattr(book, "_journal_seqs", None)
+    if seqs is None:
+        seqs = {"": getattr(book, "_journal_seq", 0)}
+        book._journal_seqs = seqs
+    return seqs
+
+
+def merge_journal_seqs(book, saved_seqs):
+    seqs = journal_seqs(book)
+    for session, seq in saved_seqs.items():
+        seqs[session] = max(seqs.get(session, 0), seq)
+
+
+def conflict_message(label, key, action):
+    return (
+        f"{label.format(key)} was {action} in another session; "
+        "your changes to it were not saved."
+    )
+
+
+def renumbered_message(label, old_key, new_key):
+    return (
+        f"{label.format(old_key)} was saved as {label.format(new_key)}: "
+        "the ID was taken in another session."
+    )
+
+
+def merge_saved(book, saved, label):
+    """
+    Зливає у book зміни, які інші сесії зберегли після її завантаження.
+
+    Версія кожного запису у saved порівнюється з версією, з якою запис
+    було завантажено (book._versions). Записи, змінені лише іншою сесією,
+    переносяться у book. Запис, змінений і тут, і там, — конфлікт:
+    перемагає вже збережена версія, а локальна зміна відкидається.
+    Нові нотатки, чиї ID зайняла інша сесія, отримують нові ID.
+
+    Args:
+        book: AddressBook або NoteBook поточної сесії
+        saved: Та сама книга, щойно прочитана з диска
+        label: Шаблон назви запису для повідомлень, напр. "Contact '{}'"
+
+    Returns:
+        list: повідомлення про конфлікти та перенумеровані записи
+    """
+    messages = []
+    base, changed = book._versions, book._changed
+    saved_versions = saved._versions
+    detached = book._detach_new(getattr(saved, "_next_id", None))
+
+    # Обхід у порядку записів saved, щоб нові записи додавались у тому ж порядку
+    for key in saved.data:
+        version = saved_versions.get(key, 0)
+        if base.get(key) == version:
+            continue
+        if key in changed and (key in base or key in book.data):
+            messages.append(conflict_message(label, key, "changed"))
+        changed.discard(key)
+        book._adopt(key, saved.data[key])
+        base[key] = version
+
+    for key in [key for key in base if key not in saved_versions]:
+        if key in changed and key in book.data:
+            messages.append(conflict_message(label, key, "deleted"))
+        changed.discard(key)
+        book._adopt(key, None)
+        del base[key]
+
+    for old_key, new_key in book._attach_new(detached):
+        messages.append(renumbered_message(label, old_key, new_key))
+    merge_journal_seqs(book, journal_seqs(saved))
+    # Наступний сегмент має отримати номер, більший за вже згорнуті
+    book._segment = max(folded_segment(book), folded_segment(saved))
+    return messages
+
+
+def commit_versions(book):
+    """Підвищує версії записів, змінених цією сесією, перед їх збереженням."""
+    versions = book._versions
+    for key in book._changed:
+        if key in book.data:
+            versions[key] = versions.get(key, 0) + 1
+        else:
+            versions.pop(key, None)
+
+
+def prefetch_files(files, stamps):
+    """
+    Без блокування читає файли, які змінили після stamps[filename].
+
+    Файли та їх сегменти замінюються атомарно, тож читання без блокування
+    безпечне; ознаку версії беремо до читання, щоб sync_file помітив
+    новіший запис.
+
+    Args:
+        files: [(ім'я файлу, функція завантаження), ...]
+
+    Returns:
+        dict: ім'я файлу -> (ознака версії, книга)
+    """
+    prefetched = {}
+    for filename, load in files:
+        if filename not in stamps:
+            # Книгу цього файлу сесія ще не завантажувала (див. Journal.compact)
+            continue
+        stamp = segments_stamp(filename)
+        if stamp != stamps[filename]:
+            prefetched[filename] = (stamp, load(filename))
+    return prefetched
+
+
+def sync_file(book, filename, stamps, load, label, prefetched=None):
+    """
+    Зливає у book зміни з файлу, якщо його змінили після stamps[filename].
+
+    Args:
+        load: Функція ім'я файлу -> книга або None, якщо файлу немає
+        prefetched: Результат prefetch_files; файл перечитується, лише
+            якщо його змінили ще раз після попереднього читання
+
+    Returns:
+        list: повідомлення merge_saved
+    """
+    if book is None:
+        # Книгу не завантажено, тож і зливати нема з чим
+        return []
+    messages = []
+    stamp = segments_stamp(filename)
+    if stamp != stamps.get(filename):
+        stamp_read, saved = (prefetched or {}).get(filename, (None, None))
+        if saved is None or stamp_read != stamp:
+            saved = load(filename)
+        if saved is not None:
+            messages = merge_saved(book, saved, label)
+            # Знімок з mmap (snapshot_storage) більше не потрібен
+            close = getattr(saved.data, "close", None)
+            if close is not None:
+                close()
+    commit_versions(book)
+    return messages
+
+
+# -------------------------
+# INCREMENTAL SAVES (SEGMENTS)
+# -------------------------
+
+# Скільки сегментів змін може накопичитись до повного перезапису файлу
+MAX_SEGMENTS = 64
+
+
+def segment_files(filename):
+    """
+    Сегменти змін базового файлу у порядку запису.
+
+    Сегмент `<файл>.<номер>` містить лише записи, змінені після
+    попереднього збереження; номери зростають і не повторюються.
+
+    Returns:
+        list: [(номер, ім'я файлу), ...]
+    """
+    segments = []
+    for path in glob.glob(f"{glob.escape(filename)}.*"):
+        suffix = path.rsplit(".", 1)[-1]
+        if suffix.isdigit():
+            segments.append((int(suffix), path))
+    return sorted(segments)
+
+
+def segments_stamp(filename):
+    """Ознака версії базового файлу разом із його сегментами (див. file_stamp)."""
+    return file_stamp(filename), tuple(number for number, _ in segment_files(filename))
+
+
+def folded_segment(book):
+    # Номер останнього сегмента, який уже містить базовий файл книги
+    return getattr(book, "_segment", 0)
+
+
+def apply_segments(book, filename, loads=pickle.loads):
+    """
+    Застосовує до книги, прочитаної з базового файлу, його новіші сегменти.
+
+    Args:
+        loads: Функція байти -> сегмент (pickle.loads або codec.loads_segment)
+
+    Raises:
+        FileNotFoundError: якщо сегмент тим часом згорнула інша сесія
+    """
+    for number, path in segment_files(filename):
+        if number <= folded_segment(book):
+            continue
+        with open(path, "rb") as f:
+            segment = loads(open_reader(f).read())
+        versions = book._versions
+        for key, record in segment["records"].items():
+            book._adopt(key, record)
+        for key in segment["deleted"]:
+            book._adopt(key, None)
+            versions.pop(key, None)
+        versions.update(segment["versions"])
+        merge_journal_seqs(book, segment["journal_seqs"])
+        if segment.get("next_id"):
+            book._next_id = max(book._next_id, segment["next_id"])
+
+
+def load_segmented(filename, load, loads_segment=pickle.loads):
+    """
+    Завантажує книгу з базового файлу (load) і застосовує її сегменти змін.
+
+    Файли читаються без блокування; якщо інша сесія тим часом записала
+    або згорнула сегменти, читання повторюється.
+
+    Returns:
+        книга або None, якщо базового файлу немає
+    """
+    while True:
+        stamp = segments_stamp(filename)
+        book = load(filename)
+        if book is None:
+            return None
+        try:
+            apply_segments(book, filename, loads_segment)
+        except FileNotFoundError:
+            pass
+        else:
+            if segments_stamp(filename) == stamp:
+                return book
+        # Знімок з mmap (snapshot_storage) перед повторним читанням закриваємо
+        close = getattr(book.data, "close", None)
+        if close is not None:
+            close()
+
+
+def should_fold(filename):
+    """
+    Чи час переписати базовий файл повністю замість запису нового сегмента.
+
+    Файл переписується, коли сегментів забагато або вони разом займають
+    більше половини базового файлу, тож повний запис трапляється рідко,
+    а завантаження лишається швидким.
+    """
+    segments = segment_files(filename)
+    if len(segments) >= MAX_SEGMENTS:
+        return True
+    try:
+        base_size = os.path.getsize(filename)
+    except FileNotFoundError:
+        return True
+    return sum(os.path.getsize(path) for _, path in segments) > base_size // 2
+
+
+def fold_segments(book, filename):
+    """
+    Позначає, що книга містить усі наявні сегменти, перед її повним записом.
+
+    Returns:
+        int: номер останнього сегмента, який можна видалити після запису
+    """
+    numbers = [number for number, _ in segment_files(filename)]
+    book._segment = max(numbers + [folded_segment(book)])
+    return book._segment
+
+
+def remove_segments(filename, folded):
+    """Видаляє сегменти, які вже містить повністю записаний базовий файл."""
+    for number, path in segment_files(filename):
+        if number <= folded:
+            os.remove(path)
+
+
+def save_segment(book, filename, dumps=pickle.dumps):
+    """Записує сегмент зі змінами книги (див. dump_segment)."""
+    _write_atomic(*dump_segment(book, filename, dumps))
+
+
+def dump_segment(book, filename, dumps=pickle.dumps):
+    """
+    Серіалізує у новий сегмент записи, змінені після останнього збереження.
+
+    Змінені записи — book._changed; видалені записи потрапляють у список
+    "deleted". Для NoteBook сегмент містить і наступний вільний ID
+    ("next_id"), щоб ID видаленої останньої нотатки не видавався повторно.
+    Номер сегмента береться під блокуванням даних.
+
+    Args:
+        dumps: Функція сегмент -> байти (pickle.dumps або codec.dumps_segment)
+
+    Returns:
+        tuple: (ім'я файлу сегмента, байти) для _write_atomic
+    """
+    changed, data = book._changed, book.data
+    # Обхід у порядку книги, щоб нові записи після завантаження йшли в тому ж порядку
+    records = {key: data[key] for key in data if key in changed} if changed else {}
+    segment = {
+        "records": records,
+        "deleted": [key for key in changed if key not in records],
+        "versions": {key: book._versions.get(key, 0) for key in records},
+        "journal_seqs": dict(journal_seqs(book)),
+    }
+    if hasattr(book, "_next_id"):
+        segment["next_id"] = book._next_id
+    numbers = [number for number, _ in segment_files(filename)]
+    number = max(numbers + [folded_segment(book)]) + 1
+    return f"{filename}.{number}", dumps(segment)
+
+
+# -------------------------
+# STORAGE BACKENDS
+# -------------------------
+
+# Змінна оточення, яка обирає бекенд зберігання
+STORAGE_ENV = "PERSONAL_ASSISTANT_STORAGE"
+
+# Службовий запис журналу: нотатки сесії, перенумеровані при злитті
+RENUMBERED = "renumbered"
+
+
+class PickleStorage:
+    """
+    Бекенд зберігання у pickle-файлах (addressbook.pkl / notes.pkl).
+
+    Між повними записами змінені записи дописуються сегментами
+    `addressbook.pkl.<номер>` / `notes.pkl.<номер>` (див. dump_segment).
+    Кілька процесів можуть працювати з тими самими файлами: перед записом
+    sync() під блокуванням lock() зливає зміни інших сесій.
+
+    Повні файли стискаються кодеком compression (див. get_compression);
+    невеликі сегменти записуються без стиснення.
+    """
+
+    # Серіалізація повного файлу книги і сегмента змін (див. BinaryStorage)
+    _dumps = staticmethod(pickle.dumps)
+    _dumps_segment = staticmethod(pickle.dumps)
+
+    def __init__(self, book_file="addressbook.pkl", notes_file="notes.pkl",
+                 lock_file=LOCK_FILE, compression=None):
+        self.book_file = book_file
+        self.notes_file = notes_file
+        self.lock_file = lock_file
+        self.compression = get_compression(compression)
+        # Файл -> segments_stamp на момент останнього читання або запису цією сесією
+        self._stamps = {}
+        self._prefetched = {}
+
+    def lock(self):
+        return FileLock(self.lock_file)
+
+    def load_book(self):
+        self._stamps[self.book_file] = segments_stamp(self.book_file)
+        return load_data(self.book_file)
+
+    def load_notebook(self):
+        self._stamps[self.notes_file] = segments_stamp(self.notes_file)
+        return load_notes(self.notes_file)
+
+    def _loaders(self):
+        return [(self.book_file, load_data), (self.notes_file, load_notes)]
+
+    def prefetch(self):
+        """Читає без блокування файли, змінені іншими сесіями (див. prefetch_files)."""
+        self._prefetched = prefetch_files(self._loaders(), self._stamps)
+
+    def sync(self, book, notebook):
+        """
+        Зливає зміни, збережені іншими сесіями, і підвищує версії змінених записів.
+
+        Викликається під блокуванням lock() перед snapshot(); файл
+        перечитується лише якщо його змінили після нашого читання чи запису
+        (і після prefetch()).
+
+        Returns:
+            list: повідомлення про конфлікти
+        """
+        prefetched, self._prefetched = self._prefetched, {}
+        (book_file, load_book), (notes_file, load_notebook) = self._loaders()
+        return (
+            sync_file(book, book_file, self._stamps, load_book, CONTACT_LABEL, prefetched)
+            + sync_file(notebook, notes_file, self._stamps, load_notebook, NOTE_LABEL, prefetched)
+        )
+
+    def save_book(self, book):
+        save_data(book, self.book_file, self.compression)
+
+    def save_notebook(self, notebook):
+        save_notes(notebook, self.notes_file, self.compression)
+
+    def snapshot(self, book, notebook):
+        """
+        Серіалізує зміни обох книг і повертає функцію, яка запише їх на диск.
+
+        Зазвичай записуються лише змінені записи, окремими сегментами
+        (див. dump_segment); файл переписується повністю, лише коли
+        сегментів назбиралось достатньо (should_fold). Функцію можна
+        виконати у фоновому потоці: дані вже скопійовано. Незавантажену
+        книгу (None) не записує.
+        """
+        files = [
+            (target, filename)
+            for target, filename in ((book, self.book_file), (notebook, self.notes_file))
+            if target is not None
+        ]
+        writes = [self._snapshot_file(target, filename) for target, filename in files]
+
+        def write():
+            for write_file in writes:
+                write_file()
+            for _, filename in files:
+                self._stamps[filename] = segments_stamp(filename)
+        return write
+
+    def _snapshot_file(self, book, filename):
+        if not should_fold(filename):
+            segment_file, payload = dump_segment(book, filename, self._dumps_segment)
+            return lambda: _write_atomic(segment_file, payload)
+
+        folded = fold_segments(book, filename)
+        payload = self._dumps(book)
+
+        def write():
+            # Стиснення теж виконується тут, тобто у фоновому потоці журналу
+            _write_atomic(filename, payload, self.compression)
+            remove_segments(filename, folded)
+        return write
+
+
+class BinaryStorage(PickleStorage):
+    """
+    Бекенд зберігання у бінарному форматі codec (addressbook.bin / notes.bin).
+
+    Працює так само, як PickleStorage (сегменти змін, злиття сесій), але
+    файли коротші, швидше читаються і не виконують коду при завантаженні.
+    Якщо бінарних файлів ще немає, дані беруться з pickle-файлів.
+    """
+
+    @staticmethod
+    def _dumps(book):
+        from . import codec
+        return codec.dumps(book)
+
+    @staticmethod
+    def _dumps_segment(segment):
+        from . import codec
+        return codec.dumps_segment(segment)
+
+    def __init__(self, book_file="addressbook.bin", notes_file="notes.bin",
+                 legacy_book_file="addressbook.pkl", legacy_notes_file="notes.pkl",
+                 lock_file=LOCK_FILE, compression=None):
+        super().__init__(book_file, notes_file, lock_file, compression)
+        self.legacy_book_file = legacy_book_file
+        self.legacy_notes_file = legacy_notes_file
+
+    def load_book(self):
+        self._stamps[self.book_file] = segments_stamp(self.book_file)
+        return load_binary_data(self.book_file, self.legacy_book_file)
+
+    def load_notebook(self):
+        self._stamps[self.notes_file] = segments_stamp(self.notes_file)
+        return load_binary_notes(self.notes_file, self.legacy_notes_file)
+
+    def _loaders(self):
+        return [(self.book_file, load_binary_segmented), (self.notes_file, load_binary_segmented)]
+
+    def save_book(self, book):
+        save_binary(book, self.book_file, self.compression)
+
+    def save_notebook(self, notebook):
+        save_binary(notebook, self.notes_file, self.compression)
+
+
+def _sqlite_storage():
+    # SQLite імпортується лише тоді, коли його обрано
+    from .sqlite_storage import SQLiteStorage
+    return SQLiteStorage()
+
+
+def _snapshot_storage():
+    from .snapshot_storage import SnapshotStorage
+    return SnapshotStorage()
+
+
+STORAGE_BACKENDS = {
+    "binary": BinaryStorage,
+    "pickle": PickleStorage,
+    "sqlite": _sqlite_storage,
+    "snapshot": _snapshot_storage,
+}
+
+
+def get_storage(name=None):
+    """
+    Створює бекенд зберігання.
+
+    Якщо ввімкнено інструментацію (--instrument), виклики бекенду
+    вимірюються (див. Instrumentation.instrument_storage).
+
+    Args:
+        name: Назва бекенду; за замовчуванням береться зі змінної
+            оточення PERSONAL_ASSISTANT_STORAGE, інакше "binary"
+
+    Raises:
+        ValueError: якщо бекенд з такою назвою не існує
+    """
+    name = name or os.environ.get(STORAGE_ENV, "binary")
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend '{name}'. Available: {', '.join(STORAGE_BACKENDS)}"
+        )
+    storage = STORAGE_BACKENDS[name]()
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.instrument_storage(storage)
+    return storage
+
+
+# -------------------------
+# JOURNAL (WRITE-AHEAD LOG)
+# -------------------------
+
+
+def _map_note_id(args, position, ids):
+    """Замінює ID нотатки args[position] за відповідністю ids (див. Journal.replay)."""
+    try:
+        note_id = int(args[position])
+    except (IndexError, ValueError):
+        return args
+    if note_id not in ids:
+        return args
+    return args[:position] + [str(ids[note_id])] + args[position + 1:]
+
+
+class Journal:
+    """
+    Журнал змін (write-ahead log) для AddressBook та NoteBook.
+
+    Кожна команда, що змінює дані, дописується у кінець журналу одним
+    JSON-рядком `[seq, target, command, args]` ще до виконання (команди
+    нотаток — `[seq, target, command, args, next_id]`, див. replay). fsync
+    виконується пакетно, раз на `sync_every` записів. Компакція зберігає
+    знімки через обраний бекенд (див. get_storage) і видаляє покриті ними
+    сегменти журналу; запис знімків на диск виконується у фоновому потоці.
+
+    Кожен процес веде власний журнал `assistant.journal-<сесія>` і утримує
+    блокування сесії `assistant.journal-<сесія>.lock`, поки працює. Журнал,
+    чиє блокування вільне, лишився після збою: його записи відтворює
+    наступна сесія (replay) і видаляє після своєї компакції.
+
+    Кожен знімок пам'ятає номер останнього запису кожної сесії, який він
+    уже містить (`_journal_seqs`), тому при відтворенні записи, що вже
+    потрапили у знімок, пропускаються навіть після збою посеред компакції.
+
+    Бекенди зберігають лише записи, змінені після попередньої компакції,
+    тож компакція дешева і виконується також за часом — не рідше ніж раз
+    на `autosave_every` секунд, якщо у журналі є нові записи.
+    """
+
+    def __init__(self, storage, filename="assistant.journal", sync_every=32,
+                 compact_every=1000, autosave_every=5.0):
+        self.storage = storage
+        self.base_filename = filename
+        self.session = os.urandom(6).hex()
+        self.filename = self._session_filename(self.session)
+        self.sync_every = sync_every
+        self.compact_every = compact_every
+        self.autosave_every = autosave_every
+        self._saved_at = time.monotonic()
+        self.seq = 0
+        self._entries = 0
+        self._unsynced = 0
+        self._file = None
+        self._compaction = None
+        # Сесія -> (FileLock, останній seq) для відтворених журналів інших сесій
+        self._recovered = {}
+        # Записи цих журналів до replay: [(сесія, seq, ціль, команда, args, next_id)]
+        self._pending = None
+        self._session_lock = FileLock(f"{self.filename}.lock")
+        # Під блокуванням даних, щоб replay іншого процесу не прийняв
+        # щойно створений файл блокування за покинутий
+        with storage.lock():
+            self._session_lock.acquire()
+
+    def _session_filename(self, session):
+        # Сесія "" — журнал старого формату, спільний для всіх процесів
+        return f"{self.base_filename}-{session}" if session else self.base_filename
+
+    def _segments(self, filename=None):
+        """Повертає ротовані сегменти журналу у порядку створення."""
+        filename = filename or self.filename
+        segments = glob.glob(f"{glob.escape(filename)}.*")
+        segments = [s for s in segments if s.rsplit(".", 1)[-1].isdigit()]
+        return sorted(segments, key=lambda s: int(s.rsplit(".", 1)[-1]))
+
+    def _journal_files(self, session):
+        """Сегменти і поточний файл журналу сесії, які існують."""
+        filename = self._session_filename(session)
+        files = self._segments(filename)
+        if os.path.exists(filename):
+            files.append(filename)
+        return files
+
+    def _other_sessions(self):
+        """Сесії інших процесів, від яких лишились журнали чи блокування."""
+        prefix = f"{self.base_filename}-"
+        sessions = {
+            path[len(prefix):].split(".", 1)[0]
+            for path in glob.glob(f"{glob.escape(prefix)}*")
+        }
+        sessions.discard(self.session)
+        if self._journal_files(""):
+            sessions.add("")
+        return sorted(sessions)
+
+    def recover(self):
+        """
+        Забирає журнали покинутих сесій і читає їх записи (лише один раз).
+
+        Журнали, які утримує інший живий процес, пропускаються.
+
+        Returns:
+            set: цілі ("book" / "notebook"), для яких у журналах є записи;
+                ці книги треба завантажити і передати в replay
+        """
+        if self._pending is None:
+            self._pending = self._read_abandoned()
+        return {entry[2] for entry in self._pending}
+
+    def replay(self, book, notebook, note_args=None):
+        """
+        Повертає записи журналів покинутих сесій, яких ще немає у знімках.
+
+        Нова нотатка при відтворенні може отримати інший ID, ніж у сесії,
+        що її створила: той ID могла зайняти інша сесія, а злиття могло
+        перенумерувати нотатку (запис RENUMBERED). Тому для кожної сесії
+        ведеться відповідність її ID нотаток поточним: перед командою
+        записується next_id книги сесії, а ID, видані при відтворенні,
+        видно з notebook._next_id до і після команди. ID в аргументах
+        наступних команд сесії перекладаються за цією відповідністю.
+
+        Args:
+            book, notebook: Книги; незавантажену книгу можна передати як
+                None, якщо для неї немає записів (див. recover)
+            note_args: Команда -> позиція ID нотатки в її аргументах
+
+        Yields:
+            tuple: (command, args) у порядку запису; команду треба
+                виконати до наступної ітерації
+        """
+        self.recover()
+        note_args = note_args or {}
+        books = {"book": book, "notebook": notebook}
+        snapshot_seqs = {
+            target: journal_seqs(book) for target, book in books.items() if book is not None
+        }
+        # Сесія -> {ID нотатки в сесії: ID після відтворення}
+        note_ids = {}
+        pending, self._pending = self._pending, []
+        for session, seq, target, command, args, next_id in pending:
+            if books[target] is None:
+                raise ValueError(f"Journal has entries for {target}, but it was not loaded.")
+            if seq <= snapshot_seqs[target].get(session, 0):
+                continue
+            ids = note_ids.setdefault(session, {})
+            if command == RENUMBERED:
+                for old_id, new_id in args:
+                    ids[new_id] = ids.pop(old_id, old_id)
+                continue
+            if command in note_args:
+                args = _map_note_id(args, note_args[command], ids)
+            first_id = notebook._next_id if target == "notebook" else None
+            yield command, args
+            if next_id is not None and first_id is not None:
+                for offset in range(notebook._next_id - first_id):
+                    ids[next_id + offset] = first_id + offset
+
+    def _read_abandoned(self):
+        entries = []
+        with self.storage.lock():
+            for session in self._other_sessions():
+                lock = None
+                if session:
+                    lock = FileLock(f"{self._session_filename(session)}.lock")
+                    if not lock.acquire(blocking=False):
+                        continue
+                files = self._journal_files(session)
+                if not files:
+                    # Сесія завершилась, не встигнувши прибрати блокування
+                    lock.release()
+                    os.remove(lock.filename)
+                    continue
+
+                last_seq = 0
+                for filename in files:
+                    with open(filename, encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                seq, target, command, args, *next_id = json.loads(line)
+                            except ValueError:
+                                # Обірваний останній рядок після збою
+                                break
+                            last_seq = max(last_seq, seq)
+                            entries.append(
+                                (session, seq, target, command, args, (next_id or [None])[0])
+                            )
+                self._recovered[session] = (lock, last_seq)
+        return entries
+
+    def append(self, target, command, args, notebook=None):
+        """
+        Дописує команду у журнал до її виконання.
+
+        Args:
+            notebook: Для команд нотаток — книга, чий наступний ID
+                записується разом з командою (див. replay)
+        """
+        if self._file is None:
+            self._file = open(self.filename, "a", encoding="utf-8")
+        self.seq += 1
+        entry = [self.seq, target, command, args]
+        if target == "notebook" and notebook is not None:
+            entry.append(notebook._next_id)
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._entries += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Скидає накопичені записи журналу на диск."""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def should_compact(self):
+        """Чи накопичилось у журналі достатньо записів або настав час автозбереження."""
+        if not self._entries:
+            return False
+        return (
+            self._entries >= self.compact_every
+            or time.monotonic() - self._saved_at >= self.autosave_every
+        )
+
+    def _rotate(self):
+        """Закриває поточний файл журналу як сегмент і починає новий."""
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.filename):
+            os.replace(self.filename, f"{self.filename}.{self.seq}")
+        self._entries = 0
+
+    def _update_seqs(self, book):
+        """Записує у книгу номери записів, які містить знімок, і забуває завершені сесії."""
+        seqs = journal_seqs(book)
+        seqs[self.session] = self.seq
+        for session, (_, seq) in self._recovered.items():
+            seqs[session] = max(seqs.get(session, 0), seq)
+        for session in list(seqs):
+            if session == self.session or session in self._recovered:
+                continue
+            lock_file = f"{self._session_filename(session)}.lock"
+            if not self._journal_files(session) and not (session and os.path.exists(lock_file)):
+                del seqs[session]
+
+    def _write_snapshot(self, write, seq, recovered, lock):
+        try:
+            write()
+            for segment in self._segments():
+                if int(segment.rsplit(".", 1)[-1]) <= seq:
+                    os.remove(segment)
+            # Відтворені журнали тепер покриті знімком
+            for session, (session_lock, _) in recovered.items():
+                for filename in self._journal_files(session):
+                    os.remove(filename)
+                if session_lock is not None:
+                    session_lock.release()
+                    os.remove(session_lock.filename)
+        finally:
+            lock.release()
+
+    def compact(self, book, notebook, background=True):
+        """
+        Згортає журнал у знімок.
+
+        Під блокуванням даних бекенд зливає зміни, які інші сесії зберегли
+        після нашого завантаження (storage.sync), і серіалізує дані;
+        запис на диск виконується у фоновому потоці, якщо background=True.
+        Блокування звільняється одразу після запису.
+
+        Книгу, яку сесія так і не завантажила, передають як None: змін у
+        ній немає, тож її файли не читаються і не переписуються.
+
+        Returns:
+            list: повідомлення про конфлікти з іншими сесіями
+        """
+        self.wait()
+        # Чужі зміни читаються до блокування, щоб не тримати його довше потрібного
+        self.storage.prefetch()
+        lock = self.storage.lock()
+        lock.acquire()
+        try:
+            conflicts = self.storage.sync(book, notebook)
+            if notebook is not None and notebook._renumbered:
+                # Записи журналу до цього місця посилаються на старі ID;
+                # запис RENUMBERED потрапляє у цей знімок, тож відтворюється
+                # лише разом з ними, якщо знімок не встигне записатись
+                self.append("notebook", RENUMBERED, notebook._renumbered)
+                notebook._renumbered = []
+            loaded = [target for target in (book, notebook) if target is not None]
+            for target in loaded:
+                self._update_seqs(target)
+            write = self.storage.snapshot(book, notebook)
+            for target in loaded:
+                target._changed.clear()
+        except BaseException:
+            lock.release()
+            raise
+        self._rotate()
+        self._saved_at = time.monotonic()
+        recovered, self._recovered = self._recovered, {}
+
+        args = (write, self.seq, recovered, lock)
+        if not background:
+            self._write_snapshot(*args)
+            return conflicts
+        self._compaction = threading.Thread(
+            target=self._write_snapshot,
+            args=args,
+            daemon=False,
+        )
+        self._compaction.start()
+        return conflicts
+
+    def wait(self):
+        """Очікує завершення фонової компакції."""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self):
+        """
+        Завершує компакцію, закриває файл журналу і звільняє блокування сесії.
+
+        Незбережені записи лишаються у журналі: його відтворить наступна сесія.
+        """
+        self.wait()
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with self.storage.lock():
+            for lock, _ in self._recovered.values():
+                if lock is not None:
+                    lock.release()
+            self._recovered = {}
+            self._session_lock.release()
+            os.remove(self._session_lock.filename)
@@ -0,0 +1,323 @@
+"""
+Streaming import and export of contacts and notes (CSV / JSONL).
+
+Файли обробляються конвеєром генераторів: читання рядків -> пакети ->
+валідація пакета -> застосування до книги. У пам'яті одночасно лежить
+лише один пакет, тож розмір файлу не обмежений обсягом пам'яті.
+"""
+
+import csv
+import json
+import os
+from itertools import islice
+
+from .contacts.contact import Record
+from .contacts.validation import (
+    LIST_SEPARATOR,
+    BulkValidator,
+    split_list,
+    validate_contact_rows,
+)
+from .notes.note import Note
+
+BATCH_SIZE = 1000
+# Розмір пакета при перевірці у кількох процесах: пакет ділиться між ними
+PARALLEL_BATCH_SIZE = 50_000
+# Скільки повідомлень про помилки зберігати для звіту (решта лише рахується)
+MAX_REPORTED_ERRORS = 20
+
+CONTACT_FIELDS = ("name", "phones", "birthday", "email", "address")
+NOTE_FIELDS = ("id", "content", "tags", "date_added")
+
+
+# -------------------------
+# FORMATS
+# -------------------------
+
+def detect_format(filename):
+    """
+    Визначає формат файлу за розширенням.
+
+    Raises:
+        ValueError: якщо розширення не .csv, .jsonl або .ndjson
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError("Unsupported file format. Use .csv or .jsonl")
+
+
+def read_rows(f, fmt):
+    """
+    Читає рядки файлу по одному.
+
+    Yields:
+        tuple: (номер рядка, dict або ValueError, якщо рядок не розібрано)
+    """
+    if fmt == "csv":
+        # Рядок 1 — заголовок
+        for row_number, row in enumerate(csv.DictReader(f), 2):
+            yield row_number, row
+        return
+    for row_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, ValueError("Invalid JSON.")
+            continue
+        if not isinstance(row, dict):
+            row = ValueError("Row must be a JSON object.")
+        yield row_number, row
+
+
+def write_rows(f, fmt, fields, rows):
+    """Записує рядки (dict) у файл; у CSV списки з'єднуються через ';'."""
+    if fmt == "jsonl":
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
+    writer = csv.DictWriter(f, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            key: LIST_SEPARATOR.join(value) if isinstance(value, list) else value
+            for key, value in row.items()
+        })
+
+
+def batched(rows, size=BATCH_SIZE):
+    """Групує рядки у списки до size елементів."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+# -------------------------
+# VALIDATION
+# -------------------------
+
+def _optional(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_note_batch(batch):
+    """
+    Перевіряє пакет рядків нотаток.
+
+    Returns:
+        tuple: (список валідних dict, список (номер рядка, повідомлення))
+    """
+    valid, errors = [], []
+    for row_number, row in batch:
+        if isinstance(row, Exception):
+            errors.append((row_number, str(row)))
+            continue
+        content = _optional(row, "content")
+        if not content:
+            errors.append((row_number, "Note content cannot be empty."))
+            continue
+        valid.append({
+            "content": content,
+            "tags": [tag.lower() for tag in split_list(row.get("tags"))],
+            "date_added": _optional(row, "date_added"),
+        })
+    return valid, errors
+
+
+# -------------------------
+# APPLY
+# -------------------------
+
+def apply_contact(book, contact):
+    """
+    Додає контакт до книги або доповнює існуючий.
+
+    Нові телефони дописуються, решта полів замінюється, якщо задана.
+    Значення вже перевірені (validate_contact_rows / BulkValidator), тож
+    поля створюються з них напряму, без повторної валідації.
+    """
+    record = book.find(contact["name"])
+    is_new = record is None
+    if is_new:
+        record = Record(contact["name"])
+    record._add_fields(
+        contact["phones"], contact["birthday"], contact["email"], contact["address"])
+    if is_new:
+        book.add_record(record)
+
+
+def apply_note(notebook, note):
+    new_note = Note(note["content"], note["tags"])
+    if note["date_added"]:
+        new_note.date_added = note["date_added"]
+    notebook.add_note(new_note)
+
+
+class ImportReport:
+    """Підсумок імпорту: кількість застосованих рядків і помилки за рядками."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_errors(self, errors):
+        self.failed += len(errors)
+        free = MAX_REPORTED_ERRORS - len(self.errors)
+        if free > 0:
+            self.errors.extend(errors[:free])
+
+    def __str__(self):
+        lines = [f"Imported {self.imported} row(s) from {self.filename}."]
+        if self.failed:
+            lines.append(f"Skipped {self.failed} invalid row(s):")
+            lines.extend(f"  Row {row_number}: {message}" for row_number, message in self.errors)
+            if self.failed > len(self.errors):
+                lines.append(f"  ... and {self.failed - len(self.errors)} more")
+        return "\n".join(lines)
+
+
+def import_file(filename, validate, apply, batch_size=BATCH_SIZE):
+    """
+    Імпортує файл пакетами: validate(пакет) -> (валідні, помилки), apply(валідний рядок).
+
+    Raises:
+        ValueError: якщо формат не підтримується або файл не вдається відкрити
+    """
+    fmt = detect_format(filename)
+    report = ImportReport(filename)
+    try:
+        f = open(filename, encoding="utf-8", newline="")
+    except OSError as e:
+        raise ValueError(f"Cannot open file '{filename}': {e.strerror}")
+    with f:
+        for batch in batched(read_rows(f, fmt), batch_size):
+            valid, errors = validate(batch)
+            report.add_errors(errors)
+            for row in valid:
+                apply(row)
+            report.imported += len(valid)
+    return report
+
+
+def export_file(filename, fields, rows):
+    """
+    Записує рядки у файл і повертає їх кількість.
+
+    Raises:
+        ValueError: якщо формат не підтримується або файл не вдається створити
+    """
+    fmt = detect_format(filename)
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    try:
+        f = open(filename, "w", encoding="utf-8", newline="")
+    except OSError as e:
+        raise ValueError(f"Cannot create file '{filename}': {e.strerror}")
+    with f:
+        write_rows(f, fmt, fields, counted(rows))
+    return count
+
+
+def contact_rows(book):
+    for name, record in book.data.items():
+        yield {
+            "name": name,
+            "phones": [phone.value for phone in record.phones],
+            "birthday": record.birthday.value if record.birthday else "",
+            "email": record.email.value if record.email else "",
+            "address": record.address.value if record.address else "",
+        }
+
+
+def note_rows(notebook):
+    for note_id, note in notebook.data.items():
+        yield {
+            "id": note_id,
+            "content": note.content,
+            "tags": sorted(note.tags),
+            "date_added": note.date_added,
+        }
+
+
+# -------------------------
+# HANDLERS
+# -------------------------
+
+def _filename(args, usage):
+    if not args:
+        raise IndexError(f"Enter a file name. Usage: {usage}")
+    return " ".join(args)
+
+
+def _workers(args):
+    """Забирає з аргументів --workers N; повертає (N або None, решта аргументів)."""
+    if "--workers" not in args:
+        return None, args
+    i = args.index("--workers")
+    if i + 1 >= len(args) or not (args[i + 1].isascii() and args[i + 1].isdigit()) \
+            or int(args[i + 1]) < 1:
+        raise ValueError("Number of workers must be a positive integer.")
+    return int(args[i + 1]), args[:i] + args[i + 2:]
+
+
+def import_contacts_handler(args, book):
+    """
+    Імпортує контакти з CSV або JSONL файлу.
+
+    З --workers N рядки перевіряються великими пакетами у N процесах.
+    """
+    usage = "import-contacts <file.csv|file.jsonl> [--workers N]"
+    workers, args = _workers(args)
+    filename = _filename(args, usage)
+
+    def apply(contact):
+        apply_contact(book, contact)
+
+    if workers is None:
+        return str(import_file(filename, validate_contact_rows, apply))
+    with BulkValidator(workers) as validate:
+        return str(import_file(filename, validate, apply, PARALLEL_BATCH_SIZE))
+
+
+def export_contacts_handler(args, book):
+    """Експортує контакти у CSV або JSONL файл."""
+    filename = _filename(args, "export-contacts <file.csv|file.jsonl>")
+    count = export_file(filename, CONTACT_FIELDS, contact_rows(book))
+    return f"Exported {count} contact(s) to {filename}."
+
+
+def import_notes_handler(args, notebook):
+    """Імпортує нотатки з CSV або JSONL файлу (ID призначаються заново)."""
+    filename = _filename(args, "import-notes <file.csv|file.jsonl>")
+    report = import_file(
+        filename,
+        validate_note_batch,
+        lambda note: apply_note(notebook, note),
+    )
+    return str(report)
+
+
+def export_notes_handler(args, notebook):
+    """Експортує нотатки у CSV або JSONL файл."""
+    filename = _filename(args, "export-notes <file.csv|file.jsonl>")
+    count = export_file(filename, NOTE_FIELDS, note_rows(notebook))
+    return f"Exported {count} note(s) to {filename}."
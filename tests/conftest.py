@@ -0,0 +1,20 @@
+"""
+Спільні фікстури тестів.
+
+Усі файли даних (книги, журнали, блокування) створюються у поточному
+каталозі, тож кожен тест працює в окремому тимчасовому каталозі.
+"""
+import pytest
+
+from personal_assistant.query_cache import QUERY_CACHE
+from personal_assistant.storage import STORAGE_ENV
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Тимчасовий робочий каталог з бекендом за замовчуванням і порожнім кешем запитів."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(STORAGE_ENV, raising=False)
+    QUERY_CACHE.clear()
+    yield tmp_path
+    QUERY_CACHE.clear()
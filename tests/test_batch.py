@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from personal_assistant.cli import run_batch
+from personal_assistant.storage import get_storage
+
+
+def batch(lines):
+    output, report = io.StringIO(), io.StringIO()
+    code = run_batch(lines, output=output, report=report)
+    return code, output.getvalue(), report.getvalue()
+
+
+def test_batch_saves_all_changes_once(workdir):
+    code, output, report = batch([
+        "# коментар",
+        "add Ann 0501234567",
+        "",
+        "add-email Ann ann@example.com",
+        "add-note Buy milk",
+    ])
+
+    assert code == 0
+    assert "Contact added." in output
+    assert "Executed 3 command(s)" in report
+    storage = get_storage()
+    assert str(storage.load_book().find("Ann")) == "Ann: 0501234567, ann@example.com, no address"
+    assert len(storage.load_notebook().data) == 1
+
+
+@pytest.mark.parametrize("failing", [
+    "add-email Bob bob@example.com",
+    "add-birthday Bob 01.01.2000",
+    "add-address Bob Kyiv",
+    "change Bob 0501234567 0671234567",
+    "phone Bob",
+    "show-birthday Bob",
+    "add-birthday Ann 31.02.2000",
+    "no-such-command",
+])
+def test_failing_line_rolls_back_the_batch(workdir, failing):
+    code, output, report = batch([
+        "add Ann 0501234567",
+        "add-note Buy milk",
+        failing,
+        "add Carl 0931234567",
+    ])
+
+    assert code == 1
+    assert f"Line 3: {failing}" in report
+    assert "Batch rolled back: 2 command(s) discarded." in report
+    storage = get_storage()
+    assert not storage.load_book().data
+    assert not storage.load_notebook().data
+
+
+def test_rolled_back_batch_keeps_earlier_data(workdir):
+    assert batch(["add Ann 0501234567"])[0] == 0
+
+    code, _, _ = batch(["add-email Ann ann@example.com", "add-email Bob bob@example.com"])
+
+    assert code == 1
+    assert str(get_storage().load_book().find("Ann")) == "Ann: 0501234567, no email, no address"
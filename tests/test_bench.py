@@ -0,0 +1,28 @@
+from personal_assistant.bench import (
+    build_book,
+    build_notebook,
+    bench_commands,
+    failed_operations,
+    measure,
+)
+from personal_assistant.cli import COMMANDS
+from personal_assistant.contacts.input_error import ErrorMessage
+
+
+def test_every_command_runs_without_errors(workdir):
+    size = 50
+    book, notebook = build_book(size), build_notebook(size)
+
+    results = bench_commands(book, notebook, size, repeat=3)
+
+    assert set(results) == set(COMMANDS)
+    assert failed_operations({"results": {str(size): {"commands": results}}}) == []
+    # Імпорт справді читає файл: контакти з нього додано до книги
+    assert book.find("ImportedContact0") is not None
+    assert len(notebook.data) > size
+
+
+def test_error_results_are_counted():
+    stats = measure(lambda i: ErrorMessage("Contact not found.") if i % 2 else "ok", 4)
+
+    assert stats["errors"] == 2
@@ -0,0 +1,37 @@
+import pytest
+
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.contacts.birthday_query import parse_birthday_query
+from personal_assistant.contacts.contact import Record
+
+
+@pytest.fixture
+def book():
+    book = AddressBook()
+    for name, birthday in [("Ann", "01.02.1990"), ("Bob", "15.02.1985"), ("Carl", "01.12.1990")]:
+        record = Record(name)
+        record.add_phone("0501234567")
+        record.add_birthday(birthday)
+        book.add_record(record)
+    return book
+
+
+def names(book, *args):
+    return [name for _, name in book.find_by_birthday(parse_birthday_query(list(args)))]
+
+
+def test_date_parts_and_options(book):
+    assert names(book, "01.02") == ["Ann"]
+    assert names(book, "1990") == ["Ann", "Carl"]
+    assert names(book, "--month", "2") == ["Bob", "Ann"]
+    assert names(book, "--day", "1", "--year", "1990") == ["Ann", "Carl"]
+
+
+@pytest.mark.parametrize("query", ["01.01.²", "٠١.٠٢", "01.0²"])
+def test_unicode_digits_match_nothing(book, query):
+    assert names(book, query) == []
+
+
+def test_unicode_digits_in_options_are_usage_errors():
+    with pytest.raises(ValueError, match="--day must be a number from 1 to 31"):
+        parse_birthday_query(["--day", "²"])
@@ -0,0 +1,46 @@
+import json
+import socket
+import threading
+
+from personal_assistant.client import AssistantClient
+from personal_assistant.protocol import encode
+
+
+def serve_once(listener, script):
+    """Приймає одне з'єднання і на кожен запит надсилає відповіді зі script."""
+    connection, _ = listener.accept()
+    with connection, connection.makefile("rwb") as stream:
+        for replies in script:
+            json.loads(stream.readline())
+            for reply in replies:
+                stream.write(encode(reply))
+            stream.flush()
+
+
+def test_rest_of_an_interrupted_stream_is_skipped(tmp_path):
+    path = str(tmp_path / "assistant.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    script = [
+        [{"id": 1, "ok": True, "lines": ["Ann: 0501234567"], "done": False}],
+        [
+            {"id": 1, "ok": True, "lines": ["Bob: 0671234567"], "done": True},
+            {"id": 2, "ok": True, "lines": ["0931234567"], "done": True},
+        ],
+    ]
+    thread = threading.Thread(target=serve_once, args=(listener, script))
+    thread.start()
+
+    client = AssistantClient(f"unix:{path}")
+    try:
+        lines = client.request("all-contacts", [])
+        assert next(lines) == "Ann: 0501234567"
+        # Ctrl+C під час виводу: решту відповіді вже не читаємо
+        lines.close()
+
+        assert list(client.request("phone", ["Carl"])) == ["0931234567"]
+    finally:
+        client.close()
+        thread.join()
+        listener.close()
@@ -0,0 +1,131 @@
+import io
+
+import pytest
+
+from personal_assistant import codec
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.contacts.contact import Record
+from personal_assistant.notes.note import Note, NoteBook
+
+
+def make_book():
+    book = AddressBook()
+    ann = Record("Ann")
+    ann.add_phone("0501234567")
+    ann.add_phone("0000000001")
+    ann.add_birthday("29.02.2000")
+    ann.add_email("ann@example.com")
+    ann.add_address("Kyiv, Khreshchatyk 1")
+    book.add_record(ann)
+    book.add_record(Record("Бодя"))
+    book._versions = {"Ann": 3, "Бодя": 1}
+    book._journal_seqs = {"abc": 7}
+    return book
+
+
+def old_contacts_file(monkeypatch, rows):
+    """Файл книги, записаний схемою contacts версії 0 (без поля address)."""
+    version, fields = codec.SCHEMAS["contacts"]
+    old_fields = tuple(field for field in fields if field[0] != "address")
+    f = io.BytesIO()
+    f.write(codec.MAGIC)
+    codec.write_frame(f, {"kind": "contacts", "state": {}, "index_version": 0})
+    with monkeypatch.context() as patch:
+        patch.setitem(codec.SCHEMAS, "contacts", (0, old_fields))
+        codec.write_table(f, "contacts", rows)
+    codec.write_frame(f, None)
+    return f.getvalue()
+
+
+def test_contacts_round_trip():
+    book = codec.loads(codec.dumps(make_book()))
+
+    assert list(book.data) == ["Ann", "Бодя"]
+    assert str(book.find("Ann")) == (
+        "Ann: 0501234567, 0000000001, ann@example.com, Kyiv, Khreshchatyk 1"
+    )
+    assert str(book.find("Ann").birthday) == "29.02.2000"
+    assert str(book.find("Бодя")) == "Бодя: no phones, no email, no address"
+    assert book._versions == {"Ann": 3, "Бодя": 1}
+    assert book._journal_seqs == {"abc": 7}
+    # Індекси відновлені
+    assert book.find_by_phone("000-000-00-01")[0] is book.find("Ann")
+    assert book.complete_names("б") == ["Бодя"]
+
+
+def test_notes_round_trip_keeps_text_index():
+    notebook = NoteBook()
+    for content in ("Купити молоко", "Call the plumber", "молоко і хліб"):
+        notebook.add_note(Note(content))
+    notebook.data[2].add_tag("home")
+    notebook.delete_note(1)
+
+    loaded = codec.loads(codec.dumps(notebook))
+
+    assert list(loaded.data) == [2, 3]
+    assert loaded._next_id == 4
+    assert loaded.data[2].tags == {"home"}
+    assert loaded.data[3].date_added == notebook.data[3].date_added
+    assert list(loaded.find_note("молоко")) == [3]
+    assert loaded._text_index.lengths == notebook._text_index.lengths
+
+
+def test_segment_round_trip():
+    book = make_book()
+    segment = {
+        "records": dict(book.data),
+        "deleted": ["Carl"],
+        "versions": book._versions,
+        "journal_seqs": {"abc": 7},
+        "next_id": None,
+    }
+
+    loaded = codec.loads_segment(codec.dumps_segment(segment))
+
+    assert list(loaded["records"]) == ["Ann", "Бодя"]
+    assert str(loaded["records"]["Ann"]) == str(book.find("Ann"))
+    assert loaded["deleted"] == ["Carl"]
+    assert loaded["versions"] == {"Ann": 3, "Бодя": 1}
+    assert loaded["journal_seqs"] == {"abc": 7}
+
+
+def test_old_schema_rows_are_migrated(monkeypatch):
+    data = old_contacts_file(monkeypatch, [("Ann", [501234567], None, None, 2)])
+
+    def add_address(row):
+        row["address"] = "unknown"
+        return row
+    monkeypatch.setitem(codec.MIGRATIONS, ("contacts", 0), add_address)
+
+    book = codec.loads(data)
+
+    assert str(book.find("Ann")) == "Ann: 0501234567, no email, unknown"
+    assert book._versions == {"Ann": 2}
+    assert book.find_by_phone("0501234567")[0] is book.find("Ann")
+
+
+def test_missing_migration_and_newer_schema_are_rejected(monkeypatch):
+    data = old_contacts_file(monkeypatch, [("Ann", [], None, None, 0)])
+    with pytest.raises(ValueError, match="No migration for 'contacts' schema 0."):
+        codec.loads(data)
+
+    data = codec.dumps(make_book())
+    version, fields = codec.SCHEMAS["contacts"]
+    monkeypatch.setitem(codec.SCHEMAS, "contacts", (version - 1, fields))
+    with pytest.raises(ValueError, match="newer version of the program"):
+        codec.loads(data)
+
+
+def test_unknown_tables_are_skipped_and_corruption_is_reported():
+    end = io.BytesIO()
+    codec.write_frame(end, None)
+    f = io.BytesIO(codec.dumps(make_book())[:-len(end.getvalue())])
+    f.seek(0, io.SEEK_END)
+    codec.write_table(f, "lengths", [(1, 2)])
+    codec.write_frame(f, None)
+    data = f.getvalue()
+    # Таблиця lengths невідома книзі контактів, але файл читається
+    assert list(codec.loads(data).data) == ["Ann", "Бодя"]
+
+    with pytest.raises(ValueError, match="corrupted"):
+        codec.loads(data[:len(data) // 2])
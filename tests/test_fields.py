@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from personal_assistant.contacts.address_book import normalize_phone
+from personal_assistant.contacts.contact import Record
+from personal_assistant.contacts.fields import Birthday, Phone
+from personal_assistant.contacts.validation import validate_contact_row
+
+
+def test_phone_is_stored_as_ten_digits():
+    phone = Phone("0501234567")
+
+    assert phone.value == "0501234567"
+    assert phone._raw == 501234567
+
+
+@pytest.mark.parametrize("value", [
+    "050123456",
+    "05012345678",
+    "050-123-456",
+    "050123456²",
+    "٠٥٠١٢٣٤٥٦٧",
+    "０５０１２３４５６７",
+])
+def test_invalid_phones_are_rejected_with_the_format_message(value):
+    with pytest.raises(ValueError, match="exactly 10 digits"):
+        Phone(value)
+
+
+def test_record_and_import_reject_unicode_digits():
+    record = Record("Ann")
+    with pytest.raises(ValueError, match="exactly 10 digits"):
+        record.add_phone("050123456²")
+    assert record.phones == []
+
+    with pytest.raises(ValueError, match="exactly 10 digits"):
+        validate_contact_row({"name": "Ann", "phones": "٠٥٠١٢٣٤٥٦٧"}, datetime.now())
+
+
+def test_normalize_phone_keeps_ascii_digits_only():
+    assert normalize_phone("(050) 123-45-67") == "0501234567"
+    assert normalize_phone("٠٥٠١٢٣٤٥٦٧") == ""
+
+
+def test_birthday_round_trips_through_its_ordinal():
+    birthday = Birthday("29.02.2000")
+
+    assert Birthday._from_raw(birthday._raw).value == "29.02.2000"
+    with pytest.raises(ValueError):
+        Birthday("30.02.2000")
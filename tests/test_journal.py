@@ -0,0 +1,164 @@
+import glob
+
+import pytest
+
+from personal_assistant.cli import COMMANDS, execute, open_session
+
+
+def run(session, command, *args):
+    """Виконує команду так само, як інтерактивний режим (run_cli)."""
+    handler = COMMANDS[command]
+    book, notebook = session.for_command(handler)
+    if handler.target is not None and not handler.checkpoint:
+        session.journal.append(handler.target, command, list(args), notebook)
+    return execute(handler, list(args), book, notebook)
+
+
+def crash(session):
+    """Імітує аварійне завершення: журнал сесії лишається на диску, блокування звільняється."""
+    journal = session.journal
+    journal.wait()
+    journal.sync()
+    if journal._file is not None:
+        journal._file.close()
+    journal._session_lock.release()
+
+
+def close(session):
+    messages = session.compact(background=False)
+    session.journal.close()
+    return messages
+
+
+def notes(session):
+    return {
+        note_id: (note.content, sorted(note.tags))
+        for note_id, note in session.notebook.data.items()
+    }
+
+
+def test_crashed_session_is_replayed_once(workdir):
+    first = open_session()
+    run(first, "add", "Ann", "0501234567")
+    run(first, "add-note", "Buy", "milk")
+    run(first, "add-tag", "1", "shop")
+    crash(first)
+
+    second = open_session()
+    assert str(second.book.find("Ann")) == "Ann: 0501234567, no email, no address"
+    assert notes(second) == {1: ("Buy milk", ["shop"])}
+    close(second)
+    assert glob.glob("assistant.journal-*") == []
+
+    third = open_session()
+    assert notes(third) == {1: ("Buy milk", ["shop"])}
+    assert len(third.book.data) == 1
+    close(third)
+
+
+def test_replay_skips_entries_already_in_snapshot(workdir):
+    first = open_session()
+    run(first, "add-note", "saved")
+    first.compact(background=False)
+    run(first, "add-note", "journaled")
+    run(first, "edit-note", "1", "saved, then edited")
+    crash(first)
+
+    second = open_session()
+    assert notes(second) == {1: ("saved, then edited", []), 2: ("journaled", [])}
+    close(second)
+
+
+def test_torn_last_journal_line_is_ignored(workdir):
+    first = open_session()
+    run(first, "add-note", "kept")
+    crash(first)
+    with open(first.journal.filename, "a", encoding="utf-8") as f:
+        f.write('[2, "notebook", "add-no')
+
+    second = open_session()
+    assert notes(second) == {1: ("kept", [])}
+    close(second)
+
+
+def test_concurrent_sessions_merge_and_renumber_notes(workdir):
+    first, second = open_session(), open_session()
+    run(first, "add", "Ann", "0501234567")
+    run(first, "add-note", "from first")
+    run(second, "add", "Bob", "0671234567")
+    run(second, "add-note", "from second")
+    run(second, "add-email", "Bob", "bob@example.com")
+    assert close(first) == []
+
+    messages = close(second)
+
+    assert messages == ["Note 1 was saved as Note 2: the ID was taken in another session."]
+    third = open_session()
+    assert list(third.book.data) == ["Ann", "Bob"]
+    assert notes(third) == {1: ("from first", []), 2: ("from second", [])}
+    close(third)
+
+
+def test_conflicting_changes_keep_the_saved_version(workdir):
+    setup = open_session()
+    run(setup, "add", "Ann", "0501234567")
+    close(setup)
+
+    first, second = open_session(), open_session()
+    run(first, "add-email", "Ann", "first@example.com")
+    run(second, "add-email", "Ann", "second@example.com")
+    close(first)
+
+    assert close(second) == [
+        "Contact 'Ann' was changed in another session; your changes to it were not saved."
+    ]
+    third = open_session()
+    assert third.book.find("Ann").email.value == "first@example.com"
+    close(third)
+
+
+def test_replay_maps_ids_of_notes_created_by_the_crashed_session(workdir):
+    crashed, other = open_session(), open_session()
+    run(crashed, "add-note", "from crashed")
+    run(crashed, "add-tag", "1", "mine")
+    run(other, "add-note", "from other")
+    close(other)
+    crash(crashed)
+
+    # При відтворенні нотатка отримує ID 2: ID 1 уже зайняла інша сесія
+    recovered = open_session()
+    assert notes(recovered) == {1: ("from other", []), 2: ("from crashed", ["mine"])}
+    close(recovered)
+
+
+def test_replay_follows_renumbering_of_an_unsaved_compaction(workdir, monkeypatch):
+    crashed, first, late = open_session(), open_session(), open_session()
+    run(crashed, "add-note", "from crashed")
+    run(crashed, "add-tag", "1", "before")
+    run(first, "add-note", "first 1")
+    run(first, "add-note", "first 2")
+    close(first)
+
+    # Злиття перенумерує нотатку 1 на 3, але знімок не встигає записатись
+    def failing_snapshot(book, notebook):
+        def write():
+            raise OSError("disk full")
+        return write
+    monkeypatch.setattr(crashed.storage, "snapshot", failing_snapshot)
+    with pytest.raises(OSError):
+        crashed.compact(background=False)
+    run(crashed, "add-tag", "3", "after")
+
+    # Тим часом інша сесія зберігає нотатку з ID 3
+    run(late, "add-note", "from late")
+    close(late)
+    crash(crashed)
+
+    recovered = open_session()
+    assert notes(recovered) == {
+        1: ("first 1", []),
+        2: ("first 2", []),
+        3: ("from late", []),
+        4: ("from crashed", ["after", "before"]),
+    }
+    close(recovered)
@@ -0,0 +1,79 @@
+import pytest
+
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.contacts.contact import Record, show_all
+from personal_assistant.contacts.input_error import ErrorMessage
+from personal_assistant.notes.handlers import show_all_notes_handler
+from personal_assistant.notes.note import Note, NoteBook
+from personal_assistant.pagination import parse_page_args
+from personal_assistant.snapshot_storage import load_snapshot, save_snapshot
+from personal_assistant.sqlite_storage import SQLiteStorage
+
+
+def make_book(names):
+    book = AddressBook()
+    for name in names:
+        book.add_record(Record(name))
+    return book
+
+
+def fill(notebook, count):
+    for i in range(count):
+        notebook.add_note(Note(f"note {i + 1}"))
+    return notebook
+
+
+def note_ids(notebook, *args):
+    return [line.split(":")[0] for line in show_all_notes_handler(list(args), notebook)][1:]
+
+
+def test_contacts_page_after_cursor():
+    book = make_book(["Ann", "Bob", "Carl", "Dan"])
+
+    lines = list(show_all(["--after", "Ann", "--limit", "2"], book))
+
+    assert [line.split(":")[0] for line in lines[:2]] == ["Bob", "Carl"]
+    assert lines[2] == "Next page: all-contacts --after Carl --limit 2"
+
+
+def test_deleted_contact_cursor_is_reported():
+    book = make_book(["Ann", "Bob", "Carl"])
+    book.delete("Bob")
+
+    result = show_all(["--after", "Bob"], book)
+
+    assert isinstance(result, ErrorMessage)
+    assert "no longer listed" in result
+
+
+def test_notes_resume_after_deleted_cursor():
+    notebook = fill(NoteBook(), 6)
+    notebook.delete_note(3)
+
+    assert note_ids(notebook, "--after", "2", "--limit", "2") == ["ID 4", "ID 5", "Next page"]
+    assert note_ids(notebook, "--after", "3") == ["ID 4", "ID 5", "ID 6"]
+
+
+def test_lazy_notebooks_page_from_the_cursor(workdir):
+    storage = SQLiteStorage()
+    notebook = fill(storage.load_notebook(), 5)
+    storage.save_notebook(notebook)
+    notebook = SQLiteStorage().load_notebook()
+    notebook.delete_note(2)
+    fill(notebook, 1)
+
+    assert list(notebook.iter_ids(1)) == [3, 4, 5, 6]
+
+    save_snapshot(fill(NoteBook(), 5), "notes.snap")
+    notebook = load_snapshot("notes.snap", NoteBook)
+    notebook.delete_note(4)
+    fill(notebook, 1)
+
+    assert list(notebook.iter_ids(2)) == [3, 5, 6]
+    assert not notebook.data.cache.keys() - {6}
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "x", "²"])
+def test_invalid_limits_are_rejected(value):
+    with pytest.raises(ValueError, match="--limit must be a positive integer."):
+        parse_page_args(["--limit", value])
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from personal_assistant.cli import COMMANDS, _birthdays_key, open_session
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.contacts.contact import Record
+from personal_assistant.contacts.input_error import ErrorMessage
+from personal_assistant.notes.note import Note, NoteBook
+from personal_assistant.query_cache import QUERY_CACHE, QueryCache
+
+
+def run(command, *args, book=None, notebook=None):
+    return COMMANDS[command](list(args), book, notebook)
+
+
+def test_birthdays_key_accepts_only_ascii_digits(workdir):
+    assert _birthdays_key(["007"])[0] == "7"
+    assert _birthdays_key(["²"])[0] == ("²",)
+    assert _birthdays_key(["٣"])[0] == ("٣",)
+
+    result = run("birthdays", "²", book=AddressBook(), notebook=NoteBook())
+    assert isinstance(result, ErrorMessage)
+    assert result.startswith("Number of days must be a non-negative integer.")
+    assert not QUERY_CACHE.entries
+
+
+def test_note_changes_invalidate_cached_results(workdir):
+    notebook = NoteBook()
+    notebook.add_note(Note("Buy milk"))
+    first = run("find-note", "milk", notebook=notebook)
+    assert run("find-note", "milk", notebook=notebook) is first
+    assert QUERY_CACHE.hits == 1
+
+    notebook.add_note(Note("More milk"))
+    assert "More milk" in run("find-note", "milk", notebook=notebook)
+
+    # Зміни через методи Note теж починають нове покоління
+    assert "Buy milk" not in run("find-by-tag", "shop", notebook=notebook)
+    notebook.data[1].add_tag("shop")
+    assert "Buy milk" in run("find-by-tag", "shop", notebook=notebook)
+    notebook.data[1].content = "Buy bread"
+    assert "More milk" in run("find-note", "milk", notebook=notebook)
+    assert "Buy" not in run("find-note", "milk", notebook=notebook)
+
+
+def test_record_changes_invalidate_birthdays(workdir):
+    book = AddressBook()
+    book.add_record(Record("Ann"))
+    assert "Ann" not in run("birthdays", "7", book=book)
+
+    soon = date.today() + timedelta(days=2)
+    book.find("Ann").add_birthday(soon.replace(year=2000).strftime("%d.%m.%Y"))
+    assert "Ann" in run("birthdays", "7", book=book)
+
+
+def test_changes_merged_from_another_session_invalidate_results(workdir):
+    first, second = open_session(), open_session()
+    assert "Buy milk" not in COMMANDS["find-note"](["milk"], None, first.notebook)
+
+    second.notebook.add_note(Note("Buy milk"))
+    second.compact(background=False)
+    second.journal.close()
+    first.compact(background=False)
+
+    assert "Buy milk" in COMMANDS["find-note"](["milk"], None, first.notebook)
+    first.journal.close()
+
+
+def test_cache_evicts_least_recently_used_results():
+    # Місця вистачає на два результати
+    cache = QueryCache(max_bytes=300)
+    call = cache.wrap("echo", " ".join, ("args",), lambda args, book, notebook: "x" * 40)
+    for key in ("a", "b", "a", "c"):
+        call([key], None, None)
+
+    assert [key for _, key in cache.entries] == ["a", "c"]
+    assert (cache.hits, cache.evictions) == (1, 1)
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from personal_assistant.server import AssistantServer
+
+
+class Writer:
+    """Замість з'єднання: збирає надіслані відповіді."""
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, data):
+        self.messages.extend(json.loads(line) for line in data.decode("utf-8").splitlines())
+
+    async def drain(self):
+        pass
+
+
+@pytest.fixture
+def server(workdir):
+    server = AssistantServer()
+    yield server
+    server.close()
+
+
+def request(server, command, *args, request_id=1):
+    writer = Writer()
+    raw = json.dumps({"id": request_id, "command": command, "args": list(args)}).encode()
+    asyncio.run(server.handle_request(raw, writer))
+    return writer.messages
+
+
+def test_commands_from_many_clients_run_in_order(server):
+    async def clients():
+        writers = [Writer() for _ in range(20)]
+        await asyncio.gather(*(
+            server.handle_request(
+                json.dumps({"id": i, "command": "add", "args": [f"C{i}", "0501234567"]}).encode(),
+                writer,
+            )
+            for i, writer in enumerate(writers)
+        ))
+        return writers
+
+    writers = asyncio.run(clients())
+
+    assert all(writer.messages[-1]["lines"] == ["Contact added."] for writer in writers)
+    assert len(server.book.data) == 20
+
+
+def test_long_output_is_sent_in_chunks(server):
+    for i in range(300):
+        request(server, "add", f"C{i:03d}", "0501234567")
+
+    messages = request(server, "all-contacts", request_id=7)
+
+    assert [message["done"] for message in messages] == [False, True]
+    assert all(message["id"] == 7 and message["ok"] for message in messages)
+    assert sum(len(message["lines"]) for message in messages) == 300
+
+
+def test_errors_are_reported(server):
+    assert request(server, "phone", "Nobody") == [
+        {"id": 1, "ok": False, "error": "Contact not found.", "done": True}
+    ]
+    assert request(server, "no-such-command")[0]["error"] == "Invalid command."
+
+
+def test_import_and_export_stay_inside_the_data_directory(server, workdir, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "secret.csv").write_text("name,phones\nEve,0501234567\n", encoding="utf-8")
+    (workdir / "link").symlink_to(outside)
+
+    for command, filename in [
+        ("import-contacts", str(outside / "secret.csv")),
+        ("import-contacts", "../" + outside.name + "/secret.csv"),
+        ("import-contacts", "link/secret.csv"),
+        ("export-contacts", str(outside / "leak.csv")),
+        ("export-notes", "/tmp/../" + str(outside / "leak.jsonl")),
+    ]:
+        messages = request(server, command, filename)
+        assert messages[0]["error"] == "Files must be inside the server data directory."
+    assert server.book.find("Eve") is None
+    assert sorted(path.name for path in outside.iterdir()) == ["secret.csv"]
+
+    (workdir / "contacts.csv").write_text("name,phones\nAnn,0501234567\n", encoding="utf-8")
+    assert request(server, "import-contacts", "contacts.csv", "--workers", "1")[0]["ok"]
+    assert request(server, "export-contacts", "out.csv")[0]["lines"] == [
+        "Exported 1 contact(s) to out.csv."
+    ]
+
+
+def test_conflicts_go_to_the_server_log(server, caplog, capsys):
+    request(server, "add", "Ann", "0501234567")
+    server.journal.compact(server.book, server.notebook, background=False)
+    other = AssistantServer()
+    request(other, "add-email", "Ann", "ann@example.com")
+    other.close()
+
+    request(server, "add-address", "Ann", "Kyiv")
+    with caplog.at_level(logging.WARNING, logger="personal_assistant.server"):
+        server.report_conflicts(server.journal.compact(server.book, server.notebook, background=False))
+
+    assert any(record.getMessage().startswith("Conflict: ") for record in caplog.records)
+    assert capsys.readouterr().out == ""
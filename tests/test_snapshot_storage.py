@@ -0,0 +1,113 @@
+import pytest
+
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.contacts.contact import Record
+from personal_assistant.notes.note import Note, NoteBook
+from personal_assistant.snapshot_storage import MAGIC, load_snapshot, save_snapshot
+
+
+def make_book():
+    book = AddressBook()
+    for name, phone in [("Ann", "0501234567"), ("Bob", "0671234567")]:
+        record = Record(name)
+        record.add_phone(phone)
+        book.add_record(record)
+    book.find("Ann").add_birthday("01.02.1990")
+    book.find("Ann").add_email("ann@example.com")
+    book.find("Bob").add_address("Kyiv")
+    return book
+
+
+def test_round_trip_is_lazy_and_pickle_free(workdir):
+    save_snapshot(make_book(), "addressbook.snap")
+    with open("addressbook.snap", "rb") as f:
+        assert b"personal_assistant" not in f.read()
+
+    book = load_snapshot("addressbook.snap", AddressBook)
+
+    assert list(book.data) == ["Ann", "Bob"]
+    assert not book.data.cache
+    assert str(book.find("Ann")) == "Ann: 0501234567, ann@example.com, no address"
+    assert str(book.find("Bob")) == "Bob: 0671234567, no email, Kyiv"
+    assert [record.name.value for record in book.find_by_phone("067-123-45-67")] == ["Bob"]
+
+
+def test_resave_keeps_unchanged_records_and_changes(workdir):
+    save_snapshot(make_book(), "addressbook.snap")
+    book = load_snapshot("addressbook.snap", AddressBook)
+    book.find("Ann").add_phone("0991234567")
+    book.delete("Bob")
+    carl = Record("Carl")
+    carl.add_phone("0931234567")
+    book.add_record(carl)
+
+    save_snapshot(book, "addressbook.snap")
+    book.data.close()
+    loaded = load_snapshot("addressbook.snap", AddressBook)
+
+    assert list(loaded.data) == ["Ann", "Carl"]
+    assert str(loaded.find("Ann")) == "Ann: 0501234567, 0991234567, ann@example.com, no address"
+    assert loaded.find("Carl").phones[0].value == "0931234567"
+
+
+def test_indexes_are_built_without_reading_records(workdir):
+    save_snapshot(make_book(), "addressbook.snap")
+    book = load_snapshot("addressbook.snap", AddressBook)
+    book.find("Ann").add_phone("0991234567")
+    book.delete("Bob")
+    carl = Record("Carl")
+    carl.add_phone("0671234567")
+    book.add_record(carl)
+
+    assert book.complete_names("") == ["Ann", "Carl"]
+    assert book._names_by_phone("0991234567") == ["Ann"]
+    assert book._names_by_phone("0671234567") == ["Carl"]
+    assert book._names_by_email("ann@example.com") == ["Ann"]
+    assert list(book.data.cache) == ["Ann", "Carl"]
+
+    # Незмінені записи при перезаписі беруть поля індексів зі старого футера
+    save_snapshot(book, "addressbook.snap")
+    book.data.close()
+    loaded = load_snapshot("addressbook.snap", AddressBook)
+    assert loaded._names_by_phone("0991234567") == ["Ann"]
+    assert loaded._birthday_index == {(2, 1): {"Ann": None}}
+    assert not loaded.data.cache
+
+
+def test_snapshot_without_index_table_reads_records(workdir):
+    save_snapshot(make_book(), "addressbook.snap")
+    book = load_snapshot("addressbook.snap", AddressBook)
+    book.data.index_offset = None
+
+    assert book._names_by_phone("0671234567") == ["Bob"]
+    assert list(book.data.cache) == ["Ann", "Bob"]
+
+
+def test_notes_keep_tags_and_next_id(workdir):
+    notebook = NoteBook()
+    for content in ("first", "second"):
+        notebook.add_note(Note(content))
+    notebook.data[1].add_tag("work")
+    notebook.delete_note(2)
+    save_snapshot(notebook, "notes.snap")
+
+    loaded = load_snapshot("notes.snap", NoteBook)
+
+    assert loaded.data[1].tags == {"work"}
+    assert loaded._next_id == 3
+    assert list(loaded.find_by_tag("work")) == [1]
+
+
+def test_corrupted_snapshot_is_rejected(workdir):
+    save_snapshot(make_book(), "addressbook.snap")
+    with open("addressbook.snap", "r+b") as f:
+        data = bytearray(f.read())
+        data[len(MAGIC) + 1] ^= 0xFF
+        f.seek(0)
+        f.write(data)
+
+    book = load_snapshot("addressbook.snap", AddressBook)
+    with pytest.raises(ValueError):
+        book.find("Ann")
+    with pytest.raises(ValueError):
+        load_snapshot("addressbook.snap", NoteBook)
@@ -0,0 +1,25 @@
+from personal_assistant.contacts.contact import Record
+from personal_assistant.sqlite_storage import SQLiteStorage
+
+
+def add(book, name, phone):
+    record = Record(name)
+    record.add_phone(phone)
+    book.add_record(record)
+    return record
+
+
+def test_contacts_survive_reload_and_index_rebuild(workdir):
+    storage = SQLiteStorage()
+    book = storage.load_book()
+    add(book, "Ann", "0501234567").add_birthday("01.02.1990")
+    add(book, "Bob", "0671234567")
+    storage.save_book(book)
+
+    book = SQLiteStorage().load_book()
+    # Базовий метод передає bulk=True у _index_record підкласу
+    book._rebuild_indexes()
+
+    assert [record.name.value for record in book.find_by_phone("0671234567")] == ["Bob"]
+    assert book.complete_names("a") == ["Ann"]
+    assert str(book.find("Ann").birthday) == "01.02.1990"
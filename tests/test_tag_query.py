@@ -0,0 +1,55 @@
+import pytest
+
+from personal_assistant.notes.note import Note, NoteBook
+from personal_assistant.notes.tag_query import parse_tag_query
+
+
+@pytest.fixture
+def notebook():
+    notebook = NoteBook()
+    for content, tags in [
+        ("report", ["work", "urgent"]),
+        ("groceries", ["home"]),
+        ("draft post", ["work", "-draft"]),
+        ("logic", ["and", "or"]),
+        ("done report", ["work", "done"]),
+    ]:
+        note = Note(content)
+        note_id = notebook.add_note(note)
+        for tag in tags:
+            notebook.data[note_id].add_tag(tag)
+    return notebook
+
+
+def found(notebook, query):
+    return sorted(note.content for note in notebook.find_by_tag(query).values())
+
+
+def test_boolean_queries(notebook):
+    assert found(notebook, "work and urgent") == ["report"]
+    assert found(notebook, "work urgent") == ["report"]
+    assert found(notebook, "urgent or home") == ["groceries", "report"]
+    assert found(notebook, "work not done") == ["draft post", "report"]
+    assert found(notebook, "work -done") == ["draft post", "report"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("-draft", ["draft post"]),
+    ("and", ["logic"]),
+    ("OR", ["logic"]),
+    ('"not"', []),
+    ("'-draft'", ["draft post"]),
+])
+def test_single_word_is_a_literal_tag(notebook, query, expected):
+    assert found(notebook, query) == expected
+
+
+def test_quoted_words_are_literal_tags(notebook):
+    assert found(notebook, 'work and "-draft"') == ["draft post"]
+    assert found(notebook, "work not '-draft'") == ["done report", "report"]
+    assert found(notebook, '"and" "or"') == ["logic"]
+
+
+def test_empty_query_is_an_error():
+    with pytest.raises(ValueError):
+        parse_tag_query("and or")
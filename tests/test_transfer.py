@@ -0,0 +1,64 @@
+import pytest
+
+from personal_assistant.contacts.address_book import AddressBook
+from personal_assistant.notes.note import NoteBook
+from personal_assistant.transfer import (
+    export_contacts_handler,
+    export_notes_handler,
+    import_contacts_handler,
+    import_notes_handler,
+)
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_contacts_round_trip_through_csv_and_jsonl(workdir):
+    source = write(workdir / "in.csv", (
+        "name,phones,birthday,email,address\n"
+        "Ann,0501234567;0671234567,01.02.1990,ANN@example.com,Kyiv\n"
+        "Bob,12345,,,\n"
+        "Ann,0501234567;0931234567,,,\n"
+    ))
+    book = AddressBook()
+
+    report = import_contacts_handler([source], book)
+
+    assert report.splitlines()[:3] == [
+        f"Imported 2 row(s) from {source}.",
+        "Skipped 1 invalid row(s):",
+        "  Row 3: Invalid phone number format. Phone must contain exactly 10 digits.",
+    ]
+    assert str(book.find("Ann")) == "Ann: 0501234567, 0671234567, 0931234567, ann@example.com, Kyiv"
+    assert book.find_by_phone("0931234567")[0] is book.find("Ann")
+
+    for name in ("out.csv", "out.jsonl"):
+        assert export_contacts_handler([name], book) == f"Exported 1 contact(s) to {name}."
+        copy = AddressBook()
+        import_contacts_handler([name], copy)
+        assert str(copy.find("Ann")) == str(book.find("Ann"))
+        assert str(copy.find("Ann").birthday) == "01.02.1990"
+
+
+def test_notes_get_new_ids_on_import(workdir):
+    source = write(workdir / "in.jsonl", (
+        '{"id": 7, "content": "first", "tags": ["work"], "date_added": "2024-01-01 10:00:00"}\n'
+        "not json\n"
+        '{"content": "second"}\n'
+    ))
+    notebook = NoteBook()
+
+    report = import_notes_handler([source], notebook)
+
+    assert report.startswith(f"Imported 2 row(s) from {source}.")
+    assert list(notebook.data) == [1, 2]
+    assert notebook.data[1].tags == {"work"}
+    assert export_notes_handler(["notes.csv"], notebook) == "Exported 2 note(s) to notes.csv."
+
+
+@pytest.mark.parametrize("workers", ["0", "x", "²"])
+def test_invalid_worker_counts_are_rejected(workdir, workers):
+    with pytest.raises(ValueError, match="Number of workers must be a positive integer."):
+        import_contacts_handler(["in.csv", "--workers", workers], AddressBook())